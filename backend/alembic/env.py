@@ -0,0 +1,49 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.core.config import settings
+from app.db.session import Base
+
+# Import all models so autogenerate sees every table
+from app.models import user, portfolio, notification
+
+target_metadata = Base.metadata
+
+if context.config.config_file_name is not None:
+    fileConfig(context.config.config_file_name, disable_existing_loggers=False)
+
+def get_url() -> str:
+    # A connection or URL passed in by init_db takes precedence over the settings
+    return context.config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+def run_migrations_offline():
+    """Emit the migration SQL without connecting: alembic upgrade head --sql"""
+    context.configure(url=get_url(), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        _run(connection)
+        return
+    engine = create_engine(get_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        _run(connection)
+
+def _run(connection):
+    # Batch mode lets the same migrations alter tables on SQLite
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite"
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
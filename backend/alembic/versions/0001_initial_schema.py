@@ -0,0 +1,72 @@
+"""Initial schema
+
+Matches the tables Base.metadata.create_all built before migrations existed, so
+such a database can be adopted with `alembic stamp 0001`.
+
+Revision ID: 0001
+Revises:
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "portfolios",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_portfolios_id", "portfolios", ["id"])
+    op.create_index("ix_portfolios_name", "portfolios", ["name"])
+
+    op.create_table(
+        "assets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("portfolio_id", sa.Integer(), sa.ForeignKey("portfolios.id")),
+        sa.Column("symbol", sa.String()),
+        sa.Column("asset_type", sa.String()),
+        sa.Column("quantity", sa.Float()),
+        sa.Column("purchase_price", sa.Float()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_assets_id", "assets", ["id"])
+    op.create_index("ix_assets_symbol", "assets", ["symbol"])
+
+    op.create_table(
+        "alerts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("asset_id", sa.Integer(), sa.ForeignKey("assets.id")),
+        sa.Column("alert_type", sa.String()),
+        sa.Column("threshold_value", sa.Float()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("notification_method", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_alerts_id", "alerts", ["id"])
+
+def downgrade():
+    op.drop_table("alerts")
+    op.drop_table("assets")
+    op.drop_table("portfolios")
+    op.drop_table("users")
@@ -0,0 +1,24 @@
+"""Add users.token_version
+
+Revision ID: 0002
+Revises: 0001
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Databases created by create_all after the column was added already have it
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("users")}
+    if "token_version" in columns:
+        return
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+def downgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("token_version")
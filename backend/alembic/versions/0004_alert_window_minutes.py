@@ -0,0 +1,20 @@
+"""Add alerts.window_minutes for window alert types
+
+Revision ID: 0004
+Revises: 0003
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("alerts") as batch_op:
+        batch_op.add_column(sa.Column("window_minutes", sa.Integer(), nullable=True))
+
+def downgrade():
+    with op.batch_alter_table("alerts") as batch_op:
+        batch_op.drop_column("window_minutes")
@@ -0,0 +1,30 @@
+"""Add the notifications table for dashboard notifications
+
+Revision ID: 0005
+Revises: 0004
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "notifications",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("alert_id", sa.Integer()),
+        sa.Column("symbol", sa.String()),
+        sa.Column("alert_type", sa.String()),
+        sa.Column("price", sa.Float()),
+        sa.Column("message", sa.String()),
+        sa.Column("is_read", sa.Boolean(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_notifications_user_id_id", "notifications", ["user_id", "id"])
+
+def downgrade():
+    op.drop_table("notifications")
@@ -0,0 +1,29 @@
+"""Index unread notifications per user
+
+Serves the unread-only feed, unread recounts and mark-read on users with long
+notification histories, touching only their unread rows.
+
+Revision ID: 0006
+Revises: 0005
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # SQLite only uses a partial index when the query repeats its predicate term,
+    # and `Notification.is_read == False` renders as `is_read = 0` there
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_notifications_unread_user_id_id", "notifications", ["user_id", "id"],
+            postgresql_where=sa.text("NOT is_read"),
+            sqlite_where=sa.text("is_read = 0"),
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    op.drop_index("ix_notifications_unread_user_id_id", table_name="notifications")
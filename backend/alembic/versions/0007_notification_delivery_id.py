@@ -0,0 +1,24 @@
+"""Add notifications.delivery_id so retried inserts don't duplicate notifications
+
+Revision ID: 0007
+Revises: 0006
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("notifications", sa.Column("delivery_id", sa.String(32)))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_notifications_delivery_id", "notifications", ["delivery_id"],
+            unique=True, postgresql_concurrently=True
+        )
+
+def downgrade():
+    op.drop_index("ix_notifications_delivery_id", table_name="notifications")
+    op.drop_column("notifications", "delivery_id")
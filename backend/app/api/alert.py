@@ -1,82 +1,112 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
-from app.db.session import get_db
-from app.api.deps import get_current_active_user
+from app.db.session import AnySession, get_session
+from app.api.deps import get_current_active_user, Page
 from app.models.user import User
-from app.schemas.alert import Alert, AlertCreate, AlertUpdate
+from app.core.config import settings
+from app.schemas.alert import Alert, AlertCreate, AlertUpdate, AlertBatch, AlertBatchResult, AlertValidationError
 from app.db.repositories.alert import (
-    get_alerts_by_asset, get_alert, create_alert, update_alert, delete_alert
+    aget_alerts_by_asset, aget_alert, acreate_alert, aupdate_alert, adelete_alert, aapply_alert_batch
 )
 
 router = APIRouter()
 
 @router.get("/asset/{asset_id}", response_model=List[Alert])
-def read_alerts_by_asset(
+async def read_alerts_by_asset(
     asset_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    page: Page = Depends(),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Retrieve all alerts for a specific asset.
+    Retrieve the alerts for a specific asset, a page at a time.
     """
-    alerts = get_alerts_by_asset(db, asset_id, current_user.id)
+    alerts = await aget_alerts_by_asset(db, asset_id, current_user.id, page.limit, page.after)
+    page.set_next_cursor(response, alerts)
     return alerts
 
 @router.post("/", response_model=Alert, status_code=status.HTTP_201_CREATED)
-def create_new_alert(
+async def create_new_alert(
     alert: AlertCreate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Create a new alert.
     """
-    db_alert = create_alert(db, alert, current_user.id)
+    db_alert = await acreate_alert(db, alert, current_user.id)
     if db_alert is None:
         raise HTTPException(status_code=404, detail="Asset not found or does not belong to user")
     return db_alert
 
+@router.post("/batch", response_model=AlertBatchResult)
+async def apply_alert_batch_endpoint(
+    batch: AlertBatch,
+    db: AnySession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Create, update and delete many alerts at once. The batch is applied as a
+    whole, or not at all if it references an asset or alert the user doesn't own.
+    """
+    alert_ids = [alert.id for alert in batch.update] + batch.delete
+    if len(batch.create) + len(alert_ids) > settings.ALERT_BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.ALERT_BATCH_MAX_OPERATIONS} operations per batch")
+    if len(set(alert_ids)) != len(alert_ids):
+        raise HTTPException(status_code=400, detail="Each alert can only be updated or deleted once per batch")
+
+    try:
+        result = await aapply_alert_batch(db, batch, current_user.id)
+    except AlertValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Asset or alert not found or does not belong to user")
+    return result
+
 @router.get("/{alert_id}", response_model=Alert)
-def read_alert(
+async def read_alert(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get a specific alert by ID.
     """
-    alert = get_alert(db, alert_id, current_user.id)
+    alert = await aget_alert(db, alert_id, current_user.id)
     if alert is None:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
 
 @router.put("/{alert_id}", response_model=Alert)
-def update_alert_endpoint(
+async def update_alert_endpoint(
     alert_id: int,
     alert_data: AlertUpdate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Update an alert.
     """
-    alert = update_alert(db, alert_id, alert_data, current_user.id)
+    try:
+        alert = await aupdate_alert(db, alert_id, alert_data, current_user.id)
+    except AlertValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if alert is None:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
 
 @router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_alert_endpoint(
+async def delete_alert_endpoint(
     alert_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Delete an alert.
     """
-    success = delete_alert(db, alert_id, current_user.id)
+    success = await adelete_alert(db, alert_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Alert not found")
     return {"detail": "Alert deleted successfully"}
\ No newline at end of file
@@ -4,47 +4,87 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.core.security import create_access_token
+from app.core.security import create_access_token, password_hasher
 from app.db.session import get_db
-from app.schemas.user import User, UserCreate, Token
-from app.db.repositories.user import authenticate_user, create_user, get_user_by_email
+from app.api.deps import get_current_active_user
+from app.models.user import User as UserModel
+from app.schemas.user import User, UserCreate, Token, PasswordChange
+from app.db.repositories.user import (
+    create_user, get_user_by_email, change_password, update_password_hash
+)
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 
 @router.post("/signup", response_model=User)
-def signup(user_in: UserCreate, db: Session = Depends(get_db)) -> Any:
+async def signup(user_in: UserCreate, db: Session = Depends(get_db)) -> Any:
     """
     Create new user.
     """
-    user = get_user_by_email(db, email=user_in.email)
+    # Database calls run on the threadpool and bcrypt in the password process pool
+    user = await run_in_threadpool(get_user_by_email, db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    user = create_user(db, user_in)
+    # Return the connection to the pool rather than holding it idle while bcrypt runs
+    await run_in_threadpool(db.close)
+    hashed_password = await password_hasher.ahash(user_in.password)
+    user = await run_in_threadpool(create_user, db, user_in, hashed_password)
     return user
 
 @router.post("/login", response_model=Token)
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = authenticate_user(db, email=form_data.username, password=form_data.password)
-    if not user:
+    user = await run_in_threadpool(get_user_by_email, db, form_data.username)
+    # Return the connection to the pool rather than holding it idle while bcrypt runs;
+    # the user stays loaded, detached from the session
+    await run_in_threadpool(db.close)
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await password_hasher.averify_and_update(form_data.password, user.hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # The stored hash used a different bcrypt cost than BCRYPT_ROUNDS
+        await run_in_threadpool(update_password_hash, db, user, new_hash)
+    # Warm the principal cache so the first authenticated request doesn't hit the database
+    await run_in_threadpool(principal_cache.set, user)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": create_access_token(
-            data={"sub": user.email}, expires_delta=access_token_expires
+            data={"sub": user.email, "uid": user.id, "ver": user.token_version},
+            expires_delta=access_token_expires
         ),
         "token_type": "bearer",
-    }
\ No newline at end of file
+    }
+
+@router.put("/password", status_code=status.HTTP_204_NO_CONTENT)
+async def change_password_endpoint(
+    password_in: PasswordChange,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user)
+):
+    """
+    Change the current user's password. All existing tokens stop working.
+    """
+    user = await run_in_threadpool(db.get, UserModel, current_user.id)
+    # Return the connection to the pool rather than holding it idle while bcrypt runs
+    await run_in_threadpool(db.close)
+    verified, _ = await password_hasher.averify_and_update(password_in.current_password, user.hashed_password)
+    if not verified:
+        raise HTTPException(status_code=400, detail="Incorrect password")
+    hashed_password = await password_hasher.ahash(password_in.new_password)
+    await run_in_threadpool(change_password, db, user, password_in.new_password, hashed_password)
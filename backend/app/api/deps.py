@@ -1,20 +1,19 @@
-from typing import Optional
-from fastapi import Depends, HTTPException, status
+from typing import Optional, Sequence
+from fastapi import Depends, HTTPException, Query, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import SessionLocal
 from app.models.user import User
 from app.schemas.user import TokenData
 from app.db.repositories.user import get_user_by_email
+from app.services.principal_cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+def get_user_from_token(token: str) -> User:
+    """Resolve the user a bearer token belongs to, raising 401 if it is invalid or revoked"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -27,17 +26,51 @@ def get_current_user(
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = TokenData(email=email, user_id=payload.get("uid"), token_version=payload.get("ver", 0))
     except JWTError:
         raise credentials_exception
-    user = get_user_by_email(db, email=token_data.email)
+
+    if token_data.user_id is None:
+        # Tokens issued before the user id was added to the claims
+        with SessionLocal() as db:
+            user = get_user_by_email(db, email=token_data.email)
+        # Revoked by a password change like any other token
+        if user is not None and (user.token_version or 0) != token_data.token_version:
+            raise credentials_exception
+    else:
+        # Served from the principal cache; the database is only queried on a miss
+        user = principal_cache.get(token_data.user_id, token_data.token_version)
     if user is None:
         raise credentials_exception
     return user
 
+def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    return get_user_from_token(token)
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+class Page:
+    """
+    Keyset pagination parameters: up to `limit` rows past the row with id `after`
+    in the listing's order, i.e. with a greater id, or a smaller one for listings
+    that are newest first.
+
+    When a page is full, the id to pass as `after` for the next page is returned
+    in the X-Next-Cursor header.
+    """
+    def __init__(
+        self,
+        limit: int = Query(100, ge=1, le=500),
+        after: Optional[int] = Query(None, description="Id of the last row of the previous page")
+    ):
+        self.limit = limit
+        self.after = after
+
+    def set_next_cursor(self, response: Response, rows: Sequence):
+        if len(rows) == self.limit:
+            response.headers["X-Next-Cursor"] = str(rows[-1].id)
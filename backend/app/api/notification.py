@@ -0,0 +1,58 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query, Response
+from starlette.concurrency import run_in_threadpool
+
+from app.db.session import AnySession, get_session
+from app.api.deps import get_current_active_user, Page
+from app.models.user import User
+from app.schemas.notification import Notification, NotificationMarkRead, UnreadCount, MarkReadResult
+from app.db.repositories.notification import aget_notifications, acount_unread, amark_read
+from app.services.unread_counter import unread_counter
+
+router = APIRouter()
+
+async def _unread_count(db: AnySession, user_id: int) -> int:
+    unread = await run_in_threadpool(unread_counter.get, user_id)
+    if unread is None:
+        unread = await acount_unread(db, user_id)
+        await run_in_threadpool(unread_counter.seed, user_id, unread)
+    return unread
+
+@router.get("/", response_model=List[Notification])
+async def read_notifications(
+    response: Response,
+    page: Page = Depends(),
+    unread_only: bool = Query(False),
+    db: AnySession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Retrieve the user's notifications, newest first, a page at a time.
+    """
+    notifications = await aget_notifications(db, current_user.id, page.limit, page.after, unread_only)
+    page.set_next_cursor(response, notifications)
+    return notifications
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def read_unread_count(
+    db: AnySession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get how many of the user's notifications are unread.
+    """
+    return {"unread": await _unread_count(db, current_user.id)}
+
+@router.post("/read", response_model=MarkReadResult)
+async def mark_notifications_read(
+    mark: NotificationMarkRead,
+    db: AnySession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Mark the user's notifications with ids from `from_id` to `up_to` read, or all
+    of them if neither is given.
+    """
+    marked = await amark_read(db, current_user.id, mark.up_to, mark.from_id)
+    await run_in_threadpool(unread_counter.add, {current_user.id: -marked})
+    return {"marked": marked, "unread": await _unread_count(db, current_user.id)}
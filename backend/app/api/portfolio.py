@@ -1,129 +1,198 @@
+import json
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.db.session import get_db
-from app.api.deps import get_current_active_user
+from app.db.session import AnySession, get_session
+from app.api.deps import get_current_active_user, Page
 from app.models.user import User
-from app.schemas.portfolio import Portfolio, PortfolioCreate, PortfolioUpdate, Asset, AssetCreate
+from app.schemas.portfolio import (
+    Portfolio, PortfolioCreate, PortfolioUpdate, Asset, AssetCreate,
+    PortfolioValuation, PortfoliosValuation
+)
 from app.db.repositories.portfolio import (
-    get_portfolios, get_portfolio, create_portfolio, update_portfolio, delete_portfolio,
-    add_asset, get_asset, update_asset, delete_asset
+    aget_portfolios, aget_portfolio, acreate_portfolio, aupdate_portfolio, adelete_portfolio,
+    aadd_asset, aimport_assets, aupdate_asset, adelete_asset, aget_positions, aget_portfolio_names
 )
-from app.services.price_stream import price_stream_producer
+from app.services.asset_import import AssetImportError, parse_assets
+from app.services.valuation import valuation_service
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Portfolio])
-def read_portfolios(
-    db: Session = Depends(get_db),
+async def read_portfolios(
+    response: Response,
+    page: Page = Depends(),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Retrieve all portfolios for the current user.
+    Retrieve the portfolios of the current user, a page at a time.
     """
-    portfolios = get_portfolios(db, current_user.id)
+    portfolios = await aget_portfolios(db, current_user.id, page.limit, page.after)
+    page.set_next_cursor(response, portfolios)
     return portfolios
 
 @router.post("/", response_model=Portfolio, status_code=status.HTTP_201_CREATED)
-def create_new_portfolio(
+async def create_new_portfolio(
     portfolio: PortfolioCreate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Create a new portfolio for the current user.
     """
-    return create_portfolio(db, portfolio, current_user.id)
+    return await acreate_portfolio(db, portfolio, current_user.id)
+
+@router.get("/valuation", response_model=PortfoliosValuation)
+async def read_portfolios_valuation(
+    db: AnySession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Value all portfolios of the current user against the last prices the price stream fetched.
+    """
+    portfolios = await aget_portfolio_names(db, current_user.id)
+    positions = await aget_positions(db, current_user.id)
+    return await run_in_threadpool(valuation_service.value, portfolios, positions)
 
 @router.get("/{portfolio_id}", response_model=Portfolio)
-def read_portfolio(
+async def read_portfolio(
     portfolio_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get a specific portfolio by ID.
     """
-    portfolio = get_portfolio(db, portfolio_id, current_user.id)
+    portfolio = await aget_portfolio(db, portfolio_id, current_user.id)
     if portfolio is None:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     return portfolio
 
 @router.put("/{portfolio_id}", response_model=Portfolio)
-def update_portfolio_endpoint(
+async def update_portfolio_endpoint(
     portfolio_id: int,
     portfolio_data: PortfolioUpdate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Update a portfolio.
     """
-    portfolio = update_portfolio(db, portfolio_id, portfolio_data, current_user.id)
+    portfolio = await aupdate_portfolio(db, portfolio_id, portfolio_data, current_user.id)
     if portfolio is None:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     return portfolio
 
 @router.delete("/{portfolio_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_portfolio_endpoint(
+async def delete_portfolio_endpoint(
     portfolio_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Delete a portfolio.
     """
-    success = delete_portfolio(db, portfolio_id, current_user.id)
+    success = await adelete_portfolio(db, portfolio_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     return {"detail": "Portfolio deleted successfully"}
 
+@router.get("/{portfolio_id}/valuation", response_model=PortfolioValuation)
+async def read_portfolio_valuation(
+    portfolio_id: int,
+    db: AnySession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Value a portfolio against the last prices the price stream fetched: market value, unrealized P&L, weights and day change.
+    """
+    portfolios = await aget_portfolio_names(db, current_user.id, portfolio_id)
+    if not portfolios:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    positions = await aget_positions(db, current_user.id, portfolio_id)
+    valuation = await run_in_threadpool(valuation_service.value, portfolios, positions)
+    return valuation["portfolios"][0]
+
 # Asset endpoints
 @router.post("/{portfolio_id}/assets", response_model=Asset, status_code=status.HTTP_201_CREATED)
-def add_asset_to_portfolio(
+async def add_asset_to_portfolio(
     portfolio_id: int,
     asset: AssetCreate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Add an asset to a portfolio.
     """
-    db_asset = add_asset(db, portfolio_id, asset, current_user.id)
+    db_asset = await aadd_asset(db, portfolio_id, asset, current_user.id)
     if db_asset is None:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     
-    # Automatically start tracking this symbol
-    price_stream_producer.add_symbol(asset.symbol)
-    
+    # The symbol is tracked once an alert is set on it
     return db_asset
 
+@router.post("/{portfolio_id}/assets/import")
+async def import_assets_to_portfolio(
+    portfolio_id: int,
+    request: Request,
+    db: AnySession = Depends(get_session),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Add many assets to a portfolio from a CSV file (text/csv, with a header row of
+    symbol, asset_type, quantity, purchase_price) or a JSON array of assets.
+
+    Valid rows are inserted together; invalid rows are skipped. The response is
+    newline-delimited JSON: one {"row", "errors"} line per skipped row, then a
+    summary line with the imported and failed counts and the symbols imported.
+    """
+    body = await request.body()
+    try:
+        assets, errors = await run_in_threadpool(parse_assets, body, request.headers.get("content-type", ""))
+    except AssetImportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    imported = await aimport_assets(db, portfolio_id, assets, current_user.id)
+    if imported is None:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+
+    symbols = sorted({asset.symbol for asset in assets})
+
+    def results():
+        for error in errors:
+            yield json.dumps(error) + "\n"
+        yield json.dumps({"imported": imported, "failed": len(errors), "symbols": symbols}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.put("/assets/{asset_id}", response_model=Asset)
-def update_asset_endpoint(
+async def update_asset_endpoint(
     asset_id: int,
     asset_data: AssetCreate,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Update an asset.
     """
-    asset = update_asset(db, asset_id, asset_data, current_user.id)
+    asset = await aupdate_asset(db, asset_id, asset_data, current_user.id)
     if asset is None:
         raise HTTPException(status_code=404, detail="Asset not found")
     return asset
 
 @router.delete("/assets/{asset_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_asset_endpoint(
+async def delete_asset_endpoint(
     asset_id: int,
-    db: Session = Depends(get_db),
+    db: AnySession = Depends(get_session),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Delete an asset.
     """
-    success = delete_asset(db, asset_id, current_user.id)
+    success = await adelete_asset(db, asset_id, current_user.id)
     if not success:
         raise HTTPException(status_code=404, detail="Asset not found")
     return {"detail": "Asset deleted successfully"}
\ No newline at end of file
@@ -1,5 +1,4 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, Body
 from app.api.deps import get_current_active_user
 from app.models.user import User
 from app.services.price_stream import price_stream_producer
@@ -12,9 +11,9 @@ def track_symbol(
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Add a symbol to the price stream tracking.
+    Track a symbol explicitly, whether or not any holding, alert or stream needs it.
     """
-    price_stream_producer.add_symbol(symbol)
+    price_stream_producer.add_symbol(symbol, current_user.id)
     return {"message": f"Now tracking {symbol}"}
 
 @router.post("/untrack")
@@ -23,9 +22,10 @@ def untrack_symbol(
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Remove a symbol from the price stream tracking.
+    Undo the current user's explicit track. The symbol is still fetched while
+    holdings, alerts, live streams or other users' tracks reference it.
     """
-    price_stream_producer.remove_symbol(symbol)
+    price_stream_producer.remove_symbol(symbol, current_user.id)
     return {"message": f"Stopped tracking {symbol}"}
 
 @router.get("/status")
@@ -33,6 +33,14 @@ def get_tracking_status(
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get the list of symbols currently being tracked.
+    Get the list of symbols currently being tracked, with their effective refresh
+    intervals, and which worker is fetching them.
     """
-    return {"tracked_symbols": list(price_stream_producer.symbols_to_track)}
\ No newline at end of file
+    stats = price_stream_producer.get_stats()
+    return {
+        "tracked_symbols": list(stats["symbols"]),
+        "leader": stats["leader"],
+        "is_leader": stats["is_leader"],
+        "target_refresh_interval": stats["target_refresh_interval"],
+        "symbols": stats["symbols"],
+    }
\ No newline at end of file
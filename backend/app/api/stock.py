@@ -1,44 +1,54 @@
-from typing import List, Dict, Any
+from datetime import date
+from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from app.services.stock_service import stock_service
+from app.services.price_history import InvalidSymbolError, price_history
 from app.api.deps import get_current_active_user
 from app.models.user import User
 
 router = APIRouter()
 
 @router.get("/search", response_model=List[Dict[str, Any]])
-def search_stocks(
+async def search_stocks(
     query: str = Query(..., min_length=1),
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Search for stocks by company name or symbol.
     """
-    results = stock_service.search_symbol(query)
+    results = await stock_service.asearch_symbol(query)
     return results
 
 @router.get("/quote/{symbol}")
-def get_stock_quote(
+async def get_stock_quote(
     symbol: str,
     current_user: User = Depends(get_current_active_user)
 ):
     """
     Get the latest price for a stock.
     """
-    quote = stock_service.get_quote(symbol)
+    quote = await stock_service.aget_quote(symbol)
     if not quote:
         raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
     return quote
 
 @router.get("/daily/{symbol}")
-def get_daily_prices(
+async def get_daily_prices(
     symbol: str,
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Get daily time series for a stock.
+    Get daily prices for a stock as columns (dates, open, high, low, close, volume),
+    optionally limited to a date range. Served from the local price history store,
+    which is topped up from the upstream API at most once a day.
     """
-    data = stock_service.get_daily_prices(symbol)
+    try:
+        await price_history.arefresh(symbol)
+    except InvalidSymbolError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    data = price_history.get_range(symbol, start, end)
     if not data:
         raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
     return data
\ No newline at end of file
@@ -0,0 +1,124 @@
+import asyncio
+import json
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from app.api.deps import get_user_from_token
+from app.core.config import settings
+from app.models.user import User
+from app.services.stream_hub import stream_hub, StreamConnection
+
+router = APIRouter()
+
+MAX_SYMBOL_LENGTH = 15
+
+def _authenticate(token: str) -> Optional[User]:
+    """Resolve an active user from a token passed as a query parameter"""
+    # Browsers can't set an Authorization header on WebSocket or EventSource requests
+    try:
+        user = get_user_from_token(token)
+    except HTTPException:
+        return None
+    return user if user.is_active else None
+
+def _parse_symbols(symbols: str):
+    return [symbol.strip() for symbol in symbols.split(",") if symbol.strip()]
+
+def _parse_message(text: str) -> Tuple[str, List[str]]:
+    """Validate a WebSocket message, raising ValueError with the reason it was rejected"""
+    try:
+        message = json.loads(text)
+    except json.JSONDecodeError:
+        raise ValueError("Messages must be JSON")
+    if not isinstance(message, dict):
+        raise ValueError("Messages must be JSON objects")
+    action = message.get("action")
+    if action not in ("subscribe", "unsubscribe"):
+        raise ValueError(f"Unknown action: {action}")
+    symbols = message.get("symbols") or []
+    if not isinstance(symbols, list) or len(symbols) > settings.STREAM_MAX_SYMBOLS:
+        raise ValueError(f"symbols must be a list of at most {settings.STREAM_MAX_SYMBOLS} symbols")
+    if not all(isinstance(symbol, str) and 0 < len(symbol) <= MAX_SYMBOL_LENGTH for symbol in symbols):
+        raise ValueError(f"symbols must be strings of 1 to {MAX_SYMBOL_LENGTH} characters")
+    return action, symbols
+
+async def _send_events(websocket: WebSocket, connection: StreamConnection, send_lock: asyncio.Lock):
+    while True:
+        events = await connection.next_events(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+        async with send_lock:
+            if not events:
+                await websocket.send_json({"type": "heartbeat"})
+            for event in events:
+                await websocket.send_json(event)
+
+@router.websocket("/ws")
+async def stream_websocket(websocket: WebSocket, token: str = Query(...)):
+    """
+    Stream live prices and triggered alerts over a WebSocket.
+
+    Send {"action": "subscribe" | "unsubscribe", "symbols": [...]} to change the
+    symbols whose ticks are pushed; alerts for the user are always pushed. A
+    message that isn't valid gets an {"type": "error"} frame back.
+    """
+    user = await asyncio.to_thread(_authenticate, token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = stream_hub.connect(user.id)
+    send_lock = asyncio.Lock()
+    sender = asyncio.create_task(_send_events(websocket, connection, send_lock))
+    try:
+        while True:
+            try:
+                action, symbols = _parse_message(await websocket.receive_text())
+            except ValueError as e:
+                async with send_lock:
+                    await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            if action == "subscribe":
+                subscribed = stream_hub.subscribe(connection, symbols)
+            else:
+                subscribed = stream_hub.unsubscribe(connection, symbols)
+            async with send_lock:
+                await websocket.send_json({"type": "subscriptions", "symbols": subscribed})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        stream_hub.disconnect(connection)
+
+@router.get("/sse")
+async def stream_sse(
+    request: Request,
+    symbols: str = Query(..., description="Comma-separated symbols"),
+    token: str = Query(...)
+):
+    """
+    Stream live prices and triggered alerts as Server-Sent Events.
+    """
+    user = await asyncio.to_thread(_authenticate, token)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    connection = stream_hub.connect(user.id)
+    subscribed = stream_hub.subscribe(connection, _parse_symbols(symbols))
+
+    async def events():
+        try:
+            yield f"event: subscriptions\ndata: {json.dumps({'symbols': subscribed})}\n\n"
+            while not await request.is_disconnected():
+                batch = await connection.next_events(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+                if not batch:
+                    yield ": heartbeat\n\n"
+                for event in batch:
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            stream_hub.disconnect(connection)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,8 +1,18 @@
 import os
+from typing import Dict
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def _parse_int_map(value: str) -> Dict[str, int]:
+    """Parse a "key:value,key:value" environment variable into a dict of ints"""
+    result = {}
+    for item in value.split(","):
+        if ":" in item:
+            key, number = item.split(":", 1)
+            result[key.strip()] = int(number)
+    return result
+
 class Settings:
     PROJECT_NAME: str = "Stock Pulse"
     PROJECT_VERSION: str = "1.0.0"
@@ -12,28 +22,147 @@ class Settings:
     POSTGRES_SERVER: str = os.getenv("POSTGRES_SERVER", "localhost")
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "stockpulse")
-    DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    DATABASE_URL: str = os.getenv(
+        "DATABASE_URL",
+        f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    )
+    
+    # Serve the portfolio and alert APIs through an async engine (asyncpg for Postgres, aiosqlite for SQLite)
+    DB_ASYNC: bool = os.getenv("DB_ASYNC", "false").lower() == "true"
+    # Connection pool settings, applied to both engines (ignored for SQLite)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Postgres statement_timeout for every connection; 0 disables it
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
     
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-jwt")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # Authenticated user cache: per-process TTL, optionally shared through Redis
+    PRINCIPAL_CACHE_TTL_SECONDS: int = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    PRINCIPAL_CACHE_REDIS: bool = os.getenv("PRINCIPAL_CACHE_REDIS", "true").lower() == "true"
+    
+    # Password hashing: bcrypt cost, worker processes, and how many hash jobs may be pending before new ones get a 503
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+    PASSWORD_HASH_QUEUE_LIMIT: int = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
+    PASSWORD_HASH_NICE: int = int(os.getenv("PASSWORD_HASH_NICE", "10"))
+    
     # Kafka settings
     KAFKA_BOOTSTRAP_SERVERS: str = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+    ALERT_CONSUMER_GROUP_ID: str = os.getenv("ALERT_CONSUMER_GROUP_ID", "stock-pulse-alerts")
+    # Price ticks are keyed by symbol, so the partition count caps how many alert
+    # consumers can share the work; only applied when the topic is created
+    PRICE_TOPIC_PARTITIONS: int = int(os.getenv("PRICE_TOPIC_PARTITIONS", "12"))
+    KAFKA_REPLICATION_FACTOR: int = int(os.getenv("KAFKA_REPLICATION_FACTOR", "1"))
+    # Maximum number of price updates evaluated together, and how long to wait filling a batch
+    ALERT_CONSUMER_BATCH_SIZE: int = int(os.getenv("ALERT_CONSUMER_BATCH_SIZE", "500"))
+    ALERT_CONSUMER_LINGER_MS: int = int(os.getenv("ALERT_CONSUMER_LINGER_MS", "100"))
+    # Attempts at sending a batch's alerts and committing it before it is skipped, and the
+    # pause before the first retry, doubled for each one after it
+    ALERT_CONSUMER_MAX_ATTEMPTS: int = int(os.getenv("ALERT_CONSUMER_MAX_ATTEMPTS", "3"))
+    ALERT_CONSUMER_RETRY_SECONDS: float = float(os.getenv("ALERT_CONSUMER_RETRY_SECONDS", "1"))
+    
+    # Alert cooldown settings, e.g. ALERT_COOLDOWN_BY_TYPE="price_above:600,price_below:600"
+    ALERT_COOLDOWN_SECONDS: int = int(os.getenv("ALERT_COOLDOWN_SECONDS", "3600"))
+    ALERT_COOLDOWN_BY_TYPE: Dict[str, int] = _parse_int_map(os.getenv("ALERT_COOLDOWN_BY_TYPE", ""))
+    ALERT_COOLDOWN_CACHE_SIZE: int = int(os.getenv("ALERT_COOLDOWN_CACHE_SIZE", "100000"))
+    
+    # Most create/update/delete operations accepted in one POST /api/alerts/batch
+    ALERT_BATCH_MAX_OPERATIONS: int = int(os.getenv("ALERT_BATCH_MAX_OPERATIONS", "1000"))
     
     # Redis settings
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+    QUOTE_CACHE_TTL_SECONDS: int = int(os.getenv("QUOTE_CACHE_TTL_SECONDS", "60"))
+    QUOTE_CACHE_MAX_ENTRIES: int = int(os.getenv("QUOTE_CACHE_MAX_ENTRIES", "10000"))
     
     # API keys for external services
     STOCK_API_KEY: str = os.getenv("STOCK_API_KEY", "")
+    ALPHA_VANTAGE_BASE_URL: str = os.getenv("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+    # Upstream HTTP client: connection pool, timeouts and retries with jittered backoff
+    STOCK_API_MAX_CONNECTIONS: int = int(os.getenv("STOCK_API_MAX_CONNECTIONS", "20"))
+    STOCK_API_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("STOCK_API_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    STOCK_API_KEEPALIVE_SECONDS: float = float(os.getenv("STOCK_API_KEEPALIVE_SECONDS", "30"))
+    STOCK_API_TIMEOUT_SECONDS: float = float(os.getenv("STOCK_API_TIMEOUT_SECONDS", "10"))
+    STOCK_API_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("STOCK_API_CONNECT_TIMEOUT_SECONDS", "3"))
+    STOCK_API_MAX_RETRIES: int = int(os.getenv("STOCK_API_MAX_RETRIES", "3"))
+    STOCK_API_BACKOFF_SECONDS: float = float(os.getenv("STOCK_API_BACKOFF_SECONDS", "0.5"))
+    STOCK_API_MAX_BACKOFF_SECONDS: float = float(os.getenv("STOCK_API_MAX_BACKOFF_SECONDS", "8"))
+    # Alpha Vantage free tier allows 5 requests per minute
+    STOCK_API_REQUESTS_PER_MINUTE: int = int(os.getenv("STOCK_API_REQUESTS_PER_MINUTE", "5"))
+    STOCK_API_REQUESTS_PER_DAY: int = int(os.getenv("STOCK_API_REQUESTS_PER_DAY", "500"))
+    
+    # Market data provider: "alphavantage", or "replay" for offline load testing
+    MARKET_DATA_PROVIDER: str = os.getenv("MARKET_DATA_PROVIDER", "alphavantage")
+    # Use REALTIME_BULK_QUOTES (premium) to fetch up to 100 symbols per request
+    ALPHA_VANTAGE_BULK_QUOTES: bool = os.getenv("ALPHA_VANTAGE_BULK_QUOTES", "false").lower() == "true"
+    REPLAY_DATA_FILE: str = os.getenv("REPLAY_DATA_FILE", "")
+    
+    # Directory of the local daily price history store
+    PRICE_HISTORY_DIR: str = os.getenv("PRICE_HISTORY_DIR", "data/price_history")
+    # Backoff after a failed or rate-limited daily prices fetch, doubling per failure up to the max
+    PRICE_HISTORY_RETRY_SECONDS: float = float(os.getenv("PRICE_HISTORY_RETRY_SECONDS", "60"))
+    PRICE_HISTORY_RETRY_MAX_SECONDS: float = float(os.getenv("PRICE_HISTORY_RETRY_MAX_SECONDS", "3600"))
+    PRICE_HISTORY_MAX_FAILURES: int = int(os.getenv("PRICE_HISTORY_MAX_FAILURES", "10000"))
+    # Symbols whose column files stay memory-mapped between reads, six open files each
+    PRICE_HISTORY_MAX_OPEN_SYMBOLS: int = int(os.getenv("PRICE_HISTORY_MAX_OPEN_SYMBOLS", "100"))
+    
+    # Local symbol search listing (Alpha Vantage LISTING_STATUS CSV) and how often to check it for changes
+    SYMBOL_LISTING_FILE: str = os.getenv("SYMBOL_LISTING_FILE", "data/listing_status.csv")
+    SYMBOL_LISTING_RELOAD_SECONDS: int = int(os.getenv("SYMBOL_LISTING_RELOAD_SECONDS", "300"))
+    
+    # Price stream settings
+    PRICE_FETCH_WORKERS: int = int(os.getenv("PRICE_FETCH_WORKERS", "4"))
+    PRICE_MIN_REFRESH_SECONDS: float = float(os.getenv("PRICE_MIN_REFRESH_SECONDS", "1"))
+    # Tracked symbols are shared through Redis and only the worker holding the fetch
+    # lease calls the upstream API; another takes over within a lease period if it dies
+    PRICE_STREAM_REDIS: bool = os.getenv("PRICE_STREAM_REDIS", "true").lower() == "true"
+    PRICE_STREAM_LEASE_SECONDS: float = float(os.getenv("PRICE_STREAM_LEASE_SECONDS", "15"))
+    
+    # Window alerts: the longest window allowed, and ticks kept per symbol, by default
+    # enough to cover that window at the fastest refresh rate
+    WINDOW_ALERT_MAX_MINUTES: int = int(os.getenv("WINDOW_ALERT_MAX_MINUTES", "60"))
+    PRICE_WINDOW_CAPACITY: int = int(os.getenv(
+        "PRICE_WINDOW_CAPACITY", str(int(WINDOW_ALERT_MAX_MINUTES * 60 / PRICE_MIN_REFRESH_SECONDS) + 1)
+    ))
+    
+    # Live stream settings: symbols per connection, undelivered alerts kept per connection, keep-alive interval
+    STREAM_MAX_SYMBOLS: int = int(os.getenv("STREAM_MAX_SYMBOLS", "100"))
+    STREAM_MAX_PENDING_ALERTS: int = int(os.getenv("STREAM_MAX_PENDING_ALERTS", "100"))
+    STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+    
+    # Bulk holdings import: rows accepted per request, and rows per multi-row INSERT statement
+    ASSET_IMPORT_MAX_ROWS: int = int(os.getenv("ASSET_IMPORT_MAX_ROWS", "10000"))
+    ASSET_IMPORT_BATCH_ROWS: int = int(os.getenv("ASSET_IMPORT_BATCH_ROWS", "1000"))
     
     # Email settings
     SMTP_SERVER: str = os.getenv("SMTP_SERVER", "")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
     SMTP_USERNAME: str = os.getenv("SMTP_USERNAME", "")
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
+    SMTP_FROM: str = os.getenv("SMTP_FROM", SMTP_USERNAME)
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "10"))
+    
+    # Notification dispatch: queued notifications before new ones are dropped, worker
+    # threads, notifications handled per batch and how long to wait to fill one,
+    # and retries with exponential backoff for database writes and sends
+    NOTIFICATION_QUEUE_SIZE: int = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+    NOTIFICATION_WORKERS: int = int(os.getenv("NOTIFICATION_WORKERS", "2"))
+    NOTIFICATION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+    NOTIFICATION_LINGER_MS: int = int(os.getenv("NOTIFICATION_LINGER_MS", "50"))
+    NOTIFICATION_MAX_RETRIES: int = int(os.getenv("NOTIFICATION_MAX_RETRIES", "4"))
+    NOTIFICATION_RETRY_BACKOFF_SECONDS: float = float(os.getenv("NOTIFICATION_RETRY_BACKOFF_SECONDS", "0.5"))
+    
+    # Unread notification counts kept in Redis, recounted from the database after the TTL
+    UNREAD_COUNT_REDIS: bool = os.getenv("UNREAD_COUNT_REDIS", "true").lower() == "true"
+    UNREAD_COUNT_TTL_SECONDS: int = int(os.getenv("UNREAD_COUNT_TTL_SECONDS", "3600"))
     
     # SMS settings
     SMS_API_KEY: str = os.getenv("SMS_API_KEY", "")
@@ -1,12 +1,24 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with any other cost than BCRYPT_ROUNDS need an update, so changing it rehashes on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -18,8 +30,87 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+# Run inside the worker processes
+def _init_worker():
+    # Lower the workers' CPU priority so request handling wins when cores are contended
+    os.nice(settings.PASSWORD_HASH_NICE)
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hashes are already pending"""
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a dedicated process pool.
+
+    Keeps hashing off the event loop and the request threadpool, so a burst of
+    logins can't starve other endpoints. At most PASSWORD_HASH_QUEUE_LIMIT jobs may
+    be pending; beyond that, callers get PasswordHasherBusy (served as a 503)
+    instead of queueing.
+    """
+    def __init__(self):
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def start(self):
+        with self._lock:
+            if self.executor is None:
+                # Spawned rather than forked, since the parent is running background threads
+                self.executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+
+    def stop(self):
+        with self._lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn, *args) -> Future:
+        self.start()
+        with self._lock:
+            if self._pending >= settings.PASSWORD_HASH_QUEUE_LIMIT:
+                raise PasswordHasherBusy()
+            self._pending += 1
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash, password).result()
+
+    def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password, also returning a new hash if the stored one uses an outdated cost"""
+        return self._submit(_verify_and_update, password, hashed_password).result()
+
+    async def ahash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash, password))
+
+    async def averify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Async version of verify_and_update"""
+        return await asyncio.wrap_future(self._submit(_verify_and_update, password, hashed_password))
+
+# Create a singleton instance
+password_hasher = PasswordHasher()
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
\ No newline at end of file
+    return password_hasher.hash(password)
@@ -1,11 +1,22 @@
-from sqlalchemy.orm import Session
+import os
 
-from app.db.session import engine, Base
-from app.models import user, portfolio
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.db.session import engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    """Bring the database schema up to date by applying the alembic migrations"""
+    config = Config(ALEMBIC_INI)
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        # Built by create_all before migrations existed, which matches the first revision
+        command.stamp(config, "0001")
+    command.upgrade(config, "head")
 
 if __name__ == "__main__":
     init_db()
-    print("Database initialized")
\ No newline at end of file
+    print("Database initialized")
@@ -1,25 +1,40 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.portfolio import Alert, Asset
-from app.schemas.alert import AlertCreate, AlertUpdate
+from app.db.session import async_variant
+from app.models.portfolio import Alert, Asset, Portfolio
+from app.schemas.alert import AlertBatch, AlertCreate, AlertUpdate, check_window_minutes
+from app.services.alert_registry import alert_registry
+from app.services.tracked_symbols import tracked_symbols
 
-def get_alerts_by_asset(db: Session, asset_id: int, user_id: int) -> List[Alert]:
-    return db.query(Alert).join(Asset).join(Asset.portfolio).filter(
+def get_alerts_by_asset(
+    db: Session, asset_id: int, user_id: int, limit: Optional[int] = None, after: Optional[int] = None
+) -> List[Alert]:
+    """Get an asset's alerts in id order, starting after the `after` cursor"""
+    query = db.query(Alert).join(Asset).join(Portfolio).filter(
         Alert.asset_id == asset_id,
-        Asset.portfolio.has(user_id=user_id)
-    ).all()
+        Portfolio.user_id == user_id
+    )
+    if after is not None:
+        query = query.filter(Alert.id > after)
+    query = query.order_by(Alert.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 def get_alert(db: Session, alert_id: int, user_id: int) -> Optional[Alert]:
-    return db.query(Alert).join(Asset).join(Asset.portfolio).filter(
+    # Ownership is checked through plain joins rather than a correlated EXISTS subquery
+    return db.query(Alert).join(Asset).join(Portfolio).filter(
         Alert.id == alert_id,
-        Asset.portfolio.has(user_id=user_id)
+        Portfolio.user_id == user_id
     ).first()
 
 def create_alert(db: Session, alert: AlertCreate, user_id: int) -> Optional[Alert]:
     # Verify that the asset belongs to the user
-    asset_exists = db.query(Asset).join(Asset.portfolio).filter(
+    asset_exists = db.query(Asset).join(Portfolio).filter(
         Asset.id == alert.asset_id,
-        Asset.portfolio.has(user_id=user_id)
+        Portfolio.user_id == user_id
     ).first()
     
     if not asset_exists:
@@ -30,27 +45,225 @@ def create_alert(db: Session, alert: AlertCreate, user_id: int) -> Optional[Aler
         alert_type=alert.alert_type,
         threshold_value=alert.threshold_value,
         notification_method=alert.notification_method,
+        window_minutes=alert.window_minutes,
         is_active=True
     )
     db.add(db_alert)
     db.commit()
     db.refresh(db_alert)
+    alert_registry.upsert_alert(db_alert, asset_exists, user_id)
+    tracked_symbols.refresh(db, [asset_exists.symbol])
     return db_alert
 
 def update_alert(db: Session, alert_id: int, alert: AlertUpdate, user_id: int) -> Optional[Alert]:
+    """Update an alert; raises AlertValidationError if the result would be a window alert without a window"""
     db_alert = get_alert(db, alert_id, user_id)
     if db_alert:
         update_data = alert.dict(exclude_unset=True)
+        _check_update(db_alert.alert_type, db_alert.window_minutes, update_data)
         for key, value in update_data.items():
             setattr(db_alert, key, value)
         db.commit()
         db.refresh(db_alert)
+        alert_registry.upsert_alert(db_alert, db_alert.asset, user_id)
+        if "is_active" in update_data:
+            tracked_symbols.refresh(db, [db_alert.asset.symbol])
     return db_alert
 
 def delete_alert(db: Session, alert_id: int, user_id: int) -> bool:
     db_alert = get_alert(db, alert_id, user_id)
     if db_alert:
+        symbol = db_alert.asset.symbol
         db.delete(db_alert)
         db.commit()
+        alert_registry.remove_alert(alert_id)
+        tracked_symbols.refresh(db, [symbol])
+        return True
+    return False
+
+def apply_alert_batch(db: Session, batch: AlertBatch, user_id: int) -> Optional[Dict[str, list]]:
+    """
+    Create, update and delete many alerts in one transaction.
+
+    One query checks that every referenced asset and alert belongs to the user;
+    if any doesn't, nothing is changed and None is returned. Updates are checked
+    against the stored alerts from the same query, raising AlertValidationError.
+    Each operation type is then a single bulk statement, followed by one commit.
+    """
+    rows = db.execute(_batch_ownership_statement(batch, user_id)).all()
+    assets = _owned_batch_targets(rows, batch)
+    if assets is None:
+        return None
+    _check_batch_updates(rows, batch)
+
+    # Rows come back in batches of multi-row INSERT ... RETURNING; asking for them in
+    # parameter order would make SQLite fall back to one INSERT per row
+    created = sorted(
+        db.scalars(insert(Alert).returning(Alert), _created_rows(batch)), key=lambda a: a.id
+    ) if batch.create else []
+    updated_rows = _updated_rows(batch)
+    if updated_rows:
+        db.execute(update(Alert), updated_rows)
+    updated = list(db.scalars(
+        select(Alert).where(Alert.id.in_([u.id for u in batch.update])).order_by(Alert.id)
+        .execution_options(populate_existing=True)
+    )) if batch.update else []
+    if batch.delete:
+        db.execute(delete(Alert).where(Alert.id.in_(batch.delete)).execution_options(synchronize_session=False))
+
+    # Detach the loaded rows so the commit doesn't expire them and serializing
+    # the response doesn't reload each one
+    db.expunge_all()
+    db.commit()
+    alert_registry.apply_batch([(alert, assets[alert.asset_id]) for alert in created + updated], batch.delete, user_id)
+    tracked_symbols.refresh(db, [asset.symbol for asset in assets.values()])
+    return {"created": created, "updated": updated, "deleted": batch.delete}
+
+def _batch_ownership_statement(batch: AlertBatch, user_id: int):
+    # Every asset referenced by a create, plus the asset and current type and window
+    # of every alert updated or deleted, restricted to the user's portfolios
+    alert_ids = [u.id for u in batch.update] + batch.delete
+    return select(Asset, Alert.id, Alert.alert_type, Alert.window_minutes).join(Portfolio, Asset.portfolio_id == Portfolio.id).outerjoin(
+        Alert, and_(Alert.asset_id == Asset.id, Alert.id.in_(alert_ids))
+    ).where(
+        Portfolio.user_id == user_id,
+        or_(Asset.id.in_({a.asset_id for a in batch.create}), Alert.id.in_(alert_ids))
+    )
+
+def _owned_batch_targets(rows: List[Tuple[Asset, Optional[int], Optional[str], Optional[int]]], batch: AlertBatch) -> Optional[Dict[int, Asset]]:
+    """Map asset ids to the owned assets, or None if the batch references anything not owned"""
+    assets = {row[0].id: row[0] for row in rows}
+    owned_alert_ids = {row[1] for row in rows if row[1] is not None}
+    if not {a.asset_id for a in batch.create} <= assets.keys():
+        return None
+    if not {u.id for u in batch.update} | set(batch.delete) <= owned_alert_ids:
+        return None
+    return assets
+
+def _check_update(alert_type: str, window_minutes: Optional[int], update_data: dict):
+    check_window_minutes(update_data.get("alert_type", alert_type), update_data.get("window_minutes", window_minutes))
+
+def _check_batch_updates(rows: List[Tuple[Asset, Optional[int], Optional[str], Optional[int]]], batch: AlertBatch):
+    stored = {alert_id: (alert_type, window_minutes) for _, alert_id, alert_type, window_minutes in rows if alert_id is not None}
+    for alert in batch.update:
+        _check_update(*stored[alert.id], alert.dict(exclude_unset=True))
+
+def _created_rows(batch: AlertBatch) -> List[dict]:
+    return [
+        {
+            "asset_id": alert.asset_id,
+            "alert_type": alert.alert_type,
+            "threshold_value": alert.threshold_value,
+            "notification_method": alert.notification_method,
+            "window_minutes": alert.window_minutes,
+            "is_active": True,
+        }
+        for alert in batch.create
+    ]
+
+def _updated_rows(batch: AlertBatch) -> List[dict]:
+    # Consecutive rows changing the same set of fields are sent as one executemany
+    # batch, so order them by that set
+    rows = [alert.dict(exclude_unset=True) for alert in batch.update]
+    return sorted((row for row in rows if len(row) > 1), key=sorted)
+
+# Async variants, for an AsyncSession
+
+def _alerts_statement(user_id: int):
+    return select(Alert).join(Asset).join(Portfolio).where(Portfolio.user_id == user_id)
+
+@async_variant(get_alerts_by_asset)
+async def aget_alerts_by_asset(
+    db: AsyncSession, asset_id: int, user_id: int, limit: Optional[int] = None, after: Optional[int] = None
+) -> List[Alert]:
+    statement = _alerts_statement(user_id).where(Alert.asset_id == asset_id)
+    if after is not None:
+        statement = statement.where(Alert.id > after)
+    statement = statement.order_by(Alert.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return list((await db.scalars(statement)).all())
+
+@async_variant(get_alert)
+async def aget_alert(db: AsyncSession, alert_id: int, user_id: int) -> Optional[Alert]:
+    return (await db.scalars(_alerts_statement(user_id).where(Alert.id == alert_id))).first()
+
+@async_variant(create_alert)
+async def acreate_alert(db: AsyncSession, alert: AlertCreate, user_id: int) -> Optional[Alert]:
+    # Verify that the asset belongs to the user
+    asset_exists = (await db.scalars(
+        select(Asset).join(Portfolio).where(Asset.id == alert.asset_id, Portfolio.user_id == user_id)
+    )).first()
+    
+    if not asset_exists:
+        return None
+    
+    db_alert = Alert(
+        asset_id=alert.asset_id,
+        alert_type=alert.alert_type,
+        threshold_value=alert.threshold_value,
+        notification_method=alert.notification_method,
+        window_minutes=alert.window_minutes,
+        is_active=True
+    )
+    db.add(db_alert)
+    await db.commit()
+    await db.refresh(db_alert)
+    alert_registry.upsert_alert(db_alert, asset_exists, user_id)
+    await tracked_symbols.arefresh(db, [asset_exists.symbol])
+    return db_alert
+
+@async_variant(update_alert)
+async def aupdate_alert(db: AsyncSession, alert_id: int, alert: AlertUpdate, user_id: int) -> Optional[Alert]:
+    db_alert = await aget_alert(db, alert_id, user_id)
+    if db_alert:
+        update_data = alert.dict(exclude_unset=True)
+        _check_update(db_alert.alert_type, db_alert.window_minutes, update_data)
+        for key, value in update_data.items():
+            setattr(db_alert, key, value)
+        await db.commit()
+        await db.refresh(db_alert)
+        asset = await db.get(Asset, db_alert.asset_id)
+        alert_registry.upsert_alert(db_alert, asset, user_id)
+        if "is_active" in update_data:
+            await tracked_symbols.arefresh(db, [asset.symbol])
+    return db_alert
+
+@async_variant(delete_alert)
+async def adelete_alert(db: AsyncSession, alert_id: int, user_id: int) -> bool:
+    db_alert = await aget_alert(db, alert_id, user_id)
+    if db_alert:
+        asset = await db.get(Asset, db_alert.asset_id)
+        await db.delete(db_alert)
+        await db.commit()
+        alert_registry.remove_alert(alert_id)
+        await tracked_symbols.arefresh(db, [asset.symbol])
         return True
-    return False
\ No newline at end of file
+    return False
+
+@async_variant(apply_alert_batch)
+async def aapply_alert_batch(db: AsyncSession, batch: AlertBatch, user_id: int) -> Optional[Dict[str, list]]:
+    rows = (await db.execute(_batch_ownership_statement(batch, user_id))).all()
+    assets = _owned_batch_targets(rows, batch)
+    if assets is None:
+        return None
+    _check_batch_updates(rows, batch)
+
+    created = sorted(
+        await db.scalars(insert(Alert).returning(Alert), _created_rows(batch)), key=lambda a: a.id
+    ) if batch.create else []
+    updated_rows = _updated_rows(batch)
+    if updated_rows:
+        await db.execute(update(Alert), updated_rows)
+    updated = list(await db.scalars(
+        select(Alert).where(Alert.id.in_([u.id for u in batch.update])).order_by(Alert.id)
+        .execution_options(populate_existing=True)
+    )) if batch.update else []
+    if batch.delete:
+        await db.execute(delete(Alert).where(Alert.id.in_(batch.delete)).execution_options(synchronize_session=False))
+
+    db.expunge_all()
+    await db.commit()
+    alert_registry.apply_batch([(alert, assets[alert.asset_id]) for alert in created + updated], batch.delete, user_id)
+    await tracked_symbols.arefresh(db, [asset.symbol for asset in assets.values()])
+    return {"created": created, "updated": updated, "deleted": batch.delete}
@@ -0,0 +1,63 @@
+from typing import List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.db.session import async_variant
+from app.models.notification import Notification
+
+def get_notifications(
+    db: Session, user_id: int, limit: int, after: Optional[int] = None, unread_only: bool = False
+) -> List[Notification]:
+    """Get a user's notifications newest first, starting after (i.e. below) the `after` cursor"""
+    query = db.query(Notification).filter(Notification.user_id == user_id)
+    if unread_only:
+        query = query.filter(Notification.is_read == False)
+    if after is not None:
+        query = query.filter(Notification.id < after)
+    return query.order_by(Notification.id.desc()).limit(limit).all()
+
+def count_unread(db: Session, user_id: int) -> int:
+    return db.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id, Notification.is_read == False
+    ).scalar()
+
+def mark_read(db: Session, user_id: int, up_to: Optional[int] = None, from_id: Optional[int] = None) -> int:
+    """Mark a user's unread notifications with ids in [from_id, up_to] read, returning how many changed"""
+    result = db.execute(_mark_read_statement(user_id, up_to, from_id))
+    db.commit()
+    return result.rowcount
+
+def _mark_read_statement(user_id: int, up_to: Optional[int], from_id: Optional[int]):
+    # One UPDATE over the range, touching only rows that are still unread
+    statement = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False)
+    if up_to is not None:
+        statement = statement.where(Notification.id <= up_to)
+    if from_id is not None:
+        statement = statement.where(Notification.id >= from_id)
+    return statement.values(is_read=True).execution_options(synchronize_session=False)
+
+# Async variants, for an AsyncSession
+
+@async_variant(get_notifications)
+async def aget_notifications(
+    db: AsyncSession, user_id: int, limit: int, after: Optional[int] = None, unread_only: bool = False
+) -> List[Notification]:
+    statement = select(Notification).where(Notification.user_id == user_id)
+    if unread_only:
+        statement = statement.where(Notification.is_read == False)
+    if after is not None:
+        statement = statement.where(Notification.id < after)
+    statement = statement.order_by(Notification.id.desc()).limit(limit)
+    return list((await db.scalars(statement)).all())
+
+@async_variant(count_unread)
+async def acount_unread(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(select(func.count(Notification.id)).where(
+        Notification.user_id == user_id, Notification.is_read == False
+    ))
+
+@async_variant(mark_read)
+async def amark_read(db: AsyncSession, user_id: int, up_to: Optional[int] = None, from_id: Optional[int] = None) -> int:
+    result = await db.execute(_mark_read_statement(user_id, up_to, from_id))
+    await db.commit()
+    return result.rowcount
@@ -1,19 +1,55 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from app.core.config import settings
+from app.db.session import async_variant
 from app.models.portfolio import Portfolio, Asset
 from app.schemas.portfolio import PortfolioCreate, PortfolioUpdate, AssetCreate
+from app.services.alert_registry import alert_registry
+from app.services.tracked_symbols import tracked_symbols
 
-def get_portfolios(db: Session, user_id: int) -> List[Portfolio]:
-    return db.query(Portfolio).filter(Portfolio.user_id == user_id).all()
+def get_portfolios(db: Session, user_id: int, limit: Optional[int] = None, after: Optional[int] = None) -> List[Portfolio]:
+    """Get a user's portfolios in id order, starting after the `after` cursor, with their assets"""
+    # Assets are loaded for the whole page in one extra IN query instead of one query per portfolio
+    query = db.query(Portfolio).options(selectinload(Portfolio.assets)).filter(Portfolio.user_id == user_id)
+    if after is not None:
+        query = query.filter(Portfolio.id > after)
+    query = query.order_by(Portfolio.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 def get_portfolio(db: Session, portfolio_id: int, user_id: int) -> Optional[Portfolio]:
-    return db.query(Portfolio).filter(Portfolio.id == portfolio_id, Portfolio.user_id == user_id).first()
+    return db.query(Portfolio).options(selectinload(Portfolio.assets)).filter(
+        Portfolio.id == portfolio_id, Portfolio.user_id == user_id
+    ).first()
+
+def get_positions(db: Session, user_id: int, portfolio_id: Optional[int] = None) -> List[Tuple]:
+    """Get a user's assets as plain (portfolio_id, asset_id, symbol, quantity, purchase_price) rows"""
+    query = (
+        db.query(Asset.portfolio_id, Asset.id, Asset.symbol, Asset.quantity, Asset.purchase_price)
+        .join(Portfolio, Asset.portfolio_id == Portfolio.id)
+        .filter(Portfolio.user_id == user_id)
+    )
+    if portfolio_id is not None:
+        query = query.filter(Portfolio.id == portfolio_id)
+    return query.order_by(Asset.portfolio_id, Asset.id).all()
+
+def get_portfolio_names(db: Session, user_id: int, portfolio_id: Optional[int] = None) -> List[Tuple[int, str]]:
+    """Get a user's portfolios as plain (id, name) rows, without loading their assets"""
+    query = db.query(Portfolio.id, Portfolio.name).filter(Portfolio.user_id == user_id)
+    if portfolio_id is not None:
+        query = query.filter(Portfolio.id == portfolio_id)
+    return query.order_by(Portfolio.id).all()
 
 def create_portfolio(db: Session, portfolio: PortfolioCreate, user_id: int) -> Portfolio:
     db_portfolio = Portfolio(name=portfolio.name, user_id=user_id)
     db.add(db_portfolio)
     db.commit()
+    # Assets are refreshed explicitly so serializing the response doesn't lazy-load them
     db.refresh(db_portfolio)
+    db.refresh(db_portfolio, ["assets"])
     return db_portfolio
 
 def update_portfolio(db: Session, portfolio_id: int, portfolio: PortfolioUpdate, user_id: int) -> Optional[Portfolio]:
@@ -23,13 +59,19 @@ def update_portfolio(db: Session, portfolio_id: int, portfolio: PortfolioUpdate,
             setattr(db_portfolio, key, value)
         db.commit()
         db.refresh(db_portfolio)
+        db.refresh(db_portfolio, ["assets"])
     return db_portfolio
 
 def delete_portfolio(db: Session, portfolio_id: int, user_id: int) -> bool:
     db_portfolio = get_portfolio(db, portfolio_id, user_id)
     if db_portfolio:
+        asset_ids = [asset.id for asset in db_portfolio.assets]
+        symbols = [asset.symbol for asset in db_portfolio.assets]
         db.delete(db_portfolio)
         db.commit()
+        for asset_id in asset_ids:
+            alert_registry.remove_asset(asset_id)
+        tracked_symbols.refresh(db, symbols, holdings=True)
         return True
     return False
 
@@ -48,8 +90,26 @@ def add_asset(db: Session, portfolio_id: int, asset: AssetCreate, user_id: int)
     db.add(db_asset)
     db.commit()
     db.refresh(db_asset)
+    tracked_symbols.refresh(db, [db_asset.symbol], holdings=True)
     return db_asset
 
+def import_assets(db: Session, portfolio_id: int, assets: List[AssetCreate], user_id: int) -> Optional[int]:
+    """
+    Insert many assets into a portfolio in one transaction, returning how many were added.
+
+    Ownership is checked once, and rows are written with multi-row INSERT
+    statements of up to ASSET_IMPORT_BATCH_ROWS rows, without loading them back.
+    """
+    owned = db.query(Portfolio.id).filter(Portfolio.id == portfolio_id, Portfolio.user_id == user_id).first()
+    if not owned:
+        return None
+    rows = _asset_rows(portfolio_id, assets)
+    for start in range(0, len(rows), settings.ASSET_IMPORT_BATCH_ROWS):
+        db.execute(insert(Asset).values(rows[start:start + settings.ASSET_IMPORT_BATCH_ROWS]))
+    db.commit()
+    tracked_symbols.refresh(db, [row["symbol"] for row in rows], holdings=True)
+    return len(rows)
+
 def get_asset(db: Session, asset_id: int, user_id: int) -> Optional[Asset]:
     return db.query(Asset).join(Portfolio).filter(
         Asset.id == asset_id,
@@ -59,16 +119,173 @@ def get_asset(db: Session, asset_id: int, user_id: int) -> Optional[Asset]:
 def update_asset(db: Session, asset_id: int, asset: AssetCreate, user_id: int) -> Optional[Asset]:
     db_asset = get_asset(db, asset_id, user_id)
     if db_asset:
+        old_symbol = db_asset.symbol
         for key, value in asset.dict().items():
             setattr(db_asset, key, value)
         db.commit()
         db.refresh(db_asset)
+        alert_registry.update_asset(db_asset)
+        if db_asset.symbol != old_symbol:
+            tracked_symbols.refresh(db, [old_symbol, db_asset.symbol], holdings=True)
     return db_asset
 
 def delete_asset(db: Session, asset_id: int, user_id: int) -> bool:
     db_asset = get_asset(db, asset_id, user_id)
     if db_asset:
+        symbol = db_asset.symbol
         db.delete(db_asset)
         db.commit()
+        alert_registry.remove_asset(asset_id)
+        tracked_symbols.refresh(db, [symbol], holdings=True)
+        return True
+    return False
+
+# Async variants, for an AsyncSession. Relationships are loaded eagerly since
+# lazy loading isn't available on an AsyncSession.
+
+def _portfolios_statement(user_id: int):
+    return select(Portfolio).options(selectinload(Portfolio.assets)).where(Portfolio.user_id == user_id)
+
+def _asset_rows(portfolio_id: int, assets: List[AssetCreate]) -> List[dict]:
+    return [
+        {
+            "portfolio_id": portfolio_id,
+            "symbol": asset.symbol,
+            "asset_type": asset.asset_type,
+            "quantity": asset.quantity,
+            "purchase_price": asset.purchase_price,
+        }
+        for asset in assets
+    ]
+
+def _asset_statement(asset_id: int, user_id: int):
+    return select(Asset).join(Portfolio).where(Asset.id == asset_id, Portfolio.user_id == user_id)
+
+@async_variant(get_portfolios)
+async def aget_portfolios(db: AsyncSession, user_id: int, limit: Optional[int] = None, after: Optional[int] = None) -> List[Portfolio]:
+    statement = _portfolios_statement(user_id)
+    if after is not None:
+        statement = statement.where(Portfolio.id > after)
+    statement = statement.order_by(Portfolio.id)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return list((await db.scalars(statement)).all())
+
+@async_variant(get_portfolio)
+async def aget_portfolio(db: AsyncSession, portfolio_id: int, user_id: int) -> Optional[Portfolio]:
+    return (await db.scalars(_portfolios_statement(user_id).where(Portfolio.id == portfolio_id))).first()
+
+@async_variant(get_positions)
+async def aget_positions(db: AsyncSession, user_id: int, portfolio_id: Optional[int] = None) -> List[Tuple]:
+    statement = (
+        select(Asset.portfolio_id, Asset.id, Asset.symbol, Asset.quantity, Asset.purchase_price)
+        .join(Portfolio, Asset.portfolio_id == Portfolio.id)
+        .where(Portfolio.user_id == user_id)
+    )
+    if portfolio_id is not None:
+        statement = statement.where(Portfolio.id == portfolio_id)
+    return list((await db.execute(statement.order_by(Asset.portfolio_id, Asset.id))).all())
+
+@async_variant(get_portfolio_names)
+async def aget_portfolio_names(db: AsyncSession, user_id: int, portfolio_id: Optional[int] = None) -> List[Tuple[int, str]]:
+    statement = select(Portfolio.id, Portfolio.name).where(Portfolio.user_id == user_id)
+    if portfolio_id is not None:
+        statement = statement.where(Portfolio.id == portfolio_id)
+    return list((await db.execute(statement.order_by(Portfolio.id))).all())
+
+@async_variant(create_portfolio)
+async def acreate_portfolio(db: AsyncSession, portfolio: PortfolioCreate, user_id: int) -> Portfolio:
+    db_portfolio = Portfolio(name=portfolio.name, user_id=user_id)
+    db.add(db_portfolio)
+    await db.commit()
+    await db.refresh(db_portfolio)
+    await db.refresh(db_portfolio, ["assets"])
+    return db_portfolio
+
+@async_variant(update_portfolio)
+async def aupdate_portfolio(db: AsyncSession, portfolio_id: int, portfolio: PortfolioUpdate, user_id: int) -> Optional[Portfolio]:
+    db_portfolio = await aget_portfolio(db, portfolio_id, user_id)
+    if db_portfolio:
+        for key, value in portfolio.dict().items():
+            setattr(db_portfolio, key, value)
+        await db.commit()
+        await db.refresh(db_portfolio)
+        await db.refresh(db_portfolio, ["assets"])
+    return db_portfolio
+
+@async_variant(delete_portfolio)
+async def adelete_portfolio(db: AsyncSession, portfolio_id: int, user_id: int) -> bool:
+    db_portfolio = await aget_portfolio(db, portfolio_id, user_id)
+    if db_portfolio:
+        asset_ids = [asset.id for asset in db_portfolio.assets]
+        symbols = [asset.symbol for asset in db_portfolio.assets]
+        await db.delete(db_portfolio)
+        await db.commit()
+        for asset_id in asset_ids:
+            alert_registry.remove_asset(asset_id)
+        await tracked_symbols.arefresh(db, symbols, holdings=True)
+        return True
+    return False
+
+@async_variant(add_asset)
+async def aadd_asset(db: AsyncSession, portfolio_id: int, asset: AssetCreate, user_id: int) -> Optional[Asset]:
+    db_portfolio = await aget_portfolio(db, portfolio_id, user_id)
+    if not db_portfolio:
+        return None
+    
+    db_asset = Asset(
+        portfolio_id=portfolio_id,
+        symbol=asset.symbol,
+        asset_type=asset.asset_type,
+        quantity=asset.quantity,
+        purchase_price=asset.purchase_price
+    )
+    db.add(db_asset)
+    await db.commit()
+    await db.refresh(db_asset)
+    await tracked_symbols.arefresh(db, [db_asset.symbol], holdings=True)
+    return db_asset
+
+@async_variant(import_assets)
+async def aimport_assets(db: AsyncSession, portfolio_id: int, assets: List[AssetCreate], user_id: int) -> Optional[int]:
+    owned = (await db.execute(
+        select(Portfolio.id).where(Portfolio.id == portfolio_id, Portfolio.user_id == user_id)
+    )).first()
+    if not owned:
+        return None
+    rows = _asset_rows(portfolio_id, assets)
+    for start in range(0, len(rows), settings.ASSET_IMPORT_BATCH_ROWS):
+        await db.execute(insert(Asset).values(rows[start:start + settings.ASSET_IMPORT_BATCH_ROWS]))
+    await db.commit()
+    await tracked_symbols.arefresh(db, [row["symbol"] for row in rows], holdings=True)
+    return len(rows)
+
+@async_variant(get_asset)
+async def aget_asset(db: AsyncSession, asset_id: int, user_id: int) -> Optional[Asset]:
+    return (await db.scalars(_asset_statement(asset_id, user_id))).first()
+
+@async_variant(update_asset)
+async def aupdate_asset(db: AsyncSession, asset_id: int, asset: AssetCreate, user_id: int) -> Optional[Asset]:
+    db_asset = await aget_asset(db, asset_id, user_id)
+    if db_asset:
+        old_symbol = db_asset.symbol
+        for key, value in asset.dict().items():
+            setattr(db_asset, key, value)
+        await db.commit()
+        await db.refresh(db_asset)
+        alert_registry.update_asset(db_asset)
+        if db_asset.symbol != old_symbol:
+            await tracked_symbols.arefresh(db, [old_symbol, db_asset.symbol], holdings=True)
+    return db_asset
+
+@async_variant(delete_asset)
+async def adelete_asset(db: AsyncSession, asset_id: int, user_id: int) -> bool:
+    db_asset = await aget_asset(db, asset_id, user_id)
+    if db_asset:
+        symbol = db_asset.symbol
+        await db.delete(db_asset)
+        await db.commit()
+        alert_registry.remove_asset(asset_id)
+        await tracked_symbols.arefresh(db, [symbol], holdings=True)
         return True
-    return False
\ No newline at end of file
+    return False
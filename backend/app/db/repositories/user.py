@@ -1,13 +1,16 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.user import UserCreate
 from app.core.security import get_password_hash, verify_password
+from app.services.principal_cache import principal_cache
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
@@ -20,4 +23,31 @@ def authenticate_user(db: Session, email: str, password: str):
         return False
     if not verify_password(password, user.hashed_password):
         return False
+    return user
+
+def update_password_hash(db: Session, user: User, hashed_password: str) -> User:
+    """Store a rehash of the same password, e.g. after the bcrypt cost changed"""
+    db.add(user)
+    user.hashed_password = hashed_password
+    db.commit()
+    return user
+
+def change_password(db: Session, user: User, new_password: str, hashed_password: Optional[str] = None) -> User:
+    """Set a new password, revoking all tokens issued with the old one"""
+    if hashed_password is None:
+        hashed_password = get_password_hash(new_password)
+    db.add(user)
+    user.hashed_password = hashed_password
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    db.refresh(user)
+    principal_cache.invalidate(user.id)
+    return user
+
+def set_user_active(db: Session, user: User, is_active: bool) -> User:
+    """Activate or deactivate a user; deactivation takes effect on their next request"""
+    user.is_active = is_active
+    db.commit()
+    db.refresh(user)
+    principal_cache.invalidate(user.id)
     return user
\ No newline at end of file
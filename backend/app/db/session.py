@@ -1,12 +1,56 @@
+import functools
+from typing import Any, Dict, Union
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Async driver used for each database backend when DB_ASYNC is set
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def _engine_options(url: URL, is_async: bool) -> Dict[str, Any]:
+    if url.get_backend_name() == "sqlite":
+        # A local file, not a server; pooling settings don't apply
+        return {"connect_args": {"check_same_thread": False}}
+
+    options: Dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+def _async_url(url: URL) -> URL:
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+database_url = make_url(settings.DATABASE_URL)
+engine = create_engine(database_url, **_engine_options(database_url, is_async=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The async engine only exists when enabled, so its driver is only needed then
+async_engine = create_async_engine(
+    _async_url(database_url), **_engine_options(database_url, is_async=True)
+) if settings.DB_ASYNC else None
+# Objects stay loaded after commit, since lazy loads aren't possible on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+) if async_engine is not None else None
+
 Base = declarative_base()
 
 # Dependency
@@ -15,4 +59,30 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency for routes built on async repository variants: an AsyncSession when
+# DB_ASYNC is set, otherwise a regular Session
+get_session = get_async_db if settings.DB_ASYNC else get_db
+AnySession = Union[Session, AsyncSession]
+
+def async_variant(sync_fn):
+    """
+    Declare an async repository function as the async variant of `sync_fn`.
+
+    The decorated function is called with an AsyncSession; given a regular
+    Session instead, `sync_fn` runs on the threadpool. Routes can then await the
+    async variant whichever session get_session provides.
+    """
+    def decorator(async_fn):
+        @functools.wraps(async_fn)
+        async def wrapper(db, *args, **kwargs):
+            if isinstance(db, AsyncSession):
+                return await async_fn(db, *args, **kwargs)
+            return await run_in_threadpool(sync_fn, db, *args, **kwargs)
+        return wrapper
+    return decorator
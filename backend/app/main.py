@@ -1,15 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import atexit
-from app.db.session import engine, Base
-from app.api import auth, portfolio, alert, stock, price_stream
+from app.api import auth, portfolio, alert, stock, price_stream, stream, notification as notification_api
+from app.core.security import PasswordHasherBusy
 from app.services.service_manager import service_manager
 
 # Import all models to ensure they're registered with SQLAlchemy
-from app.models import user, portfolio as portfolio_models
+from app.models import user, portfolio as portfolio_models, notification
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by alembic migrations: run `python -m app.db.init_db` (or
+# `alembic upgrade head`) before starting the server
 
 app = FastAPI(title="Stock Pulse API", description="Real-Time Portfolio Alert System")
 
@@ -20,6 +21,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -28,6 +30,17 @@ app.include_router(portfolio.router, prefix="/api/portfolios", tags=["portfolios
 app.include_router(alert.router, prefix="/api/alerts", tags=["alerts"])
 app.include_router(stock.router, prefix="/api/stocks", tags=["stocks"])
 app.include_router(price_stream.router, prefix="/api/price-stream", tags=["price-stream"])
+app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
+app.include_router(notification_api.router, prefix="/api/notifications", tags=["notifications"])
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    """Shed password work under overload instead of queueing it"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts in progress, please retry"},
+        headers={"Retry-After": "1"},
+    )
 
 @app.get("/")
 async def root():
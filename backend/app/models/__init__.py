@@ -1,3 +1,4 @@
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models.user import User
-from app.models.portfolio import Portfolio, Asset, Alert
\ No newline at end of file
+from app.models.portfolio import Portfolio, Asset, Alert
+from app.models.notification import Notification
\ No newline at end of file
@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Index, text
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+class Notification(Base):
+    __tablename__ = "notifications"
+    # A user's notifications are listed newest first by id
+    __table_args__ = (
+        Index("ix_notifications_user_id_id", "user_id", "id"),
+        # Partial: unread notifications are a small slice of a long history
+        Index(
+            "ix_notifications_unread_user_id_id", "user_id", "id",
+            postgresql_where=text("NOT is_read"),
+            sqlite_where=text("is_read = 0")
+        ),
+        Index("ix_notifications_delivery_id", "delivery_id", unique=True),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Not a foreign key, so notifications outlive the alerts that raised them
+    alert_id = Column(Integer)
+    symbol = Column(String)
+    alert_type = Column(String)
+    price = Column(Float)
+    message = Column(String)
+    is_read = Column(Boolean, nullable=False, default=False, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Assigned by the dispatcher when queued, so a retried insert adds nothing
+    delivery_id = Column(String(32))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -6,6 +6,10 @@ from app.db.session import Base
 
 class Portfolio(Base):
     __tablename__ = "portfolios"
+    # Indexes are created by the migrations in alembic/versions; keep these in sync
+    __table_args__ = (
+        Index("ix_portfolios_user_id_id", "user_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
@@ -18,10 +22,14 @@ class Portfolio(Base):
 
 class Asset(Base):
     __tablename__ = "assets"
+    __table_args__ = (
+        Index("ix_assets_portfolio_id_id", "portfolio_id", "id"),
+        Index("ix_assets_symbol_portfolio_id", "symbol", "portfolio_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     portfolio_id = Column(Integer, ForeignKey("portfolios.id"))
-    symbol = Column(String, index=True)
+    symbol = Column(String)
     asset_type = Column(String)  # stock, crypto, etc.
     quantity = Column(Float)
     purchase_price = Column(Float)
@@ -33,13 +41,23 @@ class Asset(Base):
 
 class Alert(Base):
     __tablename__ = "alerts"
+    __table_args__ = (
+        Index("ix_alerts_asset_id_id", "asset_id", "id"),
+        # Partial: only active alerts are evaluated against price updates
+        Index(
+            "ix_alerts_active_asset_id", "asset_id",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active = 1")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(Integer, ForeignKey("assets.id"))
     alert_type = Column(String)  # price_change, threshold_breach, etc.
     threshold_value = Column(Float)
     is_active = Column(Boolean, default=True)
-    notification_method = Column(String)  # email, sms, dashboard
+    notification_method = Column(String)  # email or dashboard; older alerts may hold sms or both
+    window_minutes = Column(Integer, nullable=True)  # for window alert types only
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -1,21 +1,58 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
 from datetime import datetime
+from app.core.config import settings
+
+# Alert types evaluated over the last `window_minutes` of price ticks
+WINDOW_ALERT_TYPES = ("window_change_percent", "ma_crossover", "volatility_spike")
+
+# Notification methods new alerts can use; older alerts may still hold "sms" or
+# "both", whose SMS part fails since SMS delivery isn't supported
+NOTIFICATION_METHODS = ("email", "dashboard")
+
+class AlertValidationError(ValueError):
+    """Raised when an alert would end up with settings it can't be evaluated with"""
+
+def check_notification_method(notification_method: Optional[str]) -> Optional[str]:
+    if notification_method is not None and notification_method not in NOTIFICATION_METHODS:
+        raise ValueError(f"notification_method must be one of {', '.join(NOTIFICATION_METHODS)}")
+    return notification_method
+
+def check_window_minutes(alert_type: Optional[str], window_minutes: Optional[int]):
+    """Window alert types need a window; without one the evaluator would skip the alert"""
+    if alert_type in WINDOW_ALERT_TYPES and window_minutes is None:
+        raise AlertValidationError(f"window_minutes is required for {alert_type} alerts")
 
 class AlertBase(BaseModel):
     asset_id: int
-    alert_type: str  # price_change, threshold_breach, etc.
+    alert_type: str  # price_above, price_below, price_change_percent, or one of WINDOW_ALERT_TYPES
     threshold_value: float
-    notification_method: str  # email, sms, dashboard
+    notification_method: str  # one of NOTIFICATION_METHODS
+    window_minutes: Optional[int] = Field(None, ge=1, le=settings.WINDOW_ALERT_MAX_MINUTES)
 
 class AlertCreate(AlertBase):
-    pass
+    _check_notification_method = field_validator("notification_method")(check_notification_method)
+
+    @model_validator(mode="after")
+    def check_window(self):
+        check_window_minutes(self.alert_type, self.window_minutes)
+        return self
 
 class AlertUpdate(BaseModel):
     alert_type: Optional[str] = None
     threshold_value: Optional[float] = None
     notification_method: Optional[str] = None
     is_active: Optional[bool] = None
+    window_minutes: Optional[int] = Field(None, ge=1, le=settings.WINDOW_ALERT_MAX_MINUTES)
+
+    _check_notification_method = field_validator("notification_method")(check_notification_method)
+
+    @model_validator(mode="after")
+    def check_window(self):
+        # When only one of the two is given, the repository checks it against the stored alert
+        if {"alert_type", "window_minutes"} <= self.model_fields_set:
+            check_window_minutes(self.alert_type, self.window_minutes)
+        return self
 
 class Alert(AlertBase):
     id: int
@@ -24,4 +61,17 @@ class Alert(AlertBase):
     updated_at: Optional[datetime]
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class AlertBatchUpdate(AlertUpdate):
+    id: int
+
+class AlertBatch(BaseModel):
+    create: List[AlertCreate] = []
+    update: List[AlertBatchUpdate] = []
+    delete: List[int] = []
+
+class AlertBatchResult(BaseModel):
+    created: List[Alert] = []
+    updated: List[Alert] = []
+    deleted: List[int] = []
@@ -0,0 +1,27 @@
+from typing import Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+class Notification(BaseModel):
+    id: int
+    alert_id: Optional[int]
+    symbol: Optional[str]
+    alert_type: Optional[str]
+    price: Optional[float]
+    message: str
+    is_read: bool
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class NotificationMarkRead(BaseModel):
+    """Range of notification ids to mark read; leave both out to mark everything read"""
+    up_to: Optional[int] = None
+    from_id: Optional[int] = None
+
+class UnreadCount(BaseModel):
+    unread: int
+
+class MarkReadResult(UnreadCount):
+    marked: int
@@ -1,5 +1,5 @@
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from datetime import datetime
 
 class AssetBase(BaseModel):
@@ -9,7 +9,11 @@ class AssetBase(BaseModel):
     purchase_price: float
 
 class AssetCreate(AssetBase):
-    pass
+    @field_validator("symbol")
+    @classmethod
+    def normalize_symbol(cls, symbol: str) -> str:
+        # Tickers are case-insensitive; one spelling keeps tracking and alerts on one key
+        return symbol.strip().upper()
 
 class Asset(AssetBase):
     id: int
@@ -37,4 +41,38 @@ class Portfolio(PortfolioBase):
     assets: List[Asset] = []
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class PositionValuations(BaseModel):
+    """Per-position values as parallel columns, one entry per asset"""
+    asset_ids: List[int] = []
+    symbols: List[str] = []
+    quantity: List[Optional[float]] = []
+    purchase_price: List[Optional[float]] = []
+    price: List[Optional[float]] = []
+    # Seconds since each price was fetched
+    price_age: List[Optional[float]] = []
+    market_value: List[Optional[float]] = []
+    cost_basis: List[Optional[float]] = []
+    unrealized_pnl: List[Optional[float]] = []
+    unrealized_pnl_percent: List[Optional[float]] = []
+    day_change: List[Optional[float]] = []
+    weight: List[Optional[float]] = []
+
+class ValuationTotals(BaseModel):
+    market_value: float
+    cost_basis: float
+    unrealized_pnl: float
+    unrealized_pnl_percent: Optional[float]
+    day_change: float
+    day_change_percent: Optional[float]
+
+class PortfolioValuation(ValuationTotals):
+    portfolio_id: int
+    name: str
+    unpriced_symbols: List[str] = []
+    positions: PositionValuations
+
+class PortfoliosValuation(BaseModel):
+    portfolios: List[PortfolioValuation]
+    totals: ValuationTotals
@@ -25,4 +25,10 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    email: Optional[str] = None
\ No newline at end of file
+    email: Optional[str] = None
+    user_id: Optional[int] = None
+    token_version: int = 0
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
\ No newline at end of file
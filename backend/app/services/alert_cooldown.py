@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Dict, List
+import redis
+from app.core.config import settings
+from app.services.alert_registry import RegisteredAlert
+
+class AlertCooldown:
+    """
+    Rate limits triggered alerts so each one is sent at most once per cooldown.
+
+    Cooldowns are claimed atomically in Redis with SET NX EX, so only one consumer
+    sends a given alert. Alerts known to be cooling down are remembered in a small
+    in-process TTL cache and skipped without a Redis round trip.
+    """
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self._lock = threading.Lock()
+        # alert id -> monotonic time at which its cooldown ends
+        self._cooling: Dict[int, float] = {}
+
+    def cooldown_seconds(self, alert_type: str) -> int:
+        """Get the cooldown for an alert type"""
+        return settings.ALERT_COOLDOWN_BY_TYPE.get(alert_type, settings.ALERT_COOLDOWN_SECONDS)
+
+    def acquire(self, alerts: List[RegisteredAlert]) -> List[RegisteredAlert]:
+        """
+        Start the cooldown of every alert that is not already cooling down.
+
+        Returns the alerts whose cooldown was started by this call, i.e. the ones
+        that should be sent now. All Redis work is done in one pipelined call.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                alert for alert in alerts
+                if self._cooling.get(alert.id, 0) <= now
+            ]
+        if not candidates:
+            return []
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        for alert in candidates:
+            alert_key = f"alert:{alert.id}:triggered"
+            pipe.set(alert_key, "1", nx=True, ex=self.cooldown_seconds(alert.alert_type))
+            pipe.pttl(alert_key)
+        results = pipe.execute()
+
+        acquired = []
+        with self._lock:
+            for i, alert in enumerate(candidates):
+                claimed, ttl_ms = results[2 * i], results[2 * i + 1]
+                if claimed:
+                    acquired.append(alert)
+                if ttl_ms and ttl_ms > 0:
+                    self._cooling[alert.id] = now + ttl_ms / 1000
+            self._prune(now)
+        return acquired
+
+    def _prune(self, now: float):
+        """Keep the local cache within its size limit, dropping expired entries first"""
+        if len(self._cooling) <= settings.ALERT_COOLDOWN_CACHE_SIZE:
+            return
+        self._cooling = {
+            alert_id: expires_at for alert_id, expires_at in self._cooling.items()
+            if expires_at > now
+        }
+        while len(self._cooling) > settings.ALERT_COOLDOWN_CACHE_SIZE:
+            del self._cooling[next(iter(self._cooling))]
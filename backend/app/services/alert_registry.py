@@ -0,0 +1,375 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.models.portfolio import Alert, Asset, Portfolio
+from app.schemas.alert import WINDOW_ALERT_TYPES
+
+class RegisteredAlert:
+    """Denormalized view of an active alert, holding everything needed to evaluate it"""
+    __slots__ = (
+        "id", "asset_id", "symbol", "alert_type", "threshold_value",
+        "notification_method", "purchase_price", "user_id", "window_minutes", "state"
+    )
+
+    def __init__(
+        self,
+        id: int,
+        asset_id: int,
+        symbol: str,
+        alert_type: str,
+        threshold_value: float,
+        notification_method: str,
+        purchase_price: float,
+        user_id: int,
+        window_minutes: Optional[int] = None
+    ):
+        self.id = id
+        self.asset_id = asset_id
+        self.symbol = symbol
+        self.alert_type = alert_type
+        self.threshold_value = threshold_value
+        self.notification_method = notification_method
+        self.purchase_price = purchase_price
+        self.user_id = user_id
+        self.window_minutes = window_minutes
+        # Evaluation state carried between ticks, e.g. the last side of a moving average
+        self.state = None
+
+    def fields(self) -> list:
+        """The constructor arguments, as published in registry changes"""
+        return [
+            self.id, self.asset_id, self.symbol, self.alert_type, self.threshold_value,
+            self.notification_method, self.purchase_price, self.user_id, self.window_minutes
+        ]
+
+    def on_asset(self, symbol: str, purchase_price: float) -> "RegisteredAlert":
+        """A copy for the asset's new symbol and purchase price, keeping the evaluation state while the symbol is the same"""
+        fields = self.fields()
+        fields[2], fields[6] = symbol, purchase_price
+        moved = RegisteredAlert(*fields)
+        if symbol == self.symbol:
+            moved.state = self.state
+        return moved
+
+    def same_rule(self, other: "RegisteredAlert") -> bool:
+        return (self.symbol, self.alert_type, self.threshold_value, self.window_minutes) == (
+            other.symbol, other.alert_type, other.threshold_value, other.window_minutes
+        )
+
+class SymbolAlertIndex:
+    """
+    Sorted-threshold index over the active alerts of a single symbol.
+
+    Every alert is reduced to trigger bounds: it fires when the price rises above
+    an entry in `_above` or falls below an entry in `_below`. Both lists hold
+    (bound, alert_id) pairs in sorted order, so the triggered set for a price is
+    found with a binary search in O(log n + k). Window alerts have no fixed bounds
+    and are kept apart in `window_alerts`, for evaluation against recent ticks.
+    """
+    def __init__(self):
+        self.alerts: Dict[int, RegisteredAlert] = {}
+        self.window_alerts: Dict[int, RegisteredAlert] = {}
+        self._above: List[Tuple[float, int]] = []
+        self._below: List[Tuple[float, int]] = []
+        self._bounds: Dict[int, Tuple[Optional[float], Optional[float]]] = {}
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def add(self, registered: RegisteredAlert):
+        above, below = self._trigger_bounds(registered)
+        self.alerts[registered.id] = registered
+        if registered.alert_type in WINDOW_ALERT_TYPES:
+            self.window_alerts[registered.id] = registered
+        self._bounds[registered.id] = (above, below)
+        if above is not None:
+            insort(self._above, (above, registered.id))
+        if below is not None:
+            insort(self._below, (below, registered.id))
+
+    def remove(self, alert_id: int):
+        self.alerts.pop(alert_id, None)
+        self.window_alerts.pop(alert_id, None)
+        above, below = self._bounds.pop(alert_id, (None, None))
+        if above is not None:
+            self._discard(self._above, (above, alert_id))
+        if below is not None:
+            self._discard(self._below, (below, alert_id))
+
+    def triggered(self, price: float) -> List[RegisteredAlert]:
+        """Get the alerts whose thresholds are crossed at the given price"""
+        # Bounds strictly below the price fire the "above" side, bounds strictly
+        # above it fire the "below" side
+        above_end = bisect_left(self._above, (price,))
+        below_start = bisect_right(self._below, (price, float("inf")))
+
+        alert_ids = [alert_id for _, alert_id in self._above[:above_end]]
+        alert_ids.extend(alert_id for _, alert_id in self._below[below_start:])
+        # A percent-change alert can match both of its bands
+        return [self.alerts[alert_id] for alert_id in dict.fromkeys(alert_ids)]
+
+    @staticmethod
+    def _trigger_bounds(registered: RegisteredAlert) -> Tuple[Optional[float], Optional[float]]:
+        """Get the (above, below) price bounds at which an alert triggers"""
+        if registered.alert_type == "price_above":
+            return registered.threshold_value, None
+        if registered.alert_type == "price_below":
+            return None, registered.threshold_value
+        if registered.alert_type == "price_change_percent" and registered.purchase_price > 0:
+            # |price - purchase| / purchase * 100 > threshold, expressed as two price bands
+            band = registered.purchase_price * registered.threshold_value / 100
+            return registered.purchase_price + band, registered.purchase_price - band
+        return None, None
+
+    @staticmethod
+    def _discard(entries: List[Tuple[float, int]], entry: Tuple[float, int]):
+        index = bisect_left(entries, entry)
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+
+class AlertRegistry:
+    """
+    Per-symbol registry of active alerts.
+
+    Loaded from the database and kept current by the alert and asset repositories,
+    so price ticks can be evaluated without touching Postgres. When instances
+    split symbols between them, each registry only holds the symbols `assign`
+    gave it, and changes made through the repository hooks are handed to
+    `on_change` so they can be applied on every instance with `apply_change`.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._alerts: Dict[int, RegisteredAlert] = {}
+        self._by_symbol: Dict[str, SymbolAlertIndex] = {}
+        self._by_asset: Dict[int, Set[int]] = {}
+        # Whether this instance evaluates a symbol; all of them until assigned otherwise
+        self._owns: Callable[[str], bool] = lambda symbol: True
+        # Symbols an assignment is loading, owned already while their alerts are queried
+        self._gaining: Set[str] = set()
+        # Ids removed while a partial load was querying, which it must not bring back
+        self._loads: List[Set[int]] = []
+        self.on_change: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    @staticmethod
+    def _active_alerts(db: Session):
+        return db.query(
+            Alert.id, Alert.asset_id, Asset.symbol, Alert.alert_type, Alert.threshold_value,
+            Alert.notification_method, Asset.purchase_price, Portfolio.user_id, Alert.window_minutes
+        ).join(Asset, Alert.asset_id == Asset.id).join(
+            Portfolio, Asset.portfolio_id == Portfolio.id
+        ).filter(Alert.is_active == True)
+
+    def load(self, db: Session):
+        """Replace the registry contents with every active alert in the database for the owned symbols"""
+        rows = self._active_alerts(db).all()
+
+        with self._lock:
+            self._alerts = {}
+            self._by_symbol = {}
+            self._by_asset = {}
+            for row in rows:
+                if self._owned(row.symbol):
+                    self._add(RegisteredAlert(*row))
+        print(f"Alert registry loaded {len(self._alerts)} active alerts")
+
+    def assign(self, db: Session, owns: Callable[[str], bool]) -> List[str]:
+        """
+        Switch to the symbols `owns` accepts: drop the alerts of symbols no longer
+        owned and load those of newly owned ones. The new assignment only takes
+        effect once the load succeeded; if it fails the gained symbols stay
+        unloaded and `assign` can be called again. Returns the dropped symbols.
+        """
+        # One pass over the distinct symbols with active alerts, then only the alerts
+        # of the symbols just gained are loaded
+        symbols = [symbol for (symbol,) in db.query(Asset.symbol).join(
+            Alert, Alert.asset_id == Asset.id
+        ).filter(Alert.is_active == True).distinct()]
+
+        with self._lock:
+            # Evaluated before anything changes, so a failing predicate leaves the registry as it was
+            held = set(self._by_symbol)
+            dropped = [symbol for symbol in held if not owns(symbol)]
+            gained = [symbol for symbol in symbols if owns(symbol) and symbol not in held]
+            self._drop_symbols(dropped)
+            self._gaining = set(gained)
+
+        try:
+            loaded = self._merge(self._active_alerts(db).filter(Asset.symbol.in_(gained))) if gained else 0
+        except Exception:
+            with self._lock:
+                self._drop_symbols(self._gaining)
+                self._gaining = set()
+            raise
+
+        with self._lock:
+            self._owns = owns
+            self._gaining = set()
+            # Dropped symbols re-added by changes applied under the previous assignment
+            stale = [symbol for symbol in self._by_symbol if not owns(symbol)]
+            self._drop_symbols(stale)
+        print(f"Alert registry now holds {len(held) - len(dropped) + len(gained)} symbols: loaded {loaded} alerts, dropped {len(dropped)} symbols")
+        return dropped + [symbol for symbol in stale if symbol not in dropped]
+
+    def _drop_symbols(self, symbols: Iterable[str]):
+        for symbol in list(symbols):
+            index = self._by_symbol.get(symbol)
+            if index is not None:
+                for alert_id in list(index.alerts):
+                    self._remove(alert_id)
+
+    def _owned(self, symbol: str) -> bool:
+        return symbol in self._gaining or self._owns(symbol)
+
+    def load_assets(self, db: Session, asset_ids: List[int]):
+        """Load the owned active alerts of assets, e.g. after they moved to an owned symbol"""
+        self._merge(self._active_alerts(db).filter(Alert.asset_id.in_(asset_ids)))
+
+    def _merge(self, query) -> int:
+        """Add the rows of a query for alerts not already held, without holding the lock while it runs"""
+        removed: Set[int] = set()
+        with self._lock:
+            self._loads.append(removed)
+        try:
+            rows = query.all()
+        finally:
+            with self._lock:
+                self._loads.remove(removed)
+        added = 0
+        with self._lock:
+            # Alerts already held were registered since the query started and are newer
+            for row in rows:
+                if row.id not in self._alerts and row.id not in removed and self._owned(row.symbol):
+                    self._add(RegisteredAlert(*row))
+                    added += 1
+        return added
+
+    def upsert_alert(self, alert: Alert, asset: Asset, user_id: int):
+        """Register or refresh an alert after it has been created or updated"""
+        registered = RegisteredAlert(
+            alert.id, asset.id, asset.symbol, alert.alert_type, alert.threshold_value,
+            alert.notification_method, asset.purchase_price, user_id, alert.window_minutes
+        )
+        self._change({"upsert": [registered.fields()]} if alert.is_active else {"remove": [alert.id]})
+
+    def remove_alert(self, alert_id: int):
+        """Drop an alert from the registry"""
+        self._change({"remove": [alert_id]})
+
+    def apply_batch(self, upserts: List[Tuple[Alert, Asset]], removed_ids: List[int], user_id: int):
+        """Apply the outcome of a batch of alert changes as one change"""
+        change = {"upsert": [], "remove": list(removed_ids)}
+        for alert, asset in upserts:
+            if alert.is_active:
+                change["upsert"].append(RegisteredAlert(
+                    alert.id, asset.id, asset.symbol, alert.alert_type, alert.threshold_value,
+                    alert.notification_method, asset.purchase_price, user_id, alert.window_minutes
+                ).fields())
+            else:
+                change["remove"].append(alert.id)
+        self._change(change)
+
+    def update_asset(self, asset: Asset):
+        """Re-key the alerts of an asset after its symbol or purchase price changed"""
+        self._change({"assets": [[asset.id, asset.symbol, asset.purchase_price]]})
+
+    def remove_asset(self, asset_id: int):
+        """Drop every alert belonging to an asset"""
+        self._change({"remove_assets": [asset_id]})
+
+    def _change(self, change: Dict[str, Any]):
+        self.apply_change(change)
+        self._publish(change)
+
+    def _publish(self, change: Dict[str, Any]):
+        if self.on_change is not None:
+            self.on_change(change)
+
+    def apply_change(self, change: Dict[str, Any]) -> List[int]:
+        """
+        Apply a change made on any instance. Changes carry whole alerts rather than
+        deltas, so applying one again is harmless.
+
+        Returns the ids of assets that moved to a symbol this instance owns but
+        whose alerts it doesn't hold; their alerts have to be loaded with
+        `load_assets`.
+        """
+        missing = []
+        with self._lock:
+            for fields in change.get("upsert", ()):
+                self._upsert(RegisteredAlert(*fields))
+            for alert_id in change.get("remove", ()):
+                self._remove(alert_id)
+            for asset_id in change.get("remove_assets", ()):
+                for alert_id in list(self._by_asset.get(asset_id, ())):
+                    self._remove(alert_id)
+            for asset_id, symbol, purchase_price in change.get("assets", ()):
+                alert_ids = list(self._by_asset.get(asset_id, ()))
+                if not alert_ids and self._owned(symbol):
+                    missing.append(asset_id)
+                for alert_id in alert_ids:
+                    # Replaced rather than changed, since the consumer may be evaluating the old one
+                    registered = self._remove(alert_id).on_asset(symbol, purchase_price)
+                    if self._owned(symbol):
+                        self._add(registered)
+        return missing
+
+    def get_alerts(self, symbol: str) -> List[RegisteredAlert]:
+        """Get a snapshot of the active alerts for a symbol"""
+        with self._lock:
+            index = self._by_symbol.get(symbol)
+            return list(index.alerts.values()) if index else []
+
+    def get_triggered(self, symbol: str, price: float) -> List[RegisteredAlert]:
+        """Get the active alerts for a symbol that are triggered at the given price"""
+        with self._lock:
+            index = self._by_symbol.get(symbol)
+            return index.triggered(price) if index else []
+
+    def get_window_alerts(self, symbol: str) -> List[RegisteredAlert]:
+        """Get the active window alerts for a symbol"""
+        with self._lock:
+            index = self._by_symbol.get(symbol)
+            return list(index.window_alerts.values()) if index else []
+
+    def symbols(self) -> List[str]:
+        """Get all symbols that currently have active alerts"""
+        with self._lock:
+            return list(self._by_symbol)
+
+    def _add(self, registered: RegisteredAlert):
+        self._alerts[registered.id] = registered
+        self._by_symbol.setdefault(registered.symbol, SymbolAlertIndex()).add(registered)
+        self._by_asset.setdefault(registered.asset_id, set()).add(registered.id)
+
+    def _upsert(self, registered: RegisteredAlert):
+        existing = self._remove(registered.id)
+        if self._owned(registered.symbol):
+            # Re-applying an unchanged alert, e.g. a change coming back from the
+            # topic, keeps its evaluation state
+            if existing is not None and existing.same_rule(registered):
+                registered.state = existing.state
+            self._add(registered)
+
+    def _remove(self, alert_id: int) -> Optional[RegisteredAlert]:
+        for removed in self._loads:
+            removed.add(alert_id)
+        registered = self._alerts.pop(alert_id, None)
+        if registered is None:
+            return None
+
+        index = self._by_symbol.get(registered.symbol)
+        if index is not None:
+            index.remove(alert_id)
+            if not index:
+                del self._by_symbol[registered.symbol]
+
+        asset_alerts = self._by_asset.get(registered.asset_id)
+        if asset_alerts is not None:
+            asset_alerts.discard(alert_id)
+            if not asset_alerts:
+                del self._by_asset[registered.asset_id]
+        return registered
+
+# Create a singleton instance
+alert_registry = AlertRegistry()
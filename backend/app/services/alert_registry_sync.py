@@ -0,0 +1,103 @@
+import json
+import queue
+import threading
+from typing import Any, Dict, Optional
+from kafka import KafkaConsumer, KafkaProducer, TopicPartition
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.alert_registry import alert_registry
+from app.services.kafka_topics import REGISTRY_TOPIC, ensure_topic
+
+class AlertRegistrySync:
+    """
+    Shares alert registry changes between instances.
+
+    A repository hook only runs on the instance that served the request, while
+    the symbol may be evaluated by another one. Every change is therefore
+    published to a single-partition topic, so all changes keep one order, and each
+    instance consumes it outside any consumer group (like the stream hub) and
+    applies what concerns the symbols it owns, including its own changes again.
+
+    Publishing only queues the change for a sender thread: KafkaProducer.send
+    blocks while it waits for metadata or buffer space, and the async repository
+    hooks run on the event loop.
+    """
+    def __init__(self):
+        self.producer = None
+        self.consumer = None
+        self.pending: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self.running = False
+        self.thread = None
+        self.sender = None
+
+    def publish(self, change: Dict[str, Any]):
+        self.pending.put(change)
+
+    def _send(self):
+        # One thread sends in queue order, so the topic keeps the order of the changes
+        while True:
+            change = self.pending.get()
+            if change is None:
+                return
+            try:
+                self.producer.send(REGISTRY_TOPIC, change)
+            except Exception as e:
+                print(f"Error publishing alert registry change: {str(e)}")
+
+    def _consume(self):
+        while self.running:
+            try:
+                records = self.consumer.poll(timeout_ms=500)
+                missing = []
+                for partition_records in records.values():
+                    for record in partition_records:
+                        missing.extend(alert_registry.apply_change(record.value))
+                if missing:
+                    with SessionLocal() as db:
+                        alert_registry.load_assets(db, missing)
+            except Exception as e:
+                print(f"Error applying alert registry changes: {str(e)}")
+
+    def start(self):
+        """Start sharing changes; must run before the registry loads, so no later change is missed"""
+        if not self.running:
+            ensure_topic(REGISTRY_TOPIC, 1)
+            self.producer = KafkaProducer(
+                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+                value_serializer=lambda v: json.dumps(v).encode('utf-8')
+            )
+            self.consumer = KafkaConsumer(
+                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+                value_deserializer=lambda x: json.loads(x.decode('utf-8'))
+            )
+            # Fix the starting offset now rather than on the first poll
+            partition = TopicPartition(REGISTRY_TOPIC, 0)
+            self.consumer.assign([partition])
+            self.consumer.seek_to_end(partition)
+            self.consumer.position(partition)
+            alert_registry.on_change = self.publish
+            self.running = True
+            self.thread = threading.Thread(target=self._consume)
+            self.thread.daemon = True
+            self.thread.start()
+            self.sender = threading.Thread(target=self._send)
+            self.sender.daemon = True
+            self.sender.start()
+            print("Alert registry sync started")
+
+    def stop(self):
+        if self.running:
+            alert_registry.on_change = None
+            self.running = False
+            self.thread.join(timeout=5)
+            # Send what is still queued before closing
+            self.pending.put(None)
+            self.sender.join(timeout=5)
+            self.producer.flush(timeout=5)
+            self.consumer.close()
+            self.thread = None
+            self.sender = None
+            print("Alert registry sync stopped")
+
+# Create a singleton instance
+alert_registry_sync = AlertRegistrySync()
@@ -1,118 +1,221 @@
 import json
 import threading
 import time
-from typing import Dict, Any
-from kafka import KafkaConsumer
+from typing import Dict, List, Optional, Set, Tuple
+from kafka import ConsumerRebalanceListener, KafkaConsumer, KafkaProducer, TopicPartition
+from kafka.consumer.fetcher import ConsumerRecord
 import redis
-from sqlalchemy.orm import Session
 from app.db.session import SessionLocal
-from app.models.portfolio import Alert, Asset
 from app.core.config import settings
+from app.services.alert_registry import alert_registry, RegisteredAlert
+from app.services.alert_registry_sync import alert_registry_sync
+from app.services.alert_cooldown import AlertCooldown
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.kafka_topics import PRICE_TOPIC, symbol_partition
+from app.services.price_window import price_windows
+
+class PartitionAssignmentListener(ConsumerRebalanceListener):
+    """Keeps the alert registry to the symbols of the partitions this instance owns"""
+    def __init__(self, service: "AlertService"):
+        self.service = service
+
+    def on_partitions_revoked(self, revoked):
+        # Offsets are committed after every batch, so there is nothing to flush; the
+        # symbols are kept until the new assignment shows which ones moved away
+        pass
+
+    def on_partitions_assigned(self, assigned):
+        self.service._assign({partition.partition for partition in assigned if partition.topic == PRICE_TOPIC})
 
 class AlertService:
+    """
+    Evaluates alerts against price ticks as one member of a Kafka consumer group.
+
+    Ticks are keyed by symbol, so each symbol is evaluated by exactly one instance
+    and instances split the work by partition. On every rebalance the registry is
+    switched to the symbols of the partitions assigned to this instance.
+    """
     def __init__(self):
         self.consumer = KafkaConsumer(
-            "stock-price-updates",
             bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
             value_deserializer=lambda x: json.loads(x.decode('utf-8')),
+            group_id=settings.ALERT_CONSUMER_GROUP_ID,
             auto_offset_reset='latest',
-            enable_auto_commit=True
+            enable_auto_commit=False
         )
+        self.consumer.subscribe([PRICE_TOPIC], listener=PartitionAssignmentListener(self))
+        # Triggered alerts are published for the live stream hub to push to clients
+        self.producer = KafkaProducer(
+            bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+            value_serializer=lambda v: json.dumps(v).encode('utf-8')
+        )
+        self.notification_topic = "alert-notifications"
         self.redis_client = redis.Redis(
             host=settings.REDIS_HOST,
             port=settings.REDIS_PORT,
             decode_responses=True
         )
+        self.cooldown = AlertCooldown(self.redis_client)
+        # Partitions assigned whose alerts couldn't be loaded yet
+        self.pending_assignment: Optional[Set[int]] = None
         self.running = False
         self.thread = None
     
-    def _process_price_updates(self):
-        """Process price updates from Kafka and check against alert thresholds"""
-        while self.running:
-            for message in self.consumer:
-                if not self.running:
-                    break
-                
-                try:
-                    price_data = message.value
-                    symbol = price_data.get("symbol")
-                    price = price_data.get("price")
-                    
-                    if not symbol or not price:
-                        continue
-                    
-                    # Get all assets with this symbol
-                    with SessionLocal() as db:
-                        assets = db.query(Asset).filter(Asset.symbol == symbol).all()
-                        
-                        for asset in assets:
-                            # Get all active alerts for this asset
-                            alerts = db.query(Alert).filter(
-                                Alert.asset_id == asset.id,
-                                Alert.is_active == True
-                            ).all()
-                            
-                            for alert in alerts:
-                                self._check_and_trigger_alert(db, alert, asset, price)
-                
-                except Exception as e:
-                    print(f"Error processing price update: {str(e)}")
-    
-    def _check_and_trigger_alert(self, db: Session, alert: Alert, asset: Asset, current_price: float):
-        """Check if an alert should be triggered based on current price"""
-        should_trigger = False
+    def _poll_batch(self) -> Dict[TopicPartition, List[ConsumerRecord]]:
+        """Poll until the batch is full or the linger time has passed"""
+        batch: Dict[TopicPartition, List[ConsumerRecord]] = {}
+        remaining = settings.ALERT_CONSUMER_BATCH_SIZE
+        deadline = time.monotonic() + settings.ALERT_CONSUMER_LINGER_MS / 1000
         
-        if alert.alert_type == "price_above" and current_price > alert.threshold_value:
-            should_trigger = True
-        elif alert.alert_type == "price_below" and current_price < alert.threshold_value:
-            should_trigger = True
-        elif alert.alert_type == "price_change_percent":
-            # Calculate percent change from purchase price
-            if asset.purchase_price > 0:
-                percent_change = ((current_price - asset.purchase_price) / asset.purchase_price) * 100
-                if abs(percent_change) > alert.threshold_value:
-                    should_trigger = True
+        while self.running and remaining > 0:
+            timeout_ms = max(int((deadline - time.monotonic()) * 1000), 0)
+            records = self.consumer.poll(timeout_ms=timeout_ms, max_records=remaining)
+            for partition, partition_records in records.items():
+                batch.setdefault(partition, []).extend(partition_records)
+                remaining -= len(partition_records)
+            if timeout_ms == 0:
+                break
         
-        if should_trigger:
-            # Check if we've already sent this alert recently (rate limiting)
-            alert_key = f"alert:{alert.id}:triggered"
-            if not self.redis_client.exists(alert_key):
-                # Send the alert
-                self._send_alert(db, alert, asset, current_price)
+        return batch
+    
+    def _ticks(self, batch: Dict[TopicPartition, List[ConsumerRecord]]) -> Dict[str, List[Tuple[int, float]]]:
+        """Group a batch of price updates by symbol, as (timestamp, price) ticks in timestamp order"""
+        ticks: Dict[str, List[Tuple[int, float]]] = {}
+        for records in batch.values():
+            for record in records:
+                price_data = record.value
+                symbol = price_data.get("symbol")
+                price = price_data.get("price")
                 
-                # Set rate limiting in Redis (don't send the same alert for 1 hour)
-                self.redis_client.setex(alert_key, 3600, "1")
+                if not symbol or not price:
+                    continue
+                
+                ticks.setdefault(symbol, []).append((price_data.get("timestamp", 0), price))
+        for symbol_ticks in ticks.values():
+            symbol_ticks.sort(key=lambda tick: tick[0])
+        return ticks
     
-    def _send_alert(self, db: Session, alert: Alert, asset: Asset, current_price: float):
-        """Send an alert notification"""
-        try:
-            # Get user information
-            portfolio = asset.portfolio
-            user = portfolio.user
-            
-            message = f"Alert for {asset.symbol}: Current price ${current_price} has triggered your {alert.alert_type} alert (threshold: {alert.threshold_value})."
+    def _evaluate(self, batch: Dict[TopicPartition, List[ConsumerRecord]]) -> List[Tuple[RegisteredAlert, float]]:
+        """
+        Find the alerts a batch triggers, each with the price it triggered at. The
+        registry may replace alerts meanwhile, so the price isn't looked up again
+        by symbol.
+        """
+        candidates: List[Tuple[RegisteredAlert, float]] = []
+        for symbol, symbol_ticks in self._ticks(batch).items():
+            # Threshold alerts only depend on the current price, so they're looked up
+            # in the in-memory index once per symbol, at the latest price in the batch
+            _, latest_price = symbol_ticks[-1]
+            candidates.extend((alert, latest_price) for alert in alert_registry.get_triggered(symbol, latest_price))
+            # Window alerts need every tick in their windows, so each one is fed in;
+            # an alert triggered by several is sent with the first price that did
+            window_alerts = alert_registry.get_window_alerts(symbol)
+            triggered: Dict[int, Tuple[RegisteredAlert, float]] = {}
+            for timestamp, price in symbol_ticks:
+                for alert in price_windows.update(symbol, timestamp, price, window_alerts):
+                    triggered.setdefault(alert.id, (alert, price))
+            candidates.extend(triggered.values())
+        return candidates
+    
+    def _finish(self, candidates: List[Tuple[RegisteredAlert, float]]):
+        """
+        Send the triggered alerts not cooling down and commit the batch. Failures
+        are retried up to ALERT_CONSUMER_MAX_ATTEMPTS times, then the batch is
+        skipped. Only the steps that failed are retried: the batch isn't evaluated
+        again, and cooldowns, once claimed, aren't claimed again.
+        """
+        attempts = settings.ALERT_CONSUMER_MAX_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            try:
+                if candidates:
+                    # Claimed last, right before sending, once nothing else can fail
+                    acquired = {alert.id for alert in self.cooldown.acquire([alert for alert, _ in candidates])}
+                    for alert, price in candidates:
+                        if alert.id in acquired:
+                            self._send_alert(alert, price)
+                    candidates = []
+                self.consumer.commit()
+                return
+            except Exception as e:
+                print(f"Error finishing price update batch (attempt {attempt} of {attempts}): {str(e)}")
+                if attempt == attempts or not self.running:
+                    break
+                time.sleep(settings.ALERT_CONSUMER_RETRY_SECONDS * 2 ** (attempt - 1))
+        print(f"Skipping price update batch with {len(candidates)} unsent alerts")
+    
+    def _process_price_updates(self):
+        """Process price updates from Kafka in batches and check against alert thresholds"""
+        while self.running:
+            if self.pending_assignment is not None:
+                self._assign(self.pending_assignment)
+                if self.pending_assignment is not None:
+                    time.sleep(1)
+            batch = self._poll_batch()
+            if not batch:
+                continue
             
-            # Send notification based on method
-            if alert.notification_method == "email":
-                print(f"Sending email to {user.email}: {message}")
-                # TODO: Implement actual email sending via SendGrid or similar
+            try:
+                candidates = self._evaluate(batch)
+            except Exception as e:
+                # Evaluation only reads memory, so the same ticks would fail the same way again
+                print(f"Error evaluating price update batch, skipping it: {str(e)}")
+                candidates = []
+            self._finish(candidates)
+    
+    def _send_alert(self, alert: RegisteredAlert, current_price: float):
+        """Publish a triggered alert to live streams and queue its notifications"""
+        try:
+            message = f"Alert for {alert.symbol}: Current price ${current_price} has triggered your {alert.alert_type} alert (threshold: {alert.threshold_value})."
+            notification = {
+                "user_id": alert.user_id,
+                "alert_id": alert.id,
+                "symbol": alert.symbol,
+                "alert_type": alert.alert_type,
+                "threshold_value": alert.threshold_value,
+                "price": current_price,
+                "message": message,
+                "timestamp": int(time.time())
+            }
             
-            elif alert.notification_method == "sms":
-                print(f"Sending SMS to user {user.id}: {message}")
-                # TODO: Implement actual SMS sending via Twilio or similar
+            # Push to the user's open live streams
+            self.producer.send(self.notification_topic, notification)
             
-            # Always log to dashboard (will be fetched by frontend)
-            print(f"Dashboard notification for user {user.id}: {message}")
-            # TODO: Store notification in database for dashboard
+            # Dashboard, email and SMS delivery happen on the dispatcher's workers,
+            # so a slow mail server can't hold up evaluation
+            notification_dispatcher.submit({**notification, "notification_method": alert.notification_method})
             
             print(f"Alert triggered: {message}")
         
         except Exception as e:
             print(f"Error sending alert: {str(e)}")
     
+    def _assign(self, owned: Set[int]):
+        """Load the alerts of the symbols on the owned partitions and drop the rest"""
+        # Retried from the poll loop until it succeeds
+        self.pending_assignment = owned
+        try:
+            partitions = len(self.consumer.partitions_for_topic(PRICE_TOPIC) or ())
+            if not partitions:
+                print(f"Alert service has no partition count for {PRICE_TOPIC} yet, retrying the assignment")
+                return
+            with SessionLocal() as db:
+                dropped = alert_registry.assign(
+                    db, lambda symbol: symbol_partition(symbol, partitions) in owned
+                )
+            price_windows.discard(dropped)
+            self.pending_assignment = None
+            print(f"Alert service assigned {len(owned)} of {partitions} partitions")
+        except Exception as e:
+            print(f"Error loading alert registry, retrying the assignment: {str(e)}")
+    
     def start(self):
         """Start the alert service"""
         if not self.running:
+            # Follow registry changes from other instances before any partitions load
+            try:
+                alert_registry_sync.start()
+            except Exception as e:
+                print(f"Error starting alert registry sync: {str(e)}")
             self.running = True
             self.thread = threading.Thread(target=self._process_price_updates)
             self.thread.daemon = True
@@ -124,6 +227,9 @@ class AlertService:
         self.running = False
         if self.thread:
             self.thread.join(timeout=5)
+            # Leave the group so the partitions move to the other instances right away
+            self.consumer.close()
+            alert_registry_sync.stop()
             print("Alert service stopped")
 
 # Create a singleton instance
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterator, List, Tuple
+from pydantic import ValidationError
+from app.core.config import settings
+from app.schemas.portfolio import AssetCreate
+
+CSV_COLUMNS = ("symbol", "asset_type", "quantity", "purchase_price")
+
+class AssetImportError(ValueError):
+    """Raised when an import body can't be read as a whole, as opposed to a bad row"""
+
+def _csv_rows(body: bytes) -> Iterator[Any]:
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise AssetImportError("CSV must be UTF-8 encoded")
+    reader = csv.DictReader(io.StringIO(text))
+    missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise AssetImportError(f"CSV header is missing columns: {', '.join(missing)}")
+    # Empty cells are left out so they fail validation as missing rather than as ""
+    for row in reader:
+        yield {key: value for key, value in row.items() if key in CSV_COLUMNS and value not in ("", None)}
+
+def _json_rows(body: bytes) -> List[Any]:
+    try:
+        rows = json.loads(body)
+    except ValueError:
+        raise AssetImportError("Body is not valid JSON")
+    if not isinstance(rows, list):
+        raise AssetImportError("JSON body must be an array of assets")
+    return rows
+
+def parse_assets(body: bytes, content_type: str) -> Tuple[List[AssetCreate], List[Dict[str, Any]]]:
+    """
+    Parse a CSV or JSON array of assets, validating each row.
+
+    Returns the valid assets and one error entry per invalid row, numbered from 1
+    in input order. Raises AssetImportError if the body itself is unreadable or
+    holds more than ASSET_IMPORT_MAX_ROWS rows.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "text/csv":
+        rows = _csv_rows(body)
+    elif media_type == "application/json":
+        rows = _json_rows(body)
+    else:
+        raise AssetImportError("Content-Type must be text/csv or application/json")
+
+    assets: List[AssetCreate] = []
+    errors: List[Dict[str, Any]] = []
+    for number, row in enumerate(rows, start=1):
+        if number > settings.ASSET_IMPORT_MAX_ROWS:
+            raise AssetImportError(f"At most {settings.ASSET_IMPORT_MAX_ROWS} rows can be imported at once")
+        try:
+            asset = AssetCreate.model_validate(row)
+        except ValidationError as e:
+            errors.append({
+                "row": number,
+                "errors": [
+                    f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+                    for error in e.errors()
+                ]
+            })
+            continue
+        asset.symbol = asset.symbol.strip()
+        if not asset.symbol:
+            errors.append({"row": number, "errors": ["symbol: must not be empty"]})
+            continue
+        assets.append(asset)
+    return assets, errors
@@ -0,0 +1,67 @@
+import asyncio
+import random
+import time
+from typing import Dict, Any
+import httpx
+from app.core.config import settings
+
+# Responses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def _limits() -> httpx.Limits:
+    # Each client talks to a single upstream host, so the pool limit is the per-host limit
+    return httpx.Limits(
+        max_connections=settings.STOCK_API_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.STOCK_API_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.STOCK_API_KEEPALIVE_SECONDS,
+    )
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.STOCK_API_TIMEOUT_SECONDS,
+        connect=settings.STOCK_API_CONNECT_TIMEOUT_SECONDS,
+    )
+
+def create_client() -> httpx.Client:
+    """Create a pooled, keep-alive HTTP client for upstream API calls"""
+    return httpx.Client(limits=_limits(), timeout=_timeout())
+
+def create_async_client() -> httpx.AsyncClient:
+    """Create a pooled, keep-alive async HTTP client for upstream API calls"""
+    return httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    ceiling = min(settings.STOCK_API_BACKOFF_SECONDS * (2 ** attempt), settings.STOCK_API_MAX_BACKOFF_SECONDS)
+    return random.uniform(0, ceiling)
+
+def _should_retry(response: httpx.Response, attempt: int) -> bool:
+    return response.status_code in RETRY_STATUS_CODES and attempt < settings.STOCK_API_MAX_RETRIES
+
+def get_with_retries(client: httpx.Client, url: str, params: Dict[str, Any]) -> httpx.Response:
+    """GET a URL, retrying transport errors and retryable statuses with jittered backoff"""
+    attempt = 0
+    while True:
+        try:
+            response = client.get(url, params=params)
+            if not _should_retry(response, attempt):
+                return response
+        except httpx.TransportError:
+            if attempt >= settings.STOCK_API_MAX_RETRIES:
+                raise
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
+
+async def aget_with_retries(client: httpx.AsyncClient, url: str, params: Dict[str, Any]) -> httpx.Response:
+    """Async version of get_with_retries"""
+    attempt = 0
+    while True:
+        try:
+            response = await client.get(url, params=params)
+            if not _should_retry(response, attempt):
+                return response
+        except httpx.TransportError:
+            if attempt >= settings.STOCK_API_MAX_RETRIES:
+                raise
+        await asyncio.sleep(backoff_delay(attempt))
+        attempt += 1
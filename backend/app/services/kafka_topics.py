@@ -0,0 +1,22 @@
+from kafka.admin import KafkaAdminClient, NewTopic
+from kafka.errors import TopicAlreadyExistsError
+from kafka.partitioner.default import murmur2
+from app.core.config import settings
+
+PRICE_TOPIC = "stock-price-updates"
+REGISTRY_TOPIC = "alert-registry-changes"
+
+def ensure_topic(name: str, partitions: int):
+    """Create a topic with the given number of partitions, unless it already exists"""
+    admin = KafkaAdminClient(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS)
+    try:
+        admin.create_topics([NewTopic(name, partitions, settings.KAFKA_REPLICATION_FACTOR)])
+        print(f"Created topic {name} with {partitions} partitions")
+    except TopicAlreadyExistsError:
+        pass
+    finally:
+        admin.close()
+
+def symbol_partition(symbol: str, partitions: int) -> int:
+    """The partition of a symbol's ticks; matches the producer's default partitioner for the key"""
+    return (murmur2(symbol.encode("utf-8")) & 0x7fffffff) % partitions
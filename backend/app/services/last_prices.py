@@ -0,0 +1,71 @@
+import json
+import threading
+from typing import Dict, Iterable, List, Tuple
+import redis
+from app.core.config import settings
+
+# (price, change, unix time it was fetched)
+LastPrice = Tuple[float, float, float]
+
+class LastPrices:
+    """
+    The last price the price stream fetched for each tracked symbol.
+
+    Unlike the quote cache, entries don't expire: a price stays until a newer one
+    replaces it or its symbol stops being tracked, however long a refresh cycle
+    takes. Each entry carries the time it was fetched, so readers can tell how
+    old it is. Kept in a Redis hash shared by every worker, or in this process
+    without Redis.
+    """
+    KEY = "price-stream:last-prices"
+
+    def __init__(self):
+        self.redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True
+        ) if settings.PRICE_STREAM_REDIS else None
+        self._lock = threading.Lock()
+        self._local: Dict[str, LastPrice] = {}
+
+    def set_many(self, prices: Dict[str, LastPrice]):
+        """Record freshly fetched prices"""
+        if self.redis_client is None:
+            with self._lock:
+                self._local.update(prices)
+            return
+        try:
+            self.redis_client.hset(self.KEY, mapping={symbol: json.dumps(price) for symbol, price in prices.items()})
+        except redis.RedisError as e:
+            print(f"Error storing last prices: {str(e)}")
+
+    def get_many(self, symbols: List[str]) -> Dict[str, LastPrice]:
+        """Get the last known price of each symbol that has one"""
+        if not symbols:
+            return {}
+        if self.redis_client is None:
+            with self._lock:
+                return {symbol: self._local[symbol] for symbol in symbols if symbol in self._local}
+        try:
+            values = self.redis_client.hmget(self.KEY, symbols)
+        except redis.RedisError as e:
+            print(f"Error reading last prices: {str(e)}")
+            return {}
+        return {symbol: tuple(json.loads(value)) for symbol, value in zip(symbols, values) if value is not None}
+
+    def retain(self, symbols: Iterable[str]):
+        """Drop the prices of symbols no longer tracked"""
+        keep = set(symbols)
+        if self.redis_client is None:
+            with self._lock:
+                self._local = {symbol: price for symbol, price in self._local.items() if symbol in keep}
+            return
+        try:
+            stale = [symbol for symbol in self.redis_client.hkeys(self.KEY) if symbol not in keep]
+            if stale:
+                self.redis_client.hdel(self.KEY, *stale)
+        except redis.RedisError as e:
+            print(f"Error pruning last prices: {str(e)}")
+
+# Create a singleton instance
+last_prices = LastPrices()
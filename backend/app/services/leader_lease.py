@@ -0,0 +1,101 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Optional
+import redis
+
+# Extend or release the lease only while this holder still owns it
+_RENEW_IF_HELD = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_IF_HELD = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class LeaderLease:
+    """
+    Time-limited leadership over a Redis key, for work only one process should do.
+
+    A background thread tries to take the key with SET NX PX every third of the
+    lease, and while holding it extends it the same way. If the leader dies or
+    loses Redis the key expires and another process takes over within about one
+    lease period. Leadership is only reported while the lease taken or last
+    extended by this process is still running, so a leader cut off from Redis
+    stops before anyone else can start. Without Redis every process leads.
+    """
+    def __init__(self, redis_client: Optional[redis.Redis], key: str, seconds: float):
+        self.redis_client = redis_client
+        self.key = key
+        self.seconds = seconds
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._expires_at = 0.0
+        self._stop_event = threading.Event()
+        self.thread = None
+        if redis_client is not None:
+            self._renew = redis_client.register_script(_RENEW_IF_HELD)
+            self._release = redis_client.register_script(_RELEASE_IF_HELD)
+
+    @property
+    def is_leader(self) -> bool:
+        return self.redis_client is None or time.monotonic() < self._expires_at
+
+    def leader(self) -> Optional[str]:
+        """Get the current holder of the lease, if any"""
+        if self.redis_client is None:
+            return self.holder
+        try:
+            return self.redis_client.get(self.key)
+        except redis.RedisError:
+            return None
+
+    def _refresh(self):
+        # Measured from before the round trip, so the local view never outlasts the key
+        started = time.monotonic()
+        milliseconds = int(self.seconds * 1000)
+        try:
+            if self.is_leader and self._expires_at:
+                held = self._renew(keys=[self.key], args=[self.holder, milliseconds]) == 1
+            else:
+                held = bool(self.redis_client.set(self.key, self.holder, nx=True, px=milliseconds))
+        except redis.RedisError as e:
+            print(f"Error refreshing lease {self.key}: {str(e)}")
+            return
+        if held:
+            if not self._expires_at:
+                print(f"Took lease {self.key} as {self.holder}")
+            self._expires_at = started + self.seconds
+        elif self._expires_at:
+            print(f"Lost lease {self.key}")
+            self._expires_at = 0.0
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._refresh()
+            self._stop_event.wait(self.seconds / 3)
+
+    def start(self):
+        if self.redis_client is not None and self.thread is None:
+            self._stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name=f"lease-{self.key}", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop refreshing and hand the lease over right away rather than letting it expire"""
+        if self.thread is not None:
+            self._stop_event.set()
+            self.thread.join(timeout=5)
+            self.thread = None
+            if self._expires_at:
+                self._expires_at = 0.0
+                try:
+                    self._release(keys=[self.key], args=[self.holder])
+                except redis.RedisError as e:
+                    print(f"Error releasing lease {self.key}: {str(e)}")
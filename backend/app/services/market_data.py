@@ -0,0 +1,288 @@
+import asyncio
+import csv
+import json
+import math
+import random
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Dict, Any, Optional, List, Iterator, Tuple
+import httpx
+from app.core.config import settings
+from app.services.http_client import create_client, create_async_client, get_with_retries, aget_with_retries
+
+class MarketDataProvider(ABC):
+    """
+    Source of quotes, symbol search and daily history.
+
+    Quotes are returned in Alpha Vantage's GLOBAL_QUOTE shape ("05. price", ...)
+    regardless of the provider, since that is what the API and frontend consume.
+    """
+    # Maximum number of symbols fetched by one upstream request in get_quotes (None = unlimited)
+    max_batch_size: Optional[int] = 1
+    # Whether requests count against the upstream API quota
+    rate_limited: bool = True
+
+    @abstractmethod
+    def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Get the latest quote for a symbol"""
+
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the latest quotes for several symbols, keyed by symbol"""
+        quotes = {}
+        for symbol in symbols:
+            quote = self.get_quote(symbol)
+            if quote:
+                quotes[symbol] = quote
+        return quotes
+
+    @abstractmethod
+    def search_symbol(self, keywords: str) -> List[Dict[str, str]]:
+        """Search for symbols by keywords, in SYMBOL_SEARCH "bestMatches" shape"""
+
+    @abstractmethod
+    def get_daily_prices(self, symbol: str, compact: bool = True) -> Optional[Dict[str, Any]]:
+        """Get the daily time series for a symbol, in TIME_SERIES_DAILY shape"""
+
+    # Async variants; providers without a native async client run the sync call in a thread
+
+    async def aget_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_quote, symbol)
+
+    async def aget_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        results = await asyncio.gather(*(self.aget_quote(symbol) for symbol in symbols))
+        return {symbol: quote for symbol, quote in zip(symbols, results) if quote}
+
+    async def asearch_symbol(self, keywords: str) -> List[Dict[str, str]]:
+        return await asyncio.to_thread(self.search_symbol, keywords)
+
+    async def aget_daily_prices(self, symbol: str, compact: bool = True) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_daily_prices, symbol, compact)
+
+    def request_count(self, symbol_count: int) -> int:
+        """Get the number of upstream requests needed to quote this many symbols"""
+        if not self.max_batch_size:
+            return 1 if symbol_count else 0
+        return math.ceil(symbol_count / self.max_batch_size)
+
+class AlphaVantageProvider(MarketDataProvider):
+    """Market data from the Alpha Vantage REST API, over pooled keep-alive connections"""
+    def __init__(self):
+        self.api_key = settings.STOCK_API_KEY
+        self.base_url = settings.ALPHA_VANTAGE_BASE_URL
+        self.bulk_quotes = settings.ALPHA_VANTAGE_BULK_QUOTES
+        # REALTIME_BULK_QUOTES accepts up to 100 symbols per request
+        self.max_batch_size = 100 if self.bulk_quotes else 1
+        self.client = create_client()
+        self._async_client: Optional[httpx.AsyncClient] = None
+        # Requests beyond the connection limit wait here rather than in the client's
+        # pool, whose bookkeeping gets slow with thousands of queued requests
+        self._async_slots = asyncio.Semaphore(settings.STOCK_API_MAX_CONNECTIONS)
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        # Created lazily so it is bound to the running event loop
+        if self._async_client is None:
+            self._async_client = create_async_client()
+        return self._async_client
+
+    def _query(self, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        response = get_with_retries(self.client, self.base_url, {**params, "apikey": self.api_key})
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    async def _aquery(self, params: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        async with self._async_slots:
+            response = await aget_with_retries(self.async_client, self.base_url, {**params, "apikey": self.api_key})
+        if response.status_code != 200:
+            return None
+        return response.json()
+
+    def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest price and volume information for a security of your choice.
+        """
+        return self._parse_quote(self._query({"function": "GLOBAL_QUOTE", "symbol": symbol}))
+
+    async def aget_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        return self._parse_quote(await self._aquery({"function": "GLOBAL_QUOTE", "symbol": symbol}))
+
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get quotes for several symbols, with one REALTIME_BULK_QUOTES request when enabled.
+        """
+        if not self.bulk_quotes or len(symbols) == 1:
+            return super().get_quotes(symbols)
+        data = self._query({"function": "REALTIME_BULK_QUOTES", "symbol": ",".join(symbols)})
+        return self._parse_bulk_quotes(data, symbols)
+
+    async def aget_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not self.bulk_quotes or len(symbols) == 1:
+            return await super().aget_quotes(symbols)
+        data = await self._aquery({"function": "REALTIME_BULK_QUOTES", "symbol": ",".join(symbols)})
+        return self._parse_bulk_quotes(data, symbols)
+
+    def search_symbol(self, keywords: str) -> List[Dict[str, str]]:
+        """
+        Search for stocks by keywords/company name.
+        """
+        return self._parse_matches(self._query({"function": "SYMBOL_SEARCH", "keywords": keywords}))
+
+    async def asearch_symbol(self, keywords: str) -> List[Dict[str, str]]:
+        return self._parse_matches(await self._aquery({"function": "SYMBOL_SEARCH", "keywords": keywords}))
+
+    def get_daily_prices(self, symbol: str, compact: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get daily time series of the stock.
+        """
+        return self._query(self._daily_params(symbol, compact))
+
+    async def aget_daily_prices(self, symbol: str, compact: bool = True) -> Optional[Dict[str, Any]]:
+        return await self._aquery(self._daily_params(symbol, compact))
+
+    @staticmethod
+    def _daily_params(symbol: str, compact: bool) -> Dict[str, str]:
+        return {
+            "function": "TIME_SERIES_DAILY",
+            "symbol": symbol,
+            "outputsize": "compact" if compact else "full",
+        }
+
+    @staticmethod
+    def _parse_quote(data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not data or "Global Quote" not in data or not data["Global Quote"]:
+            return None
+        return data["Global Quote"]
+
+    @staticmethod
+    def _parse_matches(data: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+        if not data or "bestMatches" not in data:
+            return []
+        return data["bestMatches"]
+
+    @classmethod
+    def _parse_bulk_quotes(cls, data: Optional[Dict[str, Any]], symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not data:
+            return {}
+        return {
+            item["symbol"]: cls._bulk_to_global_quote(item)
+            for item in data.get("data", [])
+            if item.get("symbol") in symbols
+        }
+
+    @staticmethod
+    def _bulk_to_global_quote(item: Dict[str, str]) -> Dict[str, str]:
+        return {
+            "01. symbol": item.get("symbol"),
+            "02. open": item.get("open"),
+            "03. high": item.get("high"),
+            "04. low": item.get("low"),
+            "05. price": item.get("close"),
+            "06. volume": item.get("volume"),
+            "07. latest trading day": (item.get("timestamp") or "")[:10],
+            "08. previous close": item.get("previous_close"),
+            "09. change": item.get("change"),
+            "10. change percent": f"{item.get('change_percent')}%",
+        }
+
+class LocalReplayProvider(MarketDataProvider):
+    """
+    Offline market data for load testing.
+
+    With a data file (CSV with symbol,price[,volume] columns, or JSON lines with the
+    same keys), each quote request replays the next recorded price of the symbol,
+    looping at the end. Without one, prices follow a seeded random walk per symbol.
+    """
+    max_batch_size = None
+    rate_limited = False
+
+    def __init__(self, data_file: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._series: Dict[str, List[Tuple[float, int]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._walks: Dict[str, Iterator[float]] = {}
+        self._previous: Dict[str, float] = {}
+        if data_file:
+            self._load(data_file)
+
+    def _load(self, data_file: str):
+        with open(data_file) as f:
+            if data_file.endswith((".jsonl", ".json")):
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                rows = list(csv.DictReader(f))
+        for row in rows:
+            self._series.setdefault(row["symbol"].upper(), []).append(
+                (float(row["price"]), int(float(row.get("volume") or 0)))
+            )
+
+    @staticmethod
+    def _random_walk(symbol: str) -> Iterator[float]:
+        rng = random.Random(zlib.crc32(symbol.encode()))
+        price = rng.uniform(10, 500)
+        while True:
+            yield round(price, 2)
+            price = max(price * math.exp(rng.gauss(0, 0.002)), 0.01)
+
+    def _next_tick(self, symbol: str) -> Tuple[float, int]:
+        series = self._series.get(symbol.upper())
+        if series:
+            cursor = self._cursors.get(symbol, 0)
+            self._cursors[symbol] = (cursor + 1) % len(series)
+            return series[cursor]
+        if symbol not in self._walks:
+            self._walks[symbol] = self._random_walk(symbol)
+        return next(self._walks[symbol]), 0
+
+    def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            price, volume = self._next_tick(symbol)
+            previous = self._previous.get(symbol, price)
+            self._previous[symbol] = price
+        change = price - previous
+        return {
+            "01. symbol": symbol,
+            "02. open": f"{previous:.4f}",
+            "03. high": f"{max(price, previous):.4f}",
+            "04. low": f"{min(price, previous):.4f}",
+            "05. price": f"{price:.4f}",
+            "06. volume": str(volume),
+            "07. latest trading day": date.today().isoformat(),
+            "08. previous close": f"{previous:.4f}",
+            "09. change": f"{change:.4f}",
+            "10. change percent": f"{(change / previous * 100) if previous else 0:.4f}%",
+        }
+
+    def search_symbol(self, keywords: str) -> List[Dict[str, str]]:
+        keywords = keywords.upper()
+        return [
+            {"1. symbol": symbol, "2. name": symbol, "3. type": "Equity", "9. matchScore": "1.0000"}
+            for symbol in sorted(self._series)
+            if symbol.startswith(keywords)
+        ]
+
+    def get_daily_prices(self, symbol: str, compact: bool = True) -> Optional[Dict[str, Any]]:
+        days = 100 if compact else 1000
+        walk = self._random_walk(symbol)
+        series = {}
+        for offset in range(days, 0, -1):
+            close = next(walk)
+            series[(date.today() - timedelta(days=offset)).isoformat()] = {
+                "1. open": f"{close:.4f}",
+                "2. high": f"{close:.4f}",
+                "3. low": f"{close:.4f}",
+                "4. close": f"{close:.4f}",
+                "5. volume": "0",
+            }
+        return {
+            "Meta Data": {"2. Symbol": symbol, "3. Last Refreshed": date.today().isoformat()},
+            "Time Series (Daily)": dict(reversed(list(series.items()))),
+        }
+
+def create_provider() -> MarketDataProvider:
+    """Create the market data provider selected by MARKET_DATA_PROVIDER"""
+    if settings.MARKET_DATA_PROVIDER == "replay":
+        return LocalReplayProvider(settings.REPLAY_DATA_FILE or None)
+    return AlphaVantageProvider()
@@ -0,0 +1,223 @@
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.notification import Notification
+from app.models.user import User
+from app.services.unread_counter import unread_counter
+
+class SmtpSender:
+    """
+    One worker's SMTP connection, opened and authenticated once and reused for
+    every message until the server drops it.
+    """
+    def __init__(self):
+        self.connection: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        if settings.SMTP_PORT == 465:
+            connection = smtplib.SMTP_SSL(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        else:
+            connection = smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SECONDS)
+            connection.ehlo()
+            if connection.has_extn("starttls"):
+                connection.starttls()
+                connection.ehlo()
+        if settings.SMTP_USERNAME:
+            connection.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD)
+        return connection
+
+    def send(self, message: EmailMessage):
+        if self.connection is None:
+            self.connection = self._connect()
+        try:
+            self.connection.send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Dropped while idle; the retry reconnects
+            self.close()
+            raise
+
+    def close(self):
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+class NotificationDispatcher:
+    """
+    Delivers triggered-alert notifications off the alert evaluation path.
+
+    `submit` only puts a notification on a bounded queue, dropping it if the queue
+    is full, so slow delivery never holds up the Kafka consumer. Worker threads
+    drain the queue in batches: each batch is stored as dashboard notifications
+    with one bulk INSERT, then emailed as one message per recipient over the
+    worker's own SMTP connection. Database writes and sends are retried with
+    exponential backoff; every notification carries a delivery id, so a retried
+    INSERT skips the rows an earlier attempt already committed.
+
+    SMS isn't supported: users have no phone number. Alerts can't be created with
+    it any more, and the SMS part of older "sms" or "both" alerts is reported as
+    failed, leaving the dashboard notification (and email for "both").
+    """
+    def __init__(self):
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=settings.NOTIFICATION_QUEUE_SIZE)
+        self.running = False
+        self.threads: List[threading.Thread] = []
+        self.dropped = 0
+        self.failed_sms = 0
+
+    def submit(self, notification: Dict[str, Any]) -> bool:
+        """Queue a notification for delivery, returning False if it had to be dropped"""
+        notification.setdefault("delivery_id", uuid.uuid4().hex)
+        try:
+            self.queue.put_nowait(notification)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            print(f"Notification queue full, dropped notification for alert {notification.get('alert_id')}")
+            return False
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for a notification, then take more until the batch is full or the linger time has passed"""
+        try:
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + settings.NOTIFICATION_LINGER_MS / 1000
+        while len(batch) < settings.NOTIFICATION_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _with_retries(description: str, action: Callable[[], Any]) -> bool:
+        for attempt in range(settings.NOTIFICATION_MAX_RETRIES + 1):
+            try:
+                action()
+                return True
+            except Exception as e:
+                if attempt == settings.NOTIFICATION_MAX_RETRIES:
+                    print(f"Giving up on {description}: {str(e)}")
+                    return False
+                time.sleep(settings.NOTIFICATION_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+    def _store(self, batch: List[Dict[str, Any]]):
+        rows = [
+            {
+                "user_id": notification["user_id"],
+                "alert_id": notification["alert_id"],
+                "symbol": notification["symbol"],
+                "alert_type": notification["alert_type"],
+                "price": notification["price"],
+                "message": notification["message"],
+                "delivery_id": notification["delivery_id"],
+            }
+            for notification in batch
+        ]
+        with SessionLocal() as db:
+            dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+            # Only rows not stored by an earlier attempt come back, so they're counted once
+            inserted = db.scalars(
+                dialect_insert(Notification).on_conflict_do_nothing(index_elements=["delivery_id"])
+                .returning(Notification.user_id),
+                rows
+            ).all()
+            db.commit()
+        counts: Dict[int, int] = {}
+        for user_id in inserted:
+            counts[user_id] = counts.get(user_id, 0) + 1
+        unread_counter.add(counts)
+
+    def _email(self, sender: SmtpSender, batch: List[Dict[str, Any]]):
+        by_user: Dict[int, List[Dict[str, Any]]] = {}
+        for notification in batch:
+            if notification["notification_method"] in ("email", "both"):
+                by_user.setdefault(notification["user_id"], []).append(notification)
+        if not by_user:
+            return
+
+        # One query for every recipient in the batch
+        emails: Dict[int, str] = {}
+        self._with_retries("looking up notification recipients", lambda: emails.update(
+            self._recipients(list(by_user))
+        ))
+        for user_id, notifications in by_user.items():
+            email = emails.get(user_id)
+            if email is None:
+                continue
+            body = "\n".join(notification["message"] for notification in notifications)
+            if not settings.SMTP_SERVER:
+                print(f"Sending email to {email}: {body}")
+                continue
+            message = EmailMessage()
+            message["From"] = settings.SMTP_FROM
+            message["To"] = email
+            message["Subject"] = (
+                notifications[0]["message"].split(":")[0] if len(notifications) == 1
+                else f"{len(notifications)} Stock Pulse alerts triggered"
+            )
+            message.set_content(body)
+            self._with_retries(f"emailing {email}", lambda: sender.send(message))
+
+    @staticmethod
+    def _recipients(user_ids: List[int]) -> Dict[int, str]:
+        with SessionLocal() as db:
+            return dict(db.execute(select(User.id, User.email).where(User.id.in_(user_ids))).all())
+
+    def _deliver(self, sender: SmtpSender, batch: List[Dict[str, Any]]):
+        # Dashboard notifications first, so a slow mail server doesn't delay them
+        self._with_retries(f"storing {len(batch)} notifications", lambda: self._store(batch))
+        self._email(sender, batch)
+        sms = [notification for notification in batch if notification["notification_method"] in ("sms", "both")]
+        if sms:
+            self.failed_sms += len(sms)
+            print(f"SMS delivery is not supported, failed {len(sms)} SMS notifications for alerts {sorted({n['alert_id'] for n in sms})}")
+
+    def _work(self):
+        sender = SmtpSender()
+        try:
+            while self.running or not self.queue.empty():
+                batch = self._next_batch()
+                if batch:
+                    try:
+                        self._deliver(sender, batch)
+                    except Exception as e:
+                        print(f"Error dispatching notifications: {str(e)}")
+        finally:
+            sender.close()
+
+    def start(self):
+        """Start the dispatch workers"""
+        if not self.running:
+            self.running = True
+            self.threads = [
+                threading.Thread(target=self._work, name=f"notification-worker-{i}", daemon=True)
+                for i in range(settings.NOTIFICATION_WORKERS)
+            ]
+            for thread in self.threads:
+                thread.start()
+            print("Notification dispatcher started")
+
+    def stop(self):
+        """Stop the dispatch workers, giving them up to 10 seconds to deliver what is still queued"""
+        if self.running:
+            self.running = False
+            for thread in self.threads:
+                thread.join(timeout=10)
+            self.threads = []
+            print("Notification dispatcher stopped")
+
+# Create a singleton instance
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,322 @@
+import asyncio
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.stock_service import stock_service
+
+# Column name -> on-disk dtype. Dates are stored as days since the Unix epoch.
+COLUMNS = {
+    "date": np.dtype("<i4"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<i8"),
+}
+
+# Symbols are used as directory names, so nothing that could leave the store root
+_SYMBOL_PATTERN = re.compile(r"^[A-Z0-9.\-]{1,15}$")
+
+# TIME_SERIES_DAILY field for each price column
+_SOURCE_FIELDS = {
+    "open": "1. open",
+    "high": "2. high",
+    "low": "3. low",
+    "close": "4. close",
+    "volume": "5. volume",
+}
+
+class InvalidSymbolError(ValueError):
+    """Raised for a symbol that can't be stored"""
+
+class _MappedColumns:
+    """A symbol's memory-mapped columns, unmapped once evicted and no longer read"""
+    __slots__ = ("rows", "columns", "readers", "evicted")
+
+    def __init__(self, rows: int, columns: Dict[str, np.memmap]):
+        self.rows = rows
+        self.columns = columns
+        self.readers = 0
+        self.evicted = False
+
+    def close(self):
+        for values in self.columns.values():
+            values._mmap.close()
+
+class PriceHistoryStore:
+    """
+    On-disk columnar store of daily prices.
+
+    Each symbol has one append-only binary file per column plus a small meta.json
+    recording how many rows are committed. Columns are memory-mapped for reads, so
+    a history request only maps the files and slices them. A symbol is backfilled
+    once with a "full" fetch, then topped up with "compact" fetches at most once a
+    day; a compact fetch that no longer reaches back to the stored history, after
+    the symbol went unrefreshed for months, is replaced by a full one. Failed
+    fetches are retried with exponential backoff.
+    """
+    def __init__(self, root: str = settings.PRICE_HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        # symbol -> mapped columns, least recently used first
+        self._maps: "OrderedDict[str, _MappedColumns]" = OrderedDict()
+        # Held only while a refresh is running or waiting, so entries go away with them
+        self._refreshing: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # symbol -> (consecutive failed fetches, monotonic time of the next attempt)
+        self._failures: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    @staticmethod
+    def normalize(symbol: str) -> str:
+        """Upper-case a symbol, raising InvalidSymbolError if it can't be stored"""
+        symbol = symbol.upper()
+        if not _SYMBOL_PATTERN.match(symbol) or not symbol.strip("."):
+            raise InvalidSymbolError(f"Invalid symbol {symbol!r}")
+        return symbol
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root, self.normalize(symbol))
+
+    def _read_meta(self, symbol: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self._symbol_dir(symbol), "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"rows": 0, "last_refreshed": None}
+
+    def _write_meta(self, symbol: str, meta: Dict[str, Any]):
+        path = os.path.join(self._symbol_dir(symbol), "meta.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    @contextmanager
+    def _file_lock(self, symbol: str):
+        """Serialize appends to a symbol across threads and worker processes"""
+        os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+        with open(os.path.join(self._symbol_dir(symbol), ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def needs_refresh(self, symbol: str) -> bool:
+        """Whether the symbol hasn't been refreshed from upstream today and isn't backing off a failure"""
+        symbol = self.normalize(symbol)
+        with self._lock:
+            failure = self._failures.get(symbol)
+        if failure is not None and time.monotonic() < failure[1]:
+            return False
+        return self._read_meta(symbol)["last_refreshed"] != self._today().isoformat()
+
+    def is_backfilled(self, symbol: str) -> bool:
+        return self._read_meta(symbol)["rows"] > 0
+
+    def _last_date(self, symbol: str) -> Optional[str]:
+        """The ISO date of the newest stored row, if any"""
+        rows = self._read_meta(symbol)["rows"]
+        if not rows:
+            return None
+        with self._open_columns(symbol, rows) as columns:
+            day = int(columns["date"][-1])
+        return date.fromordinal(day + date(1970, 1, 1).toordinal()).isoformat()
+
+    @staticmethod
+    def _leaves_gap(payload: Optional[Dict[str, Any]], last_date: Optional[str]) -> bool:
+        """Whether a compact payload starts after the stored history ends, leaving days missing"""
+        series = (payload or {}).get("Time Series (Daily)")
+        return bool(series) and last_date is not None and min(series) > last_date
+
+    def _record_fetch(self, symbol: str, appended: Optional[int]):
+        """Clear a symbol's backoff after a successful fetch, or extend it after a failed one"""
+        with self._lock:
+            if appended is not None:
+                self._failures.pop(symbol, None)
+                return
+            failures = self._failures.pop(symbol, (0, 0.0))[0] + 1
+            delay = min(settings.PRICE_HISTORY_RETRY_SECONDS * 2 ** (failures - 1), settings.PRICE_HISTORY_RETRY_MAX_SECONDS)
+            self._failures[symbol] = (failures, time.monotonic() + delay)
+            while len(self._failures) > settings.PRICE_HISTORY_MAX_FAILURES:
+                self._failures.popitem(last=False)
+        print(f"Fetching daily prices for {symbol} failed {failures} times, retrying in {delay:.0f}s")
+
+    @staticmethod
+    def _today() -> date:
+        return datetime.now(timezone.utc).date()
+
+    @staticmethod
+    def _parse(payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, np.ndarray]]:
+        """Convert a TIME_SERIES_DAILY payload into ascending column arrays"""
+        series = (payload or {}).get("Time Series (Daily)")
+        if series is None:
+            return None
+        days = sorted(series)
+        columns = {
+            "date": np.array(
+                [date.fromisoformat(day).toordinal() - date(1970, 1, 1).toordinal() for day in days],
+                dtype=COLUMNS["date"]
+            )
+        }
+        for column, field in _SOURCE_FIELDS.items():
+            columns[column] = np.array(
+                [float(series[day][field]) for day in days]
+            ).astype(COLUMNS[column])
+        return columns
+
+    def append(self, symbol: str, payload: Optional[Dict[str, Any]]) -> Optional[int]:
+        """
+        Append the rows of a TIME_SERIES_DAILY payload newer than the stored history.
+
+        Returns the number of rows appended, or None if the payload holds no prices.
+        The refresh date is recorded even when nothing is new, so the symbol isn't
+        fetched again today.
+        """
+        columns = self._parse(payload)
+        if columns is None:
+            return None
+
+        with self._file_lock(symbol):
+            meta = self._read_meta(symbol)
+            rows = meta["rows"]
+            if rows:
+                with self._open_columns(symbol, rows) as stored:
+                    last_date = stored["date"][-1]
+                new = columns["date"] > last_date
+                columns = {column: values[new] for column, values in columns.items()}
+
+            appended = len(columns["date"])
+            for column, dtype in COLUMNS.items():
+                path = os.path.join(self._symbol_dir(symbol), f"{column}.bin")
+                with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                    # Drop any partial write past the committed rows before appending
+                    f.truncate(rows * dtype.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    columns[column].tofile(f)
+
+            # Rows only become visible to readers once meta.json is replaced
+            meta["rows"] = rows + appended
+            meta["last_refreshed"] = self._today().isoformat()
+            self._write_meta(symbol, meta)
+        return appended
+
+    def refresh(self, symbol: str) -> int:
+        """Fetch and append new daily prices if the symbol hasn't been refreshed today"""
+        symbol = self.normalize(symbol)
+        if not self.needs_refresh(symbol):
+            return 0
+        appended = None
+        try:
+            last_date = self._last_date(symbol)
+            payload = stock_service.get_daily_prices(symbol, compact=last_date is not None)
+            if self._leaves_gap(payload, last_date):
+                payload = stock_service.get_daily_prices(symbol, compact=False)
+            appended = self.append(symbol, payload)
+        except Exception as e:
+            print(f"Error refreshing daily prices for {symbol}: {str(e)}")
+        self._record_fetch(symbol, appended)
+        return appended or 0
+
+    async def arefresh(self, symbol: str) -> int:
+        """Async version of refresh; concurrent refreshes of a symbol share one upstream call"""
+        symbol = self.normalize(symbol)
+        lock = self._refreshing.get(symbol)
+        if lock is None:
+            lock = self._refreshing[symbol] = asyncio.Lock()
+        async with lock:
+            if not self.needs_refresh(symbol):
+                return 0
+            appended = None
+            try:
+                last_date = self._last_date(symbol)
+                payload = await stock_service.aget_daily_prices(symbol, compact=last_date is not None)
+                if self._leaves_gap(payload, last_date):
+                    payload = await stock_service.aget_daily_prices(symbol, compact=False)
+                appended = await asyncio.to_thread(self.append, symbol, payload)
+            except Exception as e:
+                print(f"Error refreshing daily prices for {symbol}: {str(e)}")
+            self._record_fetch(symbol, appended)
+            return appended or 0
+
+    @contextmanager
+    def _open_columns(self, symbol: str, rows: int):
+        """
+        Map a symbol's columns for the duration of a read. Mappings are kept for
+        the PRICE_HISTORY_MAX_OPEN_SYMBOLS most recently read symbols; those
+        evicted, or replaced after an append, are unmapped as soon as no read is
+        using them.
+        """
+        symbol = symbol.upper()
+        with self._lock:
+            mapped = self._maps.get(symbol)
+            if mapped is not None and mapped.rows == rows:
+                self._maps.move_to_end(symbol)
+                mapped.readers += 1
+            else:
+                mapped = None
+
+        if mapped is None:
+            mapped = _MappedColumns(rows, {
+                column: np.memmap(
+                    os.path.join(self._symbol_dir(symbol), f"{column}.bin"),
+                    dtype=dtype, mode="r", shape=(rows,)
+                )
+                for column, dtype in COLUMNS.items()
+            })
+            mapped.readers = 1
+            with self._lock:
+                evicted = []
+                replaced = self._maps.pop(symbol, None)
+                if replaced is not None:
+                    evicted.append(replaced)
+                self._maps[symbol] = mapped
+                while len(self._maps) > settings.PRICE_HISTORY_MAX_OPEN_SYMBOLS:
+                    evicted.append(self._maps.popitem(last=False)[1])
+                for entry in evicted:
+                    entry.evicted = True
+                idle = [entry for entry in evicted if not entry.readers]
+            for entry in idle:
+                entry.close()
+
+        try:
+            yield mapped.columns
+        finally:
+            with self._lock:
+                mapped.readers -= 1
+                idle = mapped.evicted and not mapped.readers
+            if idle:
+                mapped.close()
+
+    def get_range(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Get stored daily prices between two dates (inclusive) as a columnar dict"""
+        symbol = self.normalize(symbol)
+        rows = self._read_meta(symbol)["rows"]
+        if not rows:
+            return None
+
+        # Everything returned is copied out before the columns can be unmapped
+        with self._open_columns(symbol, rows) as columns:
+            dates = columns["date"]
+            epoch = date(1970, 1, 1).toordinal()
+            lo = np.searchsorted(dates, start.toordinal() - epoch, side="left") if start else 0
+            hi = np.searchsorted(dates, end.toordinal() - epoch, side="right") if end else rows
+
+            result: Dict[str, Any] = {
+                "symbol": symbol.upper(),
+                "dates": dates[lo:hi].astype("datetime64[D]").astype(str).tolist(),
+            }
+            for column in _SOURCE_FIELDS:
+                result[column] = columns[column][lo:hi].tolist()
+        return result
+
+# Create a singleton instance
+price_history = PriceHistoryStore()
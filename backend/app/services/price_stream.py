@@ -1,58 +1,166 @@
 import json
 import time
 import threading
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, List
 from kafka import KafkaProducer
 from app.core.config import settings
+from app.services.kafka_topics import PRICE_TOPIC, ensure_topic
+from app.services.last_prices import last_prices
+from app.services.leader_lease import LeaderLease
 from app.services.stock_service import stock_service
+from app.services.rate_limiter import RateLimiter
+from app.db.session import SessionLocal
+from app.services.tracked_symbols import tracked_symbols
 
 class PriceStreamProducer:
+    """
+    Fetches the prices of the tracked symbols and publishes them to Kafka.
+
+    Every worker runs a producer, but only the one holding the fetch lease calls
+    the upstream API, so the number of upstream requests per symbol doesn't
+    depend on how many workers there are. The others stand by to take over.
+    Whoever takes the lease first rebuilds the tracked symbols from the database,
+    so workers starting together don't race to rewrite them.
+    """
     def __init__(self):
         self.producer = KafkaProducer(
             bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+            key_serializer=lambda k: k.encode('utf-8'),
             value_serializer=lambda v: json.dumps(v).encode('utf-8')
         )
-        self.topic = "stock-price-updates"
+        self.topic = PRICE_TOPIC
         self.running = False
         self.thread = None
-        self.symbols_to_track = set()
+        self.executor = None
+        self.tracked = tracked_symbols
+        self.lease = LeaderLease(tracked_symbols.redis_client, "price-stream:leader", settings.PRICE_STREAM_LEASE_SECONDS)
+        self.rate_limiter = RateLimiter(
+            settings.STOCK_API_REQUESTS_PER_MINUTE,
+            settings.STOCK_API_REQUESTS_PER_DAY
+        )
+        self._stop_event = threading.Event()
+        # Held while the loop submits fetches, so none can be submitted once stop has begun
+        self._submit_lock = threading.Lock()
+    
+    def add_symbol(self, symbol: str, user_id: int):
+        """Track a symbol explicitly for a user, on top of the holdings, alerts and streams that reference it"""
+        self.tracked.track(symbol, user_id)
+    
+    def remove_symbol(self, symbol: str, user_id: int):
+        """Drop a user's explicit track; the symbol stays tracked while anything else references it"""
+        self.tracked.untrack(symbol, user_id)
+    
+    def target_refresh_interval(self, symbol_count: int) -> float:
+        """Get the shortest refresh cycle the API quota allows for this many symbols"""
+        provider = stock_service.provider
+        if not provider.rate_limited:
+            return settings.PRICE_MIN_REFRESH_SECONDS
+        return max(
+            settings.PRICE_MIN_REFRESH_SECONDS,
+            self.rate_limiter.min_interval(provider.request_count(symbol_count))
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the fetch leader, the target refresh interval and the measured interval per symbol"""
+        symbols = {
+            symbol: {"last_published": last_published, "refresh_interval": refresh_interval}
+            for symbol, (last_published, refresh_interval) in self.tracked.stats().items()
+        }
+        return {
+            "leader": self.lease.leader(),
+            "is_leader": self.lease.is_leader,
+            "target_refresh_interval": self.target_refresh_interval(len(symbols)),
+            "symbols": symbols,
+        }
     
-    def add_symbol(self, symbol: str):
-        """Add a symbol to track"""
-        self.symbols_to_track.add(symbol)
+    def _fetch_and_publish(self, symbols: List[str]):
+        """Fetch the prices of a batch of symbols and publish them to Kafka as soon as they arrive"""
+        if stock_service.provider.rate_limited and not self.rate_limiter.acquire(stop_event=self._stop_event):
+            return
+        # Leadership may have moved on while waiting for the quota
+        if not self.lease.is_leader:
+            return
+        
+        published: Dict[str, float] = {}
+        prices: Dict[str, tuple] = {}
+        try:
+            quotes = stock_service.get_quotes(symbols)
+            for symbol, quote in quotes.items():
+                # Extract relevant data
+                price_data = {
+                    "symbol": symbol,
+                    "price": float(quote.get("05. price", 0)),
+                    "timestamp": int(time.time())
+                }
+                # Keyed by symbol, so each symbol's ticks stay in order on one partition
+                # and are evaluated by the alert consumer that owns it
+                self.producer.send(self.topic, key=symbol, value=price_data)
+                published[symbol] = time.time()
+                prices[symbol.upper()] = (price_data["price"], float(quote.get("09. change") or 0), published[symbol])
+                print(f"Published price update for {symbol}: {price_data['price']}")
+        except Exception as e:
+            print(f"Error fetching prices for {', '.join(symbols)}: {str(e)}")
+        if published:
+            last_prices.set_many(prices)
+            self.tracked.record_published(published)
     
-    def remove_symbol(self, symbol: str):
-        """Remove a symbol from tracking"""
-        if symbol in self.symbols_to_track:
-            self.symbols_to_track.remove(symbol)
+    def _rebuild_tracked(self) -> bool:
+        """Track what the alerts in the database need, whatever was tracked before"""
+        try:
+            with SessionLocal() as db:
+                self.tracked.rebuild(db)
+            return True
+        except Exception as e:
+            print(f"Error rebuilding tracked symbols: {str(e)}")
+            return False
     
     def _fetch_and_publish_prices(self):
-        """Fetch prices for tracked symbols and publish to Kafka"""
+        """Fetch prices for tracked symbols concurrently and publish to Kafka"""
+        rebuilt = False
         while self.running:
-            for symbol in list(self.symbols_to_track):
-                try:
-                    quote = stock_service.get_quote(symbol)
-                    if quote:
-                        # Extract relevant data
-                        price_data = {
-                            "symbol": symbol,
-                            "price": float(quote.get("05. price", 0)),
-                            "timestamp": int(time.time())
-                        }
-                        # Publish to Kafka
-                        self.producer.send(self.topic, price_data)
-                        print(f"Published price update for {symbol}: {price_data['price']}")
-                except Exception as e:
-                    print(f"Error fetching price for {symbol}: {str(e)}")
+            if not self.lease.is_leader:
+                # Standing by; the lease thread takes over if the leader goes away
+                rebuilt = False
+                self._stop_event.wait(1)
+                continue
+            if not rebuilt:
+                # Once per leadership, retried each cycle until it succeeds
+                rebuilt = self._rebuild_tracked()
+            cycle_start = time.monotonic()
+            symbols = self.tracked.members()
+            last_prices.retain(symbol.upper() for symbol in symbols)
+            
+            # One upstream request per batch; workers wait on the rate limiter,
+            # so the pool never exceeds the API quota
+            batch_size = stock_service.provider.max_batch_size or max(len(symbols), 1)
+            with self._submit_lock:
+                if not self.running:
+                    break
+                futures = [
+                    self.executor.submit(self._fetch_and_publish, symbols[i:i + batch_size])
+                    for i in range(0, len(symbols), batch_size)
+                ]
+            wait(futures)
             
-            # Sleep to avoid hitting API rate limits
-            # Alpha Vantage free tier allows 5 requests per minute
-            time.sleep(15)  # Adjust based on number of symbols and API limits
+            # Don't start the next cycle sooner than the quota allows
+            elapsed = time.monotonic() - cycle_start
+            self._stop_event.wait(max(self.target_refresh_interval(len(symbols)) - elapsed, 0))
     
     def start(self):
         """Start the price stream producer"""
         if not self.running:
+            try:
+                ensure_topic(self.topic, settings.PRICE_TOPIC_PARTITIONS)
+            except Exception as e:
+                print(f"Error creating topic {self.topic}: {str(e)}")
             self.running = True
+            self._stop_event.clear()
+            self.lease.start()
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.PRICE_FETCH_WORKERS,
+                thread_name_prefix="price-fetch"
+            )
             self.thread = threading.Thread(target=self._fetch_and_publish_prices)
             self.thread.daemon = True
             self.thread.start()
@@ -60,10 +168,19 @@ class PriceStreamProducer:
     
     def stop(self):
         """Stop the price stream producer"""
-        self.running = False
+        with self._submit_lock:
+            self.running = False
+        self._stop_event.set()
         if self.thread:
             self.thread.join(timeout=5)
+        # Nothing is submitted after running is cleared, even if the loop is still
+        # waiting on a fetch; those still queued are cancelled
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.thread:
+            self.lease.stop()
+            self.thread = None
             print("Price stream producer stopped")
 
 # Create a singleton instance
-price_stream_producer = PriceStreamProducer()
\ No newline at end of file
+price_stream_producer = PriceStreamProducer()
@@ -0,0 +1,176 @@
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.services.alert_registry import RegisteredAlert
+
+class WindowStats:
+    """Summary of the ticks in one window, ending at the latest tick"""
+    __slots__ = ("price", "change_percent", "moving_average", "return_zscore")
+
+    def __init__(self, price: float, change_percent: float, moving_average: float, return_zscore: Optional[float]):
+        self.price = price
+        self.change_percent = change_percent
+        self.moving_average = moving_average
+        self.return_zscore = return_zscore
+
+class PriceWindow:
+    """
+    Fixed-size ring buffer of one symbol's recent ticks.
+
+    Tick i lives in slot i % capacity. Alongside each price the buffer stores the
+    running totals of prices, tick-to-tick percent returns and squared returns up
+    to that tick, so the sums over any window are the difference of two entries.
+    Each window length keeps a pointer to its first tick that only moves forward,
+    which makes appending and window queries O(1) amortized whatever the length.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0
+        self._times = array("d", [0.0]) * capacity
+        self._prices = array("d", [0.0]) * capacity
+        self._price_sums = array("d", [0.0]) * capacity
+        self._return_sums = array("d", [0.0]) * capacity
+        self._return_square_sums = array("d", [0.0]) * capacity
+        # window length in seconds -> index of the first tick inside the window
+        self._starts: Dict[int, int] = {}
+
+    def append(self, timestamp: float, price: float) -> bool:
+        """Add a tick; ticks not newer than the latest one, e.g. redelivered ones, are ignored and return False"""
+        if self.count:
+            last = (self.count - 1) % self.capacity
+            if timestamp <= self._times[last]:
+                return False
+            previous_price = self._prices[last]
+            change = (price / previous_price - 1) * 100 if previous_price else 0.0
+            price_sum = self._price_sums[last] + price
+            return_sum = self._return_sums[last] + change
+            return_square_sum = self._return_square_sums[last] + change * change
+        else:
+            price_sum, return_sum, return_square_sum = price, 0.0, 0.0
+
+        slot = self.count % self.capacity
+        self._times[slot] = timestamp
+        self._prices[slot] = price
+        self._price_sums[slot] = price_sum
+        self._return_sums[slot] = return_sum
+        self._return_square_sums[slot] = return_square_sum
+        self.count += 1
+        return True
+
+    def stats(self, seconds: int) -> Optional[WindowStats]:
+        """
+        Summarize the last `seconds` of ticks.
+
+        Returns None until the buffer reaches back to the start of the window, i.e.
+        while it holds no tick at or before it.
+        """
+        if not self.count:
+            return None
+        last = self.count - 1
+        oldest = max(0, self.count - self.capacity)
+        cutoff = self._times[last % self.capacity] - seconds
+
+        # Advance to the first tick after the cutoff; the tick before it is the
+        # reference price the window's change is measured from
+        start = max(self._starts.get(seconds, oldest), oldest)
+        while start <= last and self._times[start % self.capacity] <= cutoff:
+            start += 1
+        self._starts[seconds] = start
+        reference = start - 1
+        if reference < oldest or start > last:
+            return None
+
+        ref_slot, last_slot = reference % self.capacity, last % self.capacity
+        price = self._prices[last_slot]
+        reference_price = self._prices[ref_slot]
+        ticks = last - reference
+        moving_average = (self._price_sums[last_slot] - self._price_sums[ref_slot]) / ticks
+        change_percent = (price / reference_price - 1) * 100 if reference_price else 0.0
+
+        # Spread of the returns before the latest one, which is scored against them
+        return_zscore = None
+        baseline = ticks - 1
+        if baseline >= 2:
+            before_slot = (last - 1) % self.capacity
+            total = self._return_sums[before_slot] - self._return_sums[ref_slot]
+            squares = self._return_square_sums[before_slot] - self._return_square_sums[ref_slot]
+            mean = total / baseline
+            variance = max(squares / baseline - mean * mean, 0.0)
+            if variance > 0:
+                latest = self._return_sums[last_slot] - self._return_sums[before_slot]
+                return_zscore = (latest - mean) / math.sqrt(variance)
+        return WindowStats(price, change_percent, moving_average, return_zscore)
+
+class PriceWindows:
+    """
+    Ring buffers of recent prices for the symbols that have window alerts, and
+    evaluation of those alerts as ticks arrive.
+
+    - window_change_percent: the price moved by more than threshold_value percent,
+      either way, over the last window_minutes
+    - ma_crossover: the price crossed its window_minutes moving average, by a
+      margin of threshold_value percent
+    - volatility_spike: the latest tick-to-tick return is more than threshold_value
+      standard deviations from the mean return over the last window_minutes
+    """
+    def __init__(self, capacity: int = settings.PRICE_WINDOW_CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._windows: Dict[str, PriceWindow] = {}
+
+    def update(self, symbol: str, timestamp: float, price: float, alerts: Iterable[RegisteredAlert]) -> List[RegisteredAlert]:
+        """Record a tick for a symbol and return its window alerts that trigger on it, none if it was ignored"""
+        alerts = list(alerts)
+        with self._lock:
+            if not alerts:
+                # Buffers are only kept while a symbol has window alerts
+                self._windows.pop(symbol, None)
+                return []
+            window = self._windows.get(symbol)
+            if window is None:
+                window = self._windows[symbol] = PriceWindow(self.capacity)
+            if not window.append(timestamp, price):
+                return []
+
+            stats: Dict[int, Optional[WindowStats]] = {}
+            triggered = []
+            for alert in alerts:
+                if not alert.window_minutes:
+                    continue
+                if alert.window_minutes not in stats:
+                    stats[alert.window_minutes] = window.stats(alert.window_minutes * 60)
+                if self._triggers(alert, stats[alert.window_minutes]):
+                    triggered.append(alert)
+            return triggered
+
+    def discard(self, symbols: Iterable[str]):
+        """Drop the buffers of symbols this instance no longer evaluates"""
+        with self._lock:
+            for symbol in symbols:
+                self._windows.pop(symbol, None)
+
+    @staticmethod
+    def _triggers(alert: RegisteredAlert, stats: Optional[WindowStats]) -> bool:
+        if stats is None:
+            return False
+        if alert.alert_type == "window_change_percent":
+            return abs(stats.change_percent) > alert.threshold_value
+        if alert.alert_type == "ma_crossover":
+            margin = stats.moving_average * alert.threshold_value / 100
+            if stats.price > stats.moving_average + margin:
+                side = 1
+            elif stats.price < stats.moving_average - margin:
+                side = -1
+            else:
+                return False
+            # The side of the average the price was on at the last evaluation
+            previous, alert.state = alert.state, side
+            return previous is not None and previous != side
+        if alert.alert_type == "volatility_spike":
+            return stats.return_zscore is not None and abs(stats.return_zscore) > alert.threshold_value
+        return False
+
+# Create a singleton instance
+price_windows = PriceWindows()
@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import redis
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user import User
+
+# Columns of User kept in the cache; enough to authorize a request
+_FIELDS = ("id", "email", "is_active", "token_version")
+
+class PrincipalCache:
+    """
+    Short-TTL cache of authenticated users, keyed by user id.
+
+    Entries are checked against the token version carried in the JWT: a token
+    older than the cached version has been revoked, and a cached entry older than
+    the token is reloaded. The in-process tier is optionally backed by Redis so
+    that a login on one process warms the others. Invalidation clears this
+    process and Redis; other processes may serve their local copy until it expires.
+    """
+    def __init__(self):
+        self.redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True
+        ) if settings.PRINCIPAL_CACHE_REDIS else None
+        self.ttl = settings.PRINCIPAL_CACHE_TTL_SECONDS
+        self.max_entries = settings.PRINCIPAL_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        # user id -> (monotonic expiry time, snapshot)
+        self._local: "OrderedDict[int, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"principal:{user_id}"
+
+    @staticmethod
+    def _snapshot(user: User) -> Dict[str, Any]:
+        return {field: getattr(user, field) for field in _FIELDS}
+
+    def _get_local(self, user_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._local.get(user_id)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.monotonic():
+                del self._local[user_id]
+                return None
+            return snapshot
+
+    def _set_local(self, snapshot: Dict[str, Any]):
+        with self._lock:
+            self._local[snapshot["id"]] = (time.monotonic() + self.ttl, snapshot)
+            self._local.move_to_end(snapshot["id"])
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _get_remote(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.redis_client is None:
+            return None
+        try:
+            value = self.redis_client.get(self._key(user_id))
+        except redis.RedisError as e:
+            print(f"Error reading principal cache: {str(e)}")
+            return None
+        if value is None:
+            return None
+        snapshot = json.loads(value)
+        self._set_local(snapshot)
+        return snapshot
+
+    def set(self, user: User):
+        """Cache a freshly loaded user in both tiers"""
+        snapshot = self._snapshot(user)
+        self._set_local(snapshot)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.setex(self._key(user.id), self.ttl, json.dumps(snapshot))
+            except redis.RedisError as e:
+                print(f"Error writing principal cache: {str(e)}")
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._local.pop(user_id, None)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.delete(self._key(user_id))
+            except redis.RedisError as e:
+                print(f"Error invalidating principal cache: {str(e)}")
+
+    def _load(self, user_id: int) -> Optional[Dict[str, Any]]:
+        # The only place an authenticated request touches the database, and only on a miss
+        with SessionLocal() as db:
+            user = db.get(User, user_id)
+            if user is None:
+                return None
+            self.set(user)
+            return self._snapshot(user)
+
+    def get(self, user_id: int, token_version: int) -> Optional[User]:
+        """
+        Get the user a token with this id and version belongs to.
+
+        Returns None if the user no longer exists or the token has been revoked.
+        The result is a transient User built from the cached columns, not attached
+        to any session.
+        """
+        snapshot = self._get_local(user_id) or self._get_remote(user_id)
+        if snapshot is None or snapshot["token_version"] < token_version:
+            snapshot = self._load(user_id)
+        if snapshot is None or snapshot["token_version"] != token_version:
+            return None
+        return User(**snapshot)
+
+# Create a singleton instance
+principal_cache = PrincipalCache()
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Callable, Awaitable
+import redis
+import redis.asyncio
+from app.core.config import settings
+
+Quote = Dict[str, Any]
+
+class _InflightFetch:
+    """An upstream fetch that concurrent callers for the same symbol wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[Quote] = None
+        self.error: Optional[Exception] = None
+
+class _AsyncInflightFetch:
+    """An upstream fetch task shared by the coroutines waiting for the same symbol"""
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+
+class QuoteCache:
+    """
+    Two-tier read-through cache for quotes.
+
+    The first tier is an in-process LRU with a TTL, the second is Redis shared by
+    all processes. Concurrent misses for the same symbol are coalesced so only one
+    upstream fetch is made while the others wait for its result. Symbols are
+    upper-cased at every entry point, so both tiers share one entry per symbol.
+    """
+    def __init__(self):
+        self.redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True
+        )
+        self._async_redis_client: Optional[redis.asyncio.Redis] = None
+        self.ttl = settings.QUOTE_CACHE_TTL_SECONDS
+        self.max_entries = settings.QUOTE_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        # symbol -> (monotonic expiry time, quote)
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, _InflightFetch] = {}
+        self._async_inflight: Dict[str, _AsyncInflightFetch] = {}
+
+    @property
+    def async_redis_client(self) -> redis.asyncio.Redis:
+        # Created lazily so its connections belong to the running event loop
+        if self._async_redis_client is None:
+            self._async_redis_client = redis.asyncio.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                decode_responses=True
+            )
+        return self._async_redis_client
+
+    @staticmethod
+    def _key(symbol: str) -> str:
+        return f"quote:{symbol}"
+
+    def _get_local(self, symbol: str) -> Optional[Quote]:
+        with self._lock:
+            entry = self._local.get(symbol)
+            if entry is None:
+                return None
+            expires_at, quote = entry
+            if expires_at <= time.monotonic():
+                del self._local[symbol]
+                return None
+            self._local.move_to_end(symbol)
+            return quote
+
+    def _set_local(self, symbol: str, quote: Quote, ttl: float):
+        with self._lock:
+            self._local[symbol] = (time.monotonic() + ttl, quote)
+            self._local.move_to_end(symbol)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def get(self, symbol: str) -> Optional[Quote]:
+        """Get a cached quote from the local tier, then Redis"""
+        return self.get_many([symbol]).get(symbol)
+
+    def _split_local(self, symbols: List[str]):
+        quotes = {}
+        misses = []
+        for symbol in symbols:
+            quote = self._get_local(symbol)
+            if quote is not None:
+                quotes[symbol] = quote
+            else:
+                misses.append(symbol)
+        return quotes, misses
+
+    def _queue_remote_reads(self, pipe, misses: List[str]):
+        for symbol in misses:
+            pipe.get(self._key(symbol))
+            pipe.pttl(self._key(symbol))
+
+    def _apply_remote_reads(self, quotes: Dict[str, Quote], misses: List[str], results: List[Any]):
+        for i, symbol in enumerate(misses):
+            value, ttl_ms = results[2 * i], results[2 * i + 1]
+            if value is None:
+                continue
+            quote = json.loads(value)
+            quotes[symbol] = quote
+            # Don't let the local copy outlive the shared one
+            self._set_local(symbol, quote, ttl_ms / 1000 if ttl_ms and ttl_ms > 0 else self.ttl)
+
+    def _queue_remote_writes(self, pipe, quotes: Dict[str, Quote]):
+        for symbol, quote in quotes.items():
+            self._set_local(symbol, quote, self.ttl)
+            pipe.setex(self._key(symbol), self.ttl, json.dumps(quote))
+
+    @staticmethod
+    def _by_requested(symbols: List[str], quotes: Dict[str, Quote]) -> Dict[str, Quote]:
+        # Key the results by the symbols as the caller spelled them
+        return {symbol: quotes[symbol.upper()] for symbol in symbols if symbol.upper() in quotes}
+
+    def get_many(self, symbols: List[str]) -> Dict[str, Quote]:
+        """Get the cached quotes for several symbols with at most one Redis round trip"""
+        quotes, misses = self._split_local(list({symbol.upper(): None for symbol in symbols}))
+        if misses:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                self._queue_remote_reads(pipe, misses)
+                self._apply_remote_reads(quotes, misses, pipe.execute())
+            except redis.RedisError as e:
+                print(f"Error reading quote cache: {str(e)}")
+        return self._by_requested(symbols, quotes)
+
+    async def aget_many(self, symbols: List[str]) -> Dict[str, Quote]:
+        """Async version of get_many"""
+        quotes, misses = self._split_local(list({symbol.upper(): None for symbol in symbols}))
+        if misses:
+            try:
+                pipe = self.async_redis_client.pipeline(transaction=False)
+                self._queue_remote_reads(pipe, misses)
+                self._apply_remote_reads(quotes, misses, await pipe.execute())
+            except redis.RedisError as e:
+                print(f"Error reading quote cache: {str(e)}")
+        return self._by_requested(symbols, quotes)
+
+    def set_many(self, quotes: Dict[str, Quote]):
+        """Store fresh quotes in both tiers"""
+        if not quotes:
+            return
+        quotes = {symbol.upper(): quote for symbol, quote in quotes.items()}
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            self._queue_remote_writes(pipe, quotes)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"Error writing quote cache: {str(e)}")
+
+    async def aset_many(self, quotes: Dict[str, Quote]):
+        """Async version of set_many"""
+        if not quotes:
+            return
+        quotes = {symbol.upper(): quote for symbol, quote in quotes.items()}
+        try:
+            pipe = self.async_redis_client.pipeline(transaction=False)
+            self._queue_remote_writes(pipe, quotes)
+            await pipe.execute()
+        except redis.RedisError as e:
+            print(f"Error writing quote cache: {str(e)}")
+
+    def get_or_fetch(self, symbol: str, fetch: Callable[[str], Optional[Quote]]) -> Optional[Quote]:
+        """Get a quote from the cache, fetching it once on a miss however many callers race for it"""
+        symbol = symbol.upper()
+        quote = self.get(symbol)
+        if quote is not None:
+            return quote
+
+        with self._lock:
+            inflight = self._inflight.get(symbol)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = self._inflight[symbol] = _InflightFetch()
+
+        if not is_leader:
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.result
+
+        try:
+            inflight.result = fetch(symbol)
+            if inflight.result:
+                self.set_many({symbol: inflight.result})
+            return inflight.result
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[symbol]
+            inflight.done.set()
+
+    async def aget_or_fetch(self, symbol: str, fetch: Callable[[str], Awaitable[Optional[Quote]]]) -> Optional[Quote]:
+        """
+        Async version of get_or_fetch, coalescing misses within the event loop.
+
+        The fetch runs as its own task that every caller waits on through a shield,
+        so a caller being cancelled doesn't cancel it for the others; it is only
+        cancelled once no caller is left waiting.
+        """
+        symbol = symbol.upper()
+        quote = (await self.aget_many([symbol])).get(symbol)
+        if quote is not None:
+            return quote
+
+        inflight = self._async_inflight.get(symbol)
+        if inflight is None:
+            inflight = self._async_inflight[symbol] = _AsyncInflightFetch()
+            inflight.task = asyncio.ensure_future(self._afetch(symbol, fetch, inflight))
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        finally:
+            inflight.waiters -= 1
+            if inflight.waiters == 0 and not inflight.task.done():
+                inflight.task.cancel()
+
+    async def _afetch(
+        self, symbol: str, fetch: Callable[[str], Awaitable[Optional[Quote]]], inflight: _AsyncInflightFetch
+    ) -> Optional[Quote]:
+        try:
+            quote = await fetch(symbol)
+            if quote:
+                await self.aset_many({symbol: quote})
+            return quote
+        finally:
+            # Removed as soon as it finishes, so a later miss starts a new fetch
+            if self._async_inflight.get(symbol) is inflight:
+                del self._async_inflight[symbol]
+
+# Create a singleton instance
+quote_cache = QuoteCache()
@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Optional
+
+class TokenBucket:
+    """Token bucket holding up to `capacity` tokens, refilled continuously"""
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def wait_time(self, now: float, tokens: float = 1) -> float:
+        """Get the number of seconds until `tokens` tokens are available"""
+        self._refill(now)
+        if self.tokens >= tokens:
+            return 0
+        return (tokens - self.tokens) / self.refill_per_second
+
+    def consume(self, tokens: float = 1):
+        self.tokens -= tokens
+
+class RateLimiter:
+    """
+    Upstream API rate limiter enforcing both a per-minute and a per-day quota.
+
+    A request is only admitted when both buckets have a token, so short bursts are
+    smoothed to the minute quota and sustained load never exceeds the daily one.
+    """
+    def __init__(self, requests_per_minute: int, requests_per_day: int):
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_day = requests_per_day
+        self._lock = threading.Lock()
+        self._buckets = [
+            TokenBucket(requests_per_minute, requests_per_minute / 60),
+            TokenBucket(requests_per_day, requests_per_day / 86400),
+        ]
+
+    def acquire(self, tokens: float = 1, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Block until `tokens` requests may be made.
+
+        Returns False if `stop_event` was set while waiting.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(bucket.wait_time(now, tokens) for bucket in self._buckets)
+                if wait <= 0:
+                    for bucket in self._buckets:
+                        bucket.consume(tokens)
+                    return True
+
+            if stop_event is None:
+                time.sleep(wait)
+            elif stop_event.wait(wait):
+                return False
+
+    def min_interval(self, requests: int) -> float:
+        """Get the shortest period in which `requests` requests can be repeated indefinitely"""
+        return max(
+            requests * 60 / self.requests_per_minute,
+            requests * 86400 / self.requests_per_day,
+        )
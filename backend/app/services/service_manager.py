@@ -1,16 +1,32 @@
 from app.services.price_stream import price_stream_producer
 from app.services.alert_service import alert_service
+from app.services.symbol_index import symbol_index
+from app.services.stream_hub import stream_hub
+from app.services.notification_dispatcher import notification_dispatcher
+from app.core.security import password_hasher
 
 class ServiceManager:
     def start_services(self):
         """Start all background services"""
         try:
+            # Spawn the password hashing workers
+            password_hasher.start()
+            
+            # Load the local symbol search index
+            symbol_index.start()
+            
             # Start the price stream producer
             price_stream_producer.start()
             
+            # Start delivering notifications before alerts can trigger
+            notification_dispatcher.start()
+            
             # Start the alert service
             alert_service.start()
             
+            # Start fanning prices and alerts out to live streams
+            stream_hub.start()
+            
             print("All services started successfully")
         except Exception as e:
             print(f"Error starting services: {str(e)}")
@@ -24,6 +40,18 @@ class ServiceManager:
             # Stop the alert service
             alert_service.stop()
             
+            # Deliver the notifications still queued, then stop the workers
+            notification_dispatcher.stop()
+            
+            # Stop the live stream consumer
+            stream_hub.stop()
+            
+            # Stop watching the symbol listing
+            symbol_index.stop()
+            
+            # Stop the password hashing workers
+            password_hasher.stop()
+            
             print("All services stopped successfully")
         except Exception as e:
             print(f"Error stopping services: {str(e)}")
@@ -1,69 +1,57 @@
-import requests
 from typing import Dict, Any, Optional, List
-import os
-from app.core.config import settings
+from app.services.market_data import MarketDataProvider, create_provider
+from app.services.quote_cache import quote_cache
+from app.services.symbol_index import symbol_index
 
 class StockService:
-    def __init__(self):
-        self.api_key = settings.STOCK_API_KEY
-        self.base_url = "https://www.alphavantage.co/query"
+    def __init__(self, provider: Optional[MarketDataProvider] = None):
+        self.provider = provider or create_provider()
     
     def get_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
         """
         Get the latest price and volume information for a security of your choice.
+        Served from the quote cache; concurrent misses share one upstream call.
         """
-        params = {
-            "function": "GLOBAL_QUOTE",
-            "symbol": symbol,
-            "apikey": self.api_key
-        }
-        
-        response = requests.get(self.base_url, params=params)
-        if response.status_code != 200:
-            return None
-        
-        data = response.json()
-        if "Global Quote" not in data or not data["Global Quote"]:
-            return None
-        
-        return data["Global Quote"]
+        return quote_cache.get_or_fetch(symbol, self.provider.get_quote)
+    
+    async def aget_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Async version of get_quote.
+        """
+        return await quote_cache.aget_or_fetch(symbol, self.provider.aget_quote)
+    
+    def get_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch fresh quotes for several securities, batched where the provider supports it,
+        and store them in the quote cache.
+        """
+        quotes = self.provider.get_quotes(symbols)
+        quote_cache.set_many(quotes)
+        return quotes
     
     def search_symbol(self, keywords: str) -> List[Dict[str, str]]:
         """
         Search for stocks by keywords/company name.
+        Served from the local symbol index, falling back to the provider on a miss.
         """
-        params = {
-            "function": "SYMBOL_SEARCH",
-            "keywords": keywords,
-            "apikey": self.api_key
-        }
-        
-        response = requests.get(self.base_url, params=params)
-        if response.status_code != 200:
-            return []
-        
-        data = response.json()
-        if "bestMatches" not in data:
-            return []
-        
-        return data["bestMatches"]
+        return symbol_index.search(keywords) or self.provider.search_symbol(keywords)
+    
+    async def asearch_symbol(self, keywords: str) -> List[Dict[str, str]]:
+        """
+        Async version of search_symbol.
+        """
+        return symbol_index.search(keywords) or await self.provider.asearch_symbol(keywords)
     
     def get_daily_prices(self, symbol: str, compact: bool = True) -> Optional[Dict[str, Any]]:
         """
         Get daily time series of the stock.
         """
-        output_size = "compact" if compact else "full"
-        params = {
-            "function": "TIME_SERIES_DAILY",
-            "symbol": symbol,
-            "outputsize": output_size,
-            "apikey": self.api_key
-        }
-        
-        response = requests.get(self.base_url, params=params)
-        if response.status_code != 200:
-            return None
-        
-        return response.json()
+        return self.provider.get_daily_prices(symbol, compact)
+    
+    async def aget_daily_prices(self, symbol: str, compact: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Async version of get_daily_prices.
+        """
+        return await self.provider.aget_daily_prices(symbol, compact)
 
 stock_service = StockService()
\ No newline at end of file
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional, Set
+from kafka import KafkaConsumer
+from app.core.config import settings
+from app.services.kafka_topics import PRICE_TOPIC
+from app.services.tracked_symbols import tracked_symbols
+
+ALERT_TOPIC = "alert-notifications"
+
+class StreamConnection:
+    """
+    Outgoing event buffer for one WebSocket/SSE client.
+
+    Ticks are conflated per symbol, so a slow client only ever has the latest price
+    of each subscribed symbol pending. Alerts are kept in order in a bounded queue
+    that drops the oldest entry when full.
+    """
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.symbols: Set[str] = set()
+        self._ticks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._alerts: deque = deque(maxlen=settings.STREAM_MAX_PENDING_ALERTS)
+        self._ready = asyncio.Event()
+
+    def push_tick(self, tick: Dict[str, Any]):
+        self._ticks[tick["symbol"]] = tick
+        self._ticks.move_to_end(tick["symbol"])
+        self._ready.set()
+
+    def push_alert(self, alert: Dict[str, Any]):
+        self._alerts.append(alert)
+        self._ready.set()
+
+    async def next_events(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Wait for pending events and take all of them; empty on timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+        self._ready.clear()
+        events = [{"type": "alert", **alert} for alert in self._alerts]
+        events.extend({"type": "tick", **tick} for tick in self._ticks.values())
+        self._alerts.clear()
+        self._ticks.clear()
+        return events
+
+class StreamHub:
+    """
+    Fans price ticks and triggered alerts out to streaming clients.
+
+    Each API process runs one Kafka consumer (outside any consumer group, so every
+    process sees every message) that hands batches to the event loop. Ticks go only
+    to connections subscribed to the symbol, alerts only to the owner's connections.
+    All subscription state is touched from the event loop thread only.
+    """
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[StreamConnection]] = {}
+        self._by_user: Dict[int, Set[StreamConnection]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.consumer = None
+        self.running = False
+        self.thread = None
+
+    def connect(self, user_id: int) -> StreamConnection:
+        connection = StreamConnection(user_id)
+        self._by_user.setdefault(user_id, set()).add(connection)
+        return connection
+
+    def disconnect(self, connection: StreamConnection):
+        self.unsubscribe(connection, list(connection.symbols))
+        user_connections = self._by_user.get(connection.user_id)
+        if user_connections is not None:
+            user_connections.discard(connection)
+            if not user_connections:
+                del self._by_user[connection.user_id]
+
+    def subscribe(self, connection: StreamConnection, symbols: List[str]) -> List[str]:
+        """Subscribe a connection to symbols, up to the per-connection limit"""
+        for symbol in symbols:
+            symbol = symbol.upper()
+            if symbol in connection.symbols or len(connection.symbols) >= settings.STREAM_MAX_SYMBOLS:
+                continue
+            connection.symbols.add(symbol)
+            if symbol not in self._subscriptions:
+                # The first subscriber on this worker makes the price stream fetch it
+                self._subscriptions[symbol] = set()
+                tracked_symbols.add_stream(symbol)
+            self._subscriptions[symbol].add(connection)
+        return sorted(connection.symbols)
+
+    def unsubscribe(self, connection: StreamConnection, symbols: List[str]) -> List[str]:
+        for symbol in symbols:
+            symbol = symbol.upper()
+            connection.symbols.discard(symbol)
+            subscribers = self._subscriptions.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self._subscriptions[symbol]
+                    tracked_symbols.remove_stream(symbol)
+        return sorted(connection.symbols)
+
+    def _dispatch(self, ticks: List[Dict[str, Any]], alerts: List[Dict[str, Any]]):
+        for tick in ticks:
+            for connection in self._subscriptions.get(tick["symbol"].upper(), ()):
+                connection.push_tick(tick)
+        for alert in alerts:
+            for connection in self._by_user.get(alert.get("user_id"), ()):
+                connection.push_alert(alert)
+
+    def _consume(self):
+        """Poll Kafka and hand each batch to the event loop in a single callback"""
+        while self.running:
+            try:
+                tracked_symbols.sync_streams()
+                records = self.consumer.poll(timeout_ms=500)
+                ticks, alerts = [], []
+                for partition, partition_records in records.items():
+                    target = alerts if partition.topic == ALERT_TOPIC else ticks
+                    target.extend(record.value for record in partition_records)
+                if ticks or alerts:
+                    self.loop.call_soon_threadsafe(self._dispatch, ticks, alerts)
+            except Exception as e:
+                print(f"Error consuming stream events: {str(e)}")
+
+    def start(self):
+        """Start the stream consumer; must be called from the application's event loop"""
+        if not self.running:
+            self.loop = asyncio.get_running_loop()
+            self.consumer = KafkaConsumer(
+                PRICE_TOPIC,
+                ALERT_TOPIC,
+                bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS,
+                value_deserializer=lambda x: json.loads(x.decode('utf-8')),
+                auto_offset_reset='latest'
+            )
+            self.running = True
+            self.thread = threading.Thread(target=self._consume)
+            self.thread.daemon = True
+            self.thread.start()
+            print("Stream hub started")
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.consumer.close()
+            self.thread = None
+            tracked_symbols.clear_streams()
+            print("Stream hub stopped")
+
+# Create a singleton instance
+stream_hub = StreamHub()
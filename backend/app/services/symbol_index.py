@@ -0,0 +1,223 @@
+import csv
+import os
+import re
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+from app.core.config import settings
+
+# Number of candidates kept per trie node; more than any search returns
+_NODE_CAPACITY = 50
+# Name tokens shorter than this only match whole tokens, not as prefixes, and a
+# prefix collects at most this many entries, so short queries stay cheap
+_MIN_TOKEN_PREFIX = 2
+_TOKEN_PREFIX_CAPACITY = 500
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Scores for each kind of match, reported in "9. matchScore"
+_EXACT_SYMBOL = 1.0
+_SYMBOL_PREFIX = 0.8
+_NAME_PREFIX = 0.6
+_NAME_FUZZY = 0.4
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def _deletions(token: str) -> Set[str]:
+    """Variants of a token with one character removed, for edit-distance-1 lookups"""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+class _Listing:
+    """Immutable search structures built from one version of the listing file"""
+    def __init__(self, rows: List[Dict[str, str]]):
+        # Shorter tickers first, so "F" ranks above "FA..." for the prefix "F"
+        self.rows = sorted(rows, key=lambda row: (len(row["symbol"]), row["symbol"]))
+        self.by_symbol = {row["symbol"]: i for i, row in enumerate(self.rows)}
+
+        # Prefix trie over tickers, each node holding its best-ranked entries
+        self.trie: Dict = {}
+        for i, row in enumerate(self.rows):
+            node = self.trie
+            for char in row["symbol"]:
+                node = node.setdefault(char, {"": []})
+                if len(node[""]) < _NODE_CAPACITY:
+                    node[""].append(i)
+
+        # Token index over company names, with sorted tokens for prefix ranges
+        self.token_entries: Dict[str, List[int]] = {}
+        for i, row in enumerate(self.rows):
+            for token in set(_tokenize(row["name"])):
+                self.token_entries.setdefault(token, []).append(i)
+        self.tokens = sorted(self.token_entries)
+
+        # Deletion neighbourhoods for fuzzy matching of misspelled name tokens
+        self.fuzzy: Dict[str, Set[str]] = {}
+        for token in self.tokens:
+            if len(token) >= 4:
+                for variant in _deletions(token) | {token}:
+                    self.fuzzy.setdefault(variant, set()).add(token)
+
+    def symbol_prefix(self, prefix: str) -> List[int]:
+        node = self.trie
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node[""]
+
+    def token_prefix(self, prefix: str) -> Set[int]:
+        if len(prefix) < _MIN_TOKEN_PREFIX:
+            return set(self.token_entries.get(prefix, ()))
+        entries: Set[int] = set()
+        i = bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix) and len(entries) < _TOKEN_PREFIX_CAPACITY:
+            # Entries are in rank order, so a common token contributes its best-ranked ones
+            entries.update(self.token_entries[self.tokens[i]][:_TOKEN_PREFIX_CAPACITY - len(entries)])
+            i += 1
+        return entries
+
+    def token_fuzzy(self, token: str) -> Set[int]:
+        entries: Set[int] = set()
+        if len(token) < 4:
+            return entries
+        for variant in _deletions(token) | {token}:
+            for match in self.fuzzy.get(variant, ()):
+                entries.update(self.token_entries[match])
+        return entries
+
+class SymbolIndex:
+    """
+    Local symbol search over a listing file (Alpha Vantage LISTING_STATUS CSV:
+    symbol,name,exchange,assetType,...).
+
+    Tickers are matched by prefix through a trie and company names through a token
+    index, falling back to edit-distance-1 matches on name tokens. The listing is
+    reloaded in the background whenever the file changes.
+    """
+    def __init__(self, path: str = settings.SYMBOL_LISTING_FILE):
+        self.path = path
+        self._listing: Optional[_Listing] = None
+        self._mtime: Optional[float] = None
+        self._stop_event = threading.Event()
+        self.thread = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._listing is not None
+
+    def reload_if_changed(self):
+        """Rebuild the index if the listing file changed since it was last loaded"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+
+        with open(self.path, newline="") as f:
+            rows = [
+                row for row in csv.DictReader(f)
+                if row.get("symbol") and row.get("status", "Active") == "Active"
+            ]
+        # Swap in the new listing in one assignment so searches never see a partial index
+        self._listing = _Listing(rows)
+        self._mtime = mtime
+        print(f"Symbol index loaded {len(rows)} listings")
+
+    def _watch(self):
+        while not self._stop_event.wait(settings.SYMBOL_LISTING_RELOAD_SECONDS):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"Error reloading symbol index: {str(e)}")
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        """Search the listing, returning SYMBOL_SEARCH "bestMatches"-shaped results"""
+        listing = self._listing
+        query = query.strip()
+        if listing is None or not query:
+            return []
+
+        scores: Dict[int, float] = {}
+
+        def add(entries, score: float):
+            for i in entries:
+                if scores.get(i, 0) < score:
+                    scores[i] = score
+
+        symbol = query.upper()
+        if symbol in listing.by_symbol:
+            add([listing.by_symbol[symbol]], _EXACT_SYMBOL)
+        # Entries are already in rank order, so a small length penalty keeps that order
+        for rank, i in enumerate(listing.symbol_prefix(symbol)):
+            add([i], _SYMBOL_PREFIX - rank * 0.001)
+
+        tokens = _tokenize(query)
+        if tokens:
+            matched = None
+            for token in tokens:
+                entries = listing.token_prefix(token)
+                matched = entries if matched is None else matched & entries
+            add(matched, _NAME_PREFIX)
+
+            if len(scores) < limit:
+                fuzzy = None
+                for token in tokens:
+                    entries = listing.token_prefix(token) | listing.token_fuzzy(token)
+                    fuzzy = entries if fuzzy is None else fuzzy & entries
+                add(fuzzy, _NAME_FUZZY)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [self._to_match(listing.rows[i], score) for i, score in ranked]
+
+    @staticmethod
+    def _to_match(row: Dict[str, str], score: float) -> Dict[str, str]:
+        # LISTING_STATUS only covers US exchanges
+        return {
+            "1. symbol": row["symbol"],
+            "2. name": row["name"],
+            "3. type": row.get("assetType", "Stock"),
+            "4. region": "United States",
+            "5. marketOpen": "09:30",
+            "6. marketClose": "16:00",
+            "7. timezone": "UTC-04",
+            "8. currency": "USD",
+            "9. matchScore": f"{min(score, 1.0):.4f}",
+        }
+
+    def start(self):
+        """Load the listing and start watching it for changes"""
+        try:
+            self.reload_if_changed()
+        except Exception as e:
+            print(f"Error loading symbol index: {str(e)}")
+        if self.thread is None:
+            self._stop_event.clear()
+            self.thread = threading.Thread(target=self._watch)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+# Create a singleton instance
+symbol_index = SymbolIndex()
+
+if __name__ == "__main__":
+    # Download the current listing: python -m app.services.symbol_index
+    import httpx
+    response = httpx.get(
+        settings.ALPHA_VANTAGE_BASE_URL,
+        params={"function": "LISTING_STATUS", "apikey": settings.STOCK_API_KEY},
+        timeout=60
+    )
+    response.raise_for_status()
+    os.makedirs(os.path.dirname(settings.SYMBOL_LISTING_FILE) or ".", exist_ok=True)
+    # Write then rename so a running index never reads a half-written file
+    with open(settings.SYMBOL_LISTING_FILE + ".tmp", "w") as f:
+        f.write(response.text)
+    os.replace(settings.SYMBOL_LISTING_FILE + ".tmp", settings.SYMBOL_LISTING_FILE)
+    print(f"Saved listing to {settings.SYMBOL_LISTING_FILE}")
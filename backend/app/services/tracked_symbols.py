@@ -0,0 +1,296 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.models.portfolio import Alert, Asset, Portfolio
+
+class TrackedSymbols:
+    """
+    The symbols the price stream fetches, shared by every worker and derived from
+    what references them:
+
+    - alerts: active alerts per symbol, recounted from the database by the alert
+      and asset repositories after each change and rebuilt with one aggregate
+      query by the fetch leader when it takes the lease
+    - holdings: assets per symbol, so portfolio valuations have prices for
+      holdings without alerts; recounted by the asset repository and rebuilt
+      alongside the alert counts
+    - streams: symbols with open live stream subscriptions, one Redis set per
+      worker that expires unless the worker keeps refreshing it, so the
+      subscriptions of a worker that died go away with it
+    - explicit: /api/price-stream/track calls not yet undone by /untrack, kept
+      per user so one user can't untrack another's symbol, as one Redis set of
+      "SYMBOL:user_id" members
+
+    A symbol is tracked while any source references it, so symbols nobody needs
+    any more stop being fetched. Everything lives in Redis, where the fetch
+    leader reads it; without Redis, or while it is unreachable, the references
+    made in this process are used. Explicit and stream symbols are upper-cased,
+    like asset symbols, so every spelling shares one reference.
+    """
+    ALERTS_KEY = "price-stream:refs:alerts"
+    HOLDINGS_KEY = "price-stream:refs:holdings"
+    EXPLICIT_KEY = "price-stream:refs:explicit-users"
+    STREAM_WORKERS_KEY = "price-stream:refs:stream-workers"
+    PUBLISHED_KEY = "price-stream:last-published"
+    INTERVALS_KEY = "price-stream:refresh-intervals"
+
+    def __init__(self):
+        self.redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True
+        ) if settings.PRICE_STREAM_REDIS else None
+        self.streams_key = f"price-stream:refs:streams:{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._alerts: Dict[str, int] = {}
+        self._holdings: Dict[str, int] = {}
+        self._explicit: Dict[str, Set[int]] = {}
+        self._streams: Set[str] = set()
+        self._streams_dirty = False
+        self._streams_synced_at = 0.0
+        self._last_published: Dict[str, float] = {}
+        self._refresh_intervals: Dict[str, float] = {}
+
+    # Alerts and holdings
+
+    @staticmethod
+    def _alert_counts_statement(symbols: Optional[List[str]] = None):
+        # Counted like the alert registry loads them: active, on an asset still in a portfolio
+        statement = select(Asset.symbol, func.count(Alert.id)).join(
+            Alert, Alert.asset_id == Asset.id
+        ).join(Portfolio, Asset.portfolio_id == Portfolio.id).where(Alert.is_active == True).group_by(Asset.symbol)
+        if symbols is not None:
+            statement = statement.where(Asset.symbol.in_(symbols))
+        return statement
+
+    @staticmethod
+    def _holding_counts_statement(symbols: Optional[List[str]] = None):
+        statement = select(Asset.symbol, func.count(Asset.id)).join(
+            Portfolio, Asset.portfolio_id == Portfolio.id
+        ).group_by(Asset.symbol)
+        if symbols is not None:
+            statement = statement.where(Asset.symbol.in_(symbols))
+        return statement
+
+    def rebuild(self, db: Session):
+        """Replace the alert and holding references with a fresh count per symbol"""
+        alerts = dict(db.execute(self._alert_counts_statement()).all())
+        holdings = dict(db.execute(self._holding_counts_statement()).all())
+        with self._lock:
+            self._alerts = alerts
+            self._holdings = holdings
+        if self.redis_client is not None:
+            try:
+                pipeline = self.redis_client.pipeline()
+                pipeline.delete(self.ALERTS_KEY, self.HOLDINGS_KEY)
+                if alerts:
+                    pipeline.hset(self.ALERTS_KEY, mapping=alerts)
+                if holdings:
+                    pipeline.hset(self.HOLDINGS_KEY, mapping=holdings)
+                pipeline.execute()
+            except redis.RedisError as e:
+                print(f"Error rebuilding tracked symbols: {str(e)}")
+        print(f"Tracked symbols rebuilt: {len(alerts)} symbols with active alerts, {len(holdings)} held")
+
+    def refresh(self, db: Session, symbols: Iterable[str], holdings: bool = False):
+        """Recount the active alerts of symbols whose alerts or assets just changed, and their holdings if asked"""
+        symbols = sorted(set(symbols))
+        if symbols:
+            self._set_counts(self.ALERTS_KEY, self._alerts, symbols, dict(db.execute(self._alert_counts_statement(symbols)).all()))
+            if holdings:
+                self._set_counts(self.HOLDINGS_KEY, self._holdings, symbols, dict(db.execute(self._holding_counts_statement(symbols)).all()))
+
+    async def arefresh(self, db: AsyncSession, symbols: Iterable[str], holdings: bool = False):
+        symbols = sorted(set(symbols))
+        if symbols:
+            counts = dict((await db.execute(self._alert_counts_statement(symbols))).all())
+            await run_in_threadpool(self._set_counts, self.ALERTS_KEY, self._alerts, symbols, counts)
+            if holdings:
+                counts = dict((await db.execute(self._holding_counts_statement(symbols))).all())
+                await run_in_threadpool(self._set_counts, self.HOLDINGS_KEY, self._holdings, symbols, counts)
+
+    def _set_counts(self, key: str, local: Dict[str, int], symbols: List[str], counts: Dict[str, int]):
+        # Recounts are absolute, so a lost or repeated one can't leave a count drifting
+        with self._lock:
+            for symbol in symbols:
+                if counts.get(symbol):
+                    local[symbol] = counts[symbol]
+                else:
+                    local.pop(symbol, None)
+        if self.redis_client is not None:
+            try:
+                pipeline = self.redis_client.pipeline(transaction=False)
+                released = [symbol for symbol in symbols if not counts.get(symbol)]
+                if released:
+                    pipeline.hdel(key, *released)
+                held = {symbol: counts[symbol] for symbol in symbols if counts.get(symbol)}
+                if held:
+                    pipeline.hset(key, mapping=held)
+                pipeline.execute()
+            except redis.RedisError as e:
+                print(f"Error updating tracked symbols: {str(e)}")
+
+    # Explicit tracks
+
+    def track(self, symbol: str, user_id: int):
+        """Track a symbol for a user; tracking it again is a no-op"""
+        symbol = symbol.upper()
+        with self._lock:
+            self._explicit.setdefault(symbol, set()).add(user_id)
+        if self.redis_client is not None:
+            try:
+                self.redis_client.sadd(self.EXPLICIT_KEY, f"{symbol}:{user_id}")
+            except redis.RedisError as e:
+                print(f"Error tracking {symbol}: {str(e)}")
+
+    def untrack(self, symbol: str, user_id: int):
+        """Drop a user's track of a symbol, leaving other users' tracks in place"""
+        symbol = symbol.upper()
+        with self._lock:
+            users = self._explicit.get(symbol)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._explicit[symbol]
+        if self.redis_client is not None:
+            try:
+                self.redis_client.srem(self.EXPLICIT_KEY, f"{symbol}:{user_id}")
+            except redis.RedisError as e:
+                print(f"Error untracking {symbol}: {str(e)}")
+
+    # Live stream subscriptions
+
+    def add_stream(self, symbol: str):
+        """Note that this worker has a stream subscribed to a symbol; written to Redis by sync_streams"""
+        with self._lock:
+            self._streams.add(symbol.upper())
+            self._streams_dirty = True
+
+    def remove_stream(self, symbol: str):
+        with self._lock:
+            self._streams.discard(symbol.upper())
+            self._streams_dirty = True
+
+    def sync_streams(self):
+        """Write this worker's stream symbols to Redis if they changed, or before they expire"""
+        if self.redis_client is None:
+            return
+        ttl = settings.PRICE_STREAM_LEASE_SECONDS
+        with self._lock:
+            if not self._streams_dirty and time.monotonic() - self._streams_synced_at < ttl / 3:
+                return
+            symbols = list(self._streams)
+            self._streams_dirty = False
+        try:
+            pipeline = self.redis_client.pipeline()
+            pipeline.delete(self.streams_key)
+            if symbols:
+                pipeline.sadd(self.streams_key, *symbols)
+                pipeline.pexpire(self.streams_key, int(ttl * 1000))
+                pipeline.sadd(self.STREAM_WORKERS_KEY, self.streams_key)
+            pipeline.execute()
+            self._streams_synced_at = time.monotonic()
+        except redis.RedisError as e:
+            self._streams_dirty = True
+            print(f"Error syncing stream symbols: {str(e)}")
+
+    def clear_streams(self):
+        with self._lock:
+            self._streams = set()
+            self._streams_dirty = True
+        self.sync_streams()
+
+    # Reading
+
+    def _redis_members(self) -> Set[str]:
+        pipeline = self.redis_client.pipeline(transaction=False)
+        pipeline.hkeys(self.ALERTS_KEY)
+        pipeline.hkeys(self.HOLDINGS_KEY)
+        pipeline.smembers(self.EXPLICIT_KEY)
+        pipeline.smembers(self.STREAM_WORKERS_KEY)
+        alerts, holdings, explicit, stream_keys = pipeline.execute()
+        symbols = set(alerts) | set(holdings) | {member.rsplit(":", 1)[0] for member in explicit}
+        if stream_keys:
+            stream_keys = list(stream_keys)
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for key in stream_keys:
+                pipeline.smembers(key)
+            expired = []
+            for key, members in zip(stream_keys, pipeline.execute()):
+                symbols.update(members)
+                if not members:
+                    expired.append(key)
+            # Workers that stopped or have no streams open re-register when they next sync
+            if expired:
+                self.redis_client.srem(self.STREAM_WORKERS_KEY, *expired)
+        return symbols
+
+    def members(self) -> List[str]:
+        """Get every symbol some source still references"""
+        if self.redis_client is not None:
+            try:
+                return list(self._redis_members())
+            except redis.RedisError as e:
+                print(f"Error reading tracked symbols: {str(e)}")
+        with self._lock:
+            return list(set(self._alerts) | set(self._holdings) | set(self._explicit) | self._streams)
+
+    def record_published(self, published: Dict[str, float]):
+        """Record when a batch of symbols was published, and the interval since the previous time"""
+        with self._lock:
+            intervals = {
+                symbol: now - self._last_published[symbol]
+                for symbol, now in published.items() if symbol in self._last_published
+            }
+            self._last_published.update(published)
+            self._refresh_intervals.update(intervals)
+        if self.redis_client is not None:
+            try:
+                pipeline = self.redis_client.pipeline(transaction=False)
+                pipeline.hset(self.PUBLISHED_KEY, mapping=published)
+                if intervals:
+                    pipeline.hset(self.INTERVALS_KEY, mapping=intervals)
+                pipeline.execute()
+            except redis.RedisError as e:
+                print(f"Error recording price stream stats: {str(e)}")
+
+    def stats(self) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        """Get (last published, refresh interval) for every tracked symbol"""
+        symbols = self.members()
+        if self.redis_client is not None:
+            try:
+                pipeline = self.redis_client.pipeline(transaction=False)
+                pipeline.hgetall(self.PUBLISHED_KEY)
+                pipeline.hgetall(self.INTERVALS_KEY)
+                published, intervals = pipeline.execute()
+                # Statistics of symbols no longer tracked are dropped as they're noticed
+                stale = list(published.keys() - set(symbols))
+                if stale:
+                    self.redis_client.hdel(self.PUBLISHED_KEY, *stale)
+                    self.redis_client.hdel(self.INTERVALS_KEY, *stale)
+                return {
+                    symbol: (
+                        float(published[symbol]) if symbol in published else None,
+                        float(intervals[symbol]) if symbol in intervals else None,
+                    )
+                    for symbol in symbols
+                }
+            except redis.RedisError as e:
+                print(f"Error reading price stream stats: {str(e)}")
+        with self._lock:
+            return {
+                symbol: (self._last_published.get(symbol), self._refresh_intervals.get(symbol))
+                for symbol in symbols
+            }
+
+# Create a singleton instance
+tracked_symbols = TrackedSymbols()
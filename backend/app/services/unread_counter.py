@@ -0,0 +1,68 @@
+from typing import Dict, Optional
+import redis
+from app.core.config import settings
+
+# Adjust a count only if it is already cached; a missing count is recounted on read
+_ADJUST_IF_CACHED = """
+if redis.call('exists', KEYS[1]) == 1 then
+    return redis.call('incrby', KEYS[1], ARGV[1])
+end
+return nil
+"""
+
+class UnreadCounter:
+    """
+    Per-user unread notification counts in Redis, so reading the badge is one GET.
+
+    A count is seeded from the database on the first read, then adjusted as
+    notifications are stored and marked read. Adjustments skip counts that
+    aren't cached, and counts expire after UNREAD_COUNT_TTL_SECONDS, so any drift
+    from a race between a recount and an adjustment is short-lived. When Redis is
+    disabled or unavailable, every read is a recount.
+    """
+    def __init__(self):
+        self.redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            decode_responses=True
+        ) if settings.UNREAD_COUNT_REDIS else None
+        self._adjust = self.redis_client.register_script(_ADJUST_IF_CACHED) if self.redis_client else None
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"notifications:unread:{user_id}"
+
+    def get(self, user_id: int) -> Optional[int]:
+        """Get a user's cached unread count, or None if it has to be recounted"""
+        if self.redis_client is None:
+            return None
+        try:
+            value = self.redis_client.get(self._key(user_id))
+        except redis.RedisError as e:
+            print(f"Error reading unread count: {str(e)}")
+            return None
+        return max(int(value), 0) if value is not None else None
+
+    def seed(self, user_id: int, count: int):
+        """Cache a count just recounted from the database, unless one was cached meanwhile"""
+        if self.redis_client is None:
+            return
+        try:
+            self.redis_client.set(self._key(user_id), count, ex=settings.UNREAD_COUNT_TTL_SECONDS, nx=True)
+        except redis.RedisError as e:
+            print(f"Error writing unread count: {str(e)}")
+
+    def add(self, counts: Dict[int, int]):
+        """Adjust the cached counts of several users by the given amounts, in one round trip"""
+        if self.redis_client is None or not counts:
+            return
+        try:
+            pipeline = self.redis_client.pipeline(transaction=False)
+            for user_id, amount in counts.items():
+                self._adjust(keys=[self._key(user_id)], args=[amount], client=pipeline)
+            pipeline.execute()
+        except redis.RedisError as e:
+            print(f"Error updating unread counts: {str(e)}")
+
+# Create a singleton instance
+unread_counter = UnreadCounter()
@@ -0,0 +1,136 @@
+import time
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import numpy as np
+from app.services.last_prices import last_prices
+
+# (portfolio_id, asset_id, symbol, quantity, purchase_price), as returned by get_positions
+Position = Tuple[int, int, str, float, float]
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    """Convert an array to a JSON-safe list, with missing values as None"""
+    missing = np.isnan(values)
+    if not missing.any():
+        return values.tolist()
+    result = values.astype(object)
+    result[missing] = None
+    return result.tolist()
+
+def _percent(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    result = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=result, where=denominator != 0)
+    return result * 100
+
+class ValuationService:
+    """
+    Values portfolios against the last prices the price stream fetched.
+
+    Positions are loaded into NumPy arrays and valued in one vectorized pass, with
+    per-portfolio totals reduced by bincount. Prices come only from the last price
+    store, which the price stream keeps for every held symbol however long its
+    refresh cycle takes, so a valuation never waits on the upstream API. Each
+    position reports how old its price is; symbols the stream hasn't fetched yet
+    are reported as unpriced and left out of totals.
+    Positions are returned column-wise, one list per field, to keep large
+    portfolios cheap to serialize.
+    """
+    def value(self, portfolios: Sequence[Tuple[int, str]], positions: Sequence[Position]) -> Dict[str, Any]:
+        """Value the given (id, name) portfolios from their positions"""
+        group_of = {portfolio_id: i for i, (portfolio_id, _) in enumerate(portfolios)}
+        count = len(positions)
+        if count:
+            portfolio_ids, asset_ids, symbols, quantities, purchase_prices = zip(*positions)
+        else:
+            portfolio_ids, asset_ids, symbols, quantities, purchase_prices = (), (), (), (), ()
+
+        group = np.fromiter((group_of[portfolio_id] for portfolio_id in portfolio_ids), dtype=np.intp, count=count)
+        quantity = np.array(quantities, dtype=float)
+        purchase_price = np.array(purchase_prices, dtype=float)
+
+        # Look up each distinct symbol once, then broadcast back to the positions
+        unique_symbols, symbol_index = np.unique(np.array(symbols, dtype=str), return_inverse=True)
+        lookup = [symbol.upper() for symbol in unique_symbols.tolist()]
+        prices = last_prices.get_many(lookup)
+        missing = (np.nan, np.nan, np.nan)
+        unique_prices, unique_changes, unique_fetched = np.array(
+            [prices.get(symbol, missing) for symbol in lookup], dtype=float
+        ).reshape(len(lookup), 3).T
+        price = unique_prices[symbol_index]
+        change = np.nan_to_num(unique_changes[symbol_index])
+        price_age = time.time() - unique_fetched[symbol_index]
+
+        market_value = quantity * price
+        cost_basis = quantity * purchase_price
+        unrealized_pnl = market_value - cost_basis
+        day_change = quantity * change
+        priced = ~np.isnan(market_value)
+
+        # Per-portfolio totals over priced positions
+        groups = len(portfolios)
+
+        def total(values: np.ndarray, mask: np.ndarray = priced) -> np.ndarray:
+            return np.bincount(group, weights=np.where(mask, values, 0.0), minlength=groups)
+
+        portfolio_value = total(market_value)
+        portfolio_cost = total(cost_basis, ~np.isnan(cost_basis))
+        portfolio_priced_cost = total(cost_basis)
+        portfolio_pnl = total(unrealized_pnl)
+        portfolio_day_change = total(day_change)
+        weight = np.where(priced, market_value, np.nan) / np.where(portfolio_value[group] != 0, portfolio_value[group], np.nan)
+
+        # Split the position columns by portfolio, keeping each portfolio's rows in order
+        order = np.argsort(group, kind="stable")
+        bounds = np.cumsum(np.bincount(group, minlength=groups))[:-1]
+        columns = {
+            "asset_ids": np.array(asset_ids, dtype=np.int64),
+            "symbols": np.array(symbols, dtype=str),
+            "quantity": quantity,
+            "purchase_price": purchase_price,
+            "price": price,
+            "price_age": price_age,
+            "market_value": market_value,
+            "cost_basis": cost_basis,
+            "unrealized_pnl": unrealized_pnl,
+            "unrealized_pnl_percent": _percent(unrealized_pnl, cost_basis),
+            "day_change": np.where(priced, day_change, np.nan),
+            "weight": weight,
+        }
+        split = {name: np.split(values[order], bounds) for name, values in columns.items()}
+        unpriced = np.split(~priced[order], bounds)
+
+        results = []
+        for i, (portfolio_id, name) in enumerate(portfolios):
+            summary = self._summary(
+                portfolio_value[i], portfolio_cost[i], portfolio_priced_cost[i],
+                portfolio_pnl[i], portfolio_day_change[i]
+            )
+            summary.update({
+                "portfolio_id": portfolio_id,
+                "name": name,
+                "unpriced_symbols": np.unique(split["symbols"][i][unpriced[i]]).tolist(),
+                "positions": {
+                    column: values[i].tolist() if column in ("asset_ids", "symbols") else _to_list(values[i])
+                    for column, values in split.items()
+                },
+            })
+            results.append(summary)
+
+        totals = self._summary(
+            portfolio_value.sum(), portfolio_cost.sum(), portfolio_priced_cost.sum(),
+            portfolio_pnl.sum(), portfolio_day_change.sum()
+        )
+        return {"portfolios": results, "totals": totals}
+
+    @staticmethod
+    def _summary(market_value: float, cost_basis: float, priced_cost: float, pnl: float, day_change: float) -> Dict[str, Any]:
+        previous_value = market_value - day_change
+        return {
+            "market_value": float(market_value),
+            "cost_basis": float(cost_basis),
+            "unrealized_pnl": float(pnl),
+            "unrealized_pnl_percent": float(pnl / priced_cost * 100) if priced_cost else None,
+            "day_change": float(day_change),
+            "day_change_percent": float(day_change / previous_value * 100) if previous_value else None,
+        }
+
+# Create a singleton instance
+valuation_service = ValuationService()
@@ -0,0 +1,156 @@
+"""
+Measure login throughput, and the latency of an unrelated endpoint, during a login storm.
+
+Serves the real auth router from a uvicorn subprocess against a SQLite database,
+with either the pooled login ("pool") or the old login that runs bcrypt inline on
+the request threadpool ("inline"). A set of clients log in continuously while a
+probe hits a sync route doing one small query, which has to share the threadpool.
+
+    cd backend && python -m benchmarks.login_storm --mode inline
+    cd backend && python -m benchmarks.login_storm --mode pool
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import statistics
+import tempfile
+import time
+from typing import List
+
+EMAIL = "storm@example.com"
+PASSWORD = "correct horse battery staple"
+
+def serve(mode: str, db_path: str, port: int):
+    # Settings are read at import time, so configure them before importing the app
+    os.environ["PRINCIPAL_CACHE_REDIS"] = "false"
+    import uvicorn
+    from fastapi import Depends, FastAPI
+    from fastapi.responses import JSONResponse
+    from fastapi.security import OAuth2PasswordRequestForm
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import Session, sessionmaker
+    from app.api import auth
+    from app.core.security import PasswordHasherBusy, pwd_context, password_hasher
+    from app.db.repositories.user import get_user_by_email
+    from app.db.session import get_db
+
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+    def get_test_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = get_test_db
+
+    if mode == "pool":
+        app.include_router(auth.router, prefix="/api/auth")
+        password_hasher.start()
+    else:
+        @app.post("/api/auth/login")
+        def login_inline(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
+            # The previous handler: bcrypt runs on the request threadpool
+            user = get_user_by_email(db, form_data.username)
+            if not user or not pwd_context.verify(form_data.password, user.hashed_password):
+                return JSONResponse(status_code=401, content={"detail": "Incorrect email or password"})
+            return {"access_token": "x", "token_type": "bearer"}
+
+    @app.exception_handler(PasswordHasherBusy)
+    async def busy(request, exc):
+        return JSONResponse(status_code=503, content={"detail": "busy"})
+
+    @app.get("/api/ping")
+    def ping(db: Session = Depends(get_db)):
+        return {"ok": db.execute(text("SELECT 1")).scalar()}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+def seed(db_path: str):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.security import pwd_context
+    from app.db.session import Base
+    from app.models import user, portfolio
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(user.User(email=EMAIL, hashed_password=pwd_context.hash(PASSWORD), is_active=True))
+        db.commit()
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+async def storm(base_url: str, concurrency: int, duration: float, probe_interval: float):
+    import httpx
+    limits = httpx.Limits(max_connections=concurrency + 1, max_keepalive_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        for _ in range(100):
+            try:
+                await client.get("/api/ping")
+                break
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+
+        statuses: List[int] = []
+        probe_latencies: List[float] = []
+        deadline = time.monotonic() + duration
+
+        async def login_loop():
+            while time.monotonic() < deadline:
+                response = await client.post("/api/auth/login", data={"username": EMAIL, "password": PASSWORD})
+                statuses.append(response.status_code)
+                if response.status_code == 503:
+                    await asyncio.sleep(0.05)
+
+        async def probe_loop():
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                await client.get("/api/ping")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(probe_interval)
+
+        start = time.monotonic()
+        await asyncio.gather(probe_loop(), *(login_loop() for _ in range(concurrency)))
+        elapsed = time.monotonic() - start
+
+    ok = statuses.count(200)
+    print(f"logins/sec       {ok / elapsed:.1f} ({ok} ok, {statuses.count(503)} shed with 503)")
+    print(f"probe requests   {len(probe_latencies)}")
+    print(f"probe p50        {statistics.median(probe_latencies) * 1000:.1f} ms")
+    print(f"probe p99        {percentile(probe_latencies, 0.99) * 1000:.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["inline", "pool"], default="pool")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="seconds between probe requests")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "storm.db")
+        seed(db_path)
+        port = free_port()
+        server = multiprocessing.get_context("spawn").Process(target=serve, args=(args.mode, db_path, port))
+        server.start()
+        try:
+            print(f"mode {args.mode}, {args.concurrency} login clients, {args.duration:.0f}s")
+            asyncio.run(storm(f"http://127.0.0.1:{port}", args.concurrency, args.duration, args.probe_interval))
+        finally:
+            server.terminate()
+            server.join()
+
+if __name__ == "__main__":
+    main()
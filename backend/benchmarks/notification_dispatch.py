@@ -0,0 +1,149 @@
+"""
+Measure alert evaluation throughput while notifications go to a slow mail server.
+
+Runs a local SMTP stand-in that takes --smtp-delay seconds to accept each
+message, and a migrated SQLite database with one user per alert. Each tick
+triggers every alert, like the alert consumer would:
+
+- inline: every triggered alert is emailed on the evaluation thread over a new
+  SMTP connection, the way a direct send from `_send_alert` would
+- dispatcher: triggered alerts are submitted to the NotificationDispatcher,
+  which stores them in bulk and emails them from its worker pool
+
+Reports the evaluation rate, and for the dispatcher how long delivery took,
+how many notifications were stored and how many SMTP connections were opened.
+
+    cd backend && python -m benchmarks.notification_dispatch --alerts 200 --smtp-delay 0.05
+"""
+import argparse
+import os
+import smtplib
+import socketserver
+import tempfile
+import threading
+import time
+from email.message import EmailMessage
+
+class SlowSmtpHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages, sleeping before acknowledging each one"""
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 stand-in ready\r\n")
+        in_data = False
+        for line in self.rfile:
+            if in_data:
+                if line == b".\r\n":
+                    in_data = False
+                    time.sleep(self.server.delay)
+                    self.server.messages += 1
+                    self.wfile.write(b"250 queued\r\n")
+                continue
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.wfile.write(b"250 stand-in\r\n")
+            elif command == b"DATA":
+                in_data = True
+                self.wfile.write(b"354 go ahead\r\n")
+            elif command == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+class SlowSmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay: float):
+        super().__init__(("127.0.0.1", 0), SlowSmtpHandler)
+        self.delay = delay
+        self.connections = 0
+        self.messages = 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", type=int, default=200, help="alerts, each triggered on every tick")
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--smtp-delay", type=float, default=0.05, help="seconds the mail server takes per message")
+    args = parser.parse_args()
+
+    smtp = SlowSmtpServer(args.smtp_delay)
+    threading.Thread(target=smtp.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read at import time, so configure them before importing the app
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'dispatch.db')}"
+        os.environ["PRINCIPAL_CACHE_REDIS"] = "false"
+        os.environ["UNREAD_COUNT_REDIS"] = "false"
+        os.environ["SMTP_SERVER"] = "127.0.0.1"
+        os.environ["SMTP_PORT"] = str(smtp.server_address[1])
+        os.environ["SMTP_FROM"] = "alerts@example.com"
+        os.environ["NOTIFICATION_QUEUE_SIZE"] = str(args.alerts * args.ticks)
+        from app.db.init_db import init_db
+        from app.db.session import SessionLocal
+        from app.models.notification import Notification
+        from app.models.user import User
+        from app.services.alert_registry import AlertRegistry, RegisteredAlert
+        from app.services.notification_dispatcher import notification_dispatcher
+
+        init_db()
+        registry = AlertRegistry()
+        with SessionLocal() as db:
+            users = [User(email=f"user{i}@example.com", hashed_password="x", is_active=True) for i in range(args.alerts)]
+            db.add_all(users)
+            db.commit()
+            for i, user in enumerate(users):
+                registry._add(RegisteredAlert(i + 1, i + 1, "BENCH", "price_above", 1.0, "email", 1.0, user.id))
+            emails = {user.id: user.email for user in users}
+
+        def send_inline(alert, price):
+            message = EmailMessage()
+            message["From"] = "alerts@example.com"
+            message["To"] = emails[alert.user_id]
+            message["Subject"] = "Alert for BENCH"
+            message.set_content(f"Current price ${price} has triggered your alert.")
+            with smtplib.SMTP(*smtp.server_address) as connection:
+                connection.send_message(message)
+
+        def submit(alert, price):
+            notification_dispatcher.submit({
+                "user_id": alert.user_id, "alert_id": alert.id, "symbol": alert.symbol,
+                "alert_type": alert.alert_type, "threshold_value": alert.threshold_value, "price": price,
+                "message": f"Alert for BENCH: Current price ${price} has triggered your alert.",
+                "timestamp": int(time.time()), "notification_method": alert.notification_method,
+            })
+
+        print(f"{args.alerts} alerts x {args.ticks} ticks, mail server {args.smtp_delay * 1000:.0f} ms per message")
+        for mode, deliver in (("inline", send_inline), ("dispatcher", submit)):
+            smtp.connections = smtp.messages = 0
+            if mode == "dispatcher":
+                notification_dispatcher.start()
+            start = time.perf_counter()
+            for tick in range(args.ticks):
+                price = 2.0 + tick
+                for alert in registry.get_triggered("BENCH", price):
+                    deliver(alert, price)
+            evaluated = time.perf_counter() - start
+            rate = args.alerts * args.ticks / evaluated
+            print(f"{mode:<11} evaluation {evaluated:7.3f} s   {rate:10.0f} triggered alerts/s")
+            if mode == "dispatcher":
+                # A user's notifications in one batch share an email, so wait for them all
+                # to be stored; stopping then lets the workers finish the last emails
+                deadline = time.monotonic() + 120
+                stored = 0
+                while stored < args.alerts * args.ticks and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    with SessionLocal() as db:
+                        stored = db.query(Notification).count()
+                notification_dispatcher.stop()
+                delivered = time.perf_counter() - start
+                print(
+                    f"{'':<11} delivered in {delivered:.2f} s: {stored} notifications stored, "
+                    f"{smtp.messages} emails over {smtp.connections} SMTP connections"
+                )
+            else:
+                print(f"{'':<11} {smtp.messages} emails over {smtp.connections} SMTP connections")
+    smtp.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Measure how alert evaluation splits across instances of the alert consumer group.
+
+Seeds a migrated SQLite database with one alert per asset over --symbols symbols,
+then for 1, 2, 4 and 8 instances gives each its own AlertRegistry and a range of
+the price topic's partitions, as Kafka's range assignor would, and assigns it.
+A stream of ticks over all symbols is routed by partition, like keyed messages
+are, and each instance evaluates only its share. Kafka isn't needed: the point
+is what each instance holds and does, not the transport.
+
+Reports the alerts each instance loaded and the evaluation time of the busiest
+instance, whose inverse is the group's throughput when instances run on
+separate cores or hosts. Checks that every alert is held by exactly one
+instance, also after an asset is moved to another symbol through a registry change.
+
+    cd backend && python -m benchmarks.partitioned_alerts --symbols 2000 --ticks 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=2000)
+    parser.add_argument("--alerts-per-symbol", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=200000)
+    parser.add_argument("--partitions", type=int, default=12)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Settings are read at import time, so configure them before importing the app
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'partitions.db')}"
+        os.environ["PRINCIPAL_CACHE_REDIS"] = "false"
+        from sqlalchemy import insert
+        from app.db.init_db import init_db
+        from app.db.session import SessionLocal
+        from app.models.portfolio import Alert, Asset, Portfolio
+        from app.models.user import User
+        from app.services.alert_registry import AlertRegistry
+        from app.services.kafka_topics import symbol_partition
+
+        init_db()
+        symbols = [f"SYM{i}" for i in range(args.symbols)]
+        with SessionLocal() as db:
+            user = User(email="bench@example.com", hashed_password="x", is_active=True)
+            db.add(user)
+            db.flush()
+            portfolio = Portfolio(name="Bench", user_id=user.id)
+            db.add(portfolio)
+            db.flush()
+            db.execute(insert(Asset), [
+                {"portfolio_id": portfolio.id, "symbol": symbol, "asset_type": "stock", "quantity": 1, "purchase_price": 100}
+                for symbol in symbols for _ in range(args.alerts_per_symbol)
+            ])
+            asset_ids = [asset_id for (asset_id,) in db.query(Asset.id).order_by(Asset.id)]
+            db.execute(insert(Alert), [
+                {"asset_id": asset_id, "alert_type": "price_above", "threshold_value": 100 + i % 50,
+                 "notification_method": "dashboard", "is_active": True}
+                for i, asset_id in enumerate(asset_ids)
+            ])
+            db.commit()
+        total = len(asset_ids)
+
+        rng = random.Random(0)
+        ticks = [(rng.choice(symbols), rng.uniform(90, 160)) for _ in range(args.ticks)]
+        print(f"{total} alerts over {args.symbols} symbols, {args.ticks} ticks, {args.partitions} partitions")
+
+        single = None
+        for instances in (1, 2, 4, 8):
+            registries = []
+            for member in range(instances):
+                # Contiguous partition ranges, as the range assignor hands them out
+                owned = set(range(member * args.partitions // instances, (member + 1) * args.partitions // instances))
+                registry = AlertRegistry()
+                with SessionLocal() as db:
+                    registry.assign(db, lambda symbol, owned=owned: symbol_partition(symbol, args.partitions) in owned)
+                registries.append((owned, registry))
+
+            # Route each tick to the instance that owns its partition
+            routed = [[] for _ in registries]
+            owner = {}
+            for index, (owned, _) in enumerate(registries):
+                for partition in owned:
+                    owner[partition] = index
+            for symbol, price in ticks:
+                routed[owner[symbol_partition(symbol, args.partitions)]].append((symbol, price))
+
+            elapsed = []
+            for (_, registry), share in zip(registries, routed):
+                start = time.perf_counter()
+                for symbol, price in share:
+                    registry.get_triggered(symbol, price)
+                elapsed.append(time.perf_counter() - start)
+            held = [len(registry._alerts) for _, registry in registries]
+            assert sum(held) == total, f"{sum(held)} alerts held, expected {total}"
+
+            # Move an asset to a symbol on another partition, as update_asset would, and
+            # apply the change on every instance as the registry sync does
+            asset_id = asset_ids[0]
+            with SessionLocal() as db:
+                asset = db.get(Asset, asset_id)
+                asset.symbol = next(
+                    symbol for symbol in symbols
+                    if symbol_partition(symbol, args.partitions) != symbol_partition(asset.symbol, args.partitions)
+                )
+                db.commit()
+                for _, registry in registries:
+                    missing = registry.apply_change({"assets": [[asset_id, asset.symbol, asset.purchase_price]]})
+                    if missing:
+                        registry.load_assets(db, missing)
+                holders = [registry for _, registry in registries if asset_id in registry._by_asset]
+                assert len(holders) == 1, f"moved asset held by {len(holders)} instances"
+                assert all(registry.get_alerts(asset.symbol) for registry in holders)
+
+            busiest = max(elapsed)
+            single = single or busiest
+            print(
+                f"{instances} instances   alerts held {min(held):>7}-{max(held):<7} "
+                f"busiest {busiest:6.3f} s   {args.ticks / busiest:10.0f} ticks/s   x{single / busiest:.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
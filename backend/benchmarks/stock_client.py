@@ -0,0 +1,104 @@
+"""
+Compare upstream quote fetching through the old per-call `requests.get`, the pooled
+sync client, and the pooled async client, against a local stand-in for Alpha Vantage.
+
+Sync calls run on a 40-thread pool, the size of Starlette's default threadpool, so
+queueing there shows up as added latency the same way it does for sync routes.
+
+    cd backend && python -m benchmarks.stock_client --requests 500 --latency-ms 250
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+THREADPOOL_SIZE = 40
+
+def serve_stand_in(latency_ms: float, ports: multiprocessing.Queue):
+    """Minimal keep-alive HTTP/1.1 server answering every GET with a GLOBAL_QUOTE payload"""
+    body = json.dumps({"Global Quote": {"01. symbol": "TEST", "05. price": "100.0000"}}).encode()
+    response = (
+        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                await asyncio.sleep(latency_ms / 1000)
+                writer.write(response)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+        ports.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+def start_stand_in(latency_ms: float) -> Tuple[multiprocessing.Process, int]:
+    """Run the stand-in in its own process so it doesn't compete with the clients for the GIL"""
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve_stand_in, args=(latency_ms, ports), daemon=True)
+    process.start()
+    return process, ports.get()
+
+def report(name: str, latencies, elapsed: float):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<22} {len(latencies) / elapsed:>9.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:>8.1f} ms   p99 {p99 * 1000:>8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=250)
+    args = parser.parse_args()
+
+    server, port = start_stand_in(args.latency_ms)
+    os.environ["ALPHA_VANTAGE_BASE_URL"] = f"http://127.0.0.1:{port}/query"
+    os.environ["STOCK_API_MAX_CONNECTIONS"] = "100"
+
+    import requests
+    from app.services.market_data import AlphaVantageProvider
+
+    provider = AlphaVantageProvider()
+    params = {"function": "GLOBAL_QUOTE", "symbol": "TEST", "apikey": "demo"}
+
+    def run_sync(fetch):
+        # Latency is measured from submission, so time queued for a pool thread counts
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=THREADPOOL_SIZE) as pool:
+            futures = [pool.submit(lambda: (fetch(), time.perf_counter())[1]) for _ in range(args.requests)]
+            finished = [f.result() for f in futures]
+        return [t - start for t in finished], time.perf_counter() - start
+
+    latencies, elapsed = run_sync(lambda: requests.get(provider.base_url, params=params))
+    report("requests.get (old)", latencies, elapsed)
+
+    latencies, elapsed = run_sync(lambda: provider.get_quote("TEST"))
+    report("pooled sync client", latencies, elapsed)
+
+    async def run_async():
+        start = time.perf_counter()
+        async def call():
+            await provider.aget_quote("TEST")
+            return time.perf_counter() - start
+        latencies = await asyncio.gather(*(call() for _ in range(args.requests)))
+        return latencies, time.perf_counter() - start
+
+    latencies, elapsed = asyncio.run(run_async())
+    report("pooled async client", latencies, elapsed)
+    server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Measure the per-tick cost of window alert evaluation at different window lengths.
+
+Feeds a random walk of one tick per second through PriceWindows with one alert of
+each window type, for windows from 1 minute up to WINDOW_ALERT_MAX_MINUTES. The
+cost per tick should stay flat as the window grows.
+
+    cd backend && python -m benchmarks.window_alerts --ticks 50000
+"""
+import argparse
+import random
+import time
+
+from app.core.config import settings
+from app.services.alert_registry import RegisteredAlert
+from app.services.price_window import PriceWindows
+
+def run(window_minutes: int, ticks: int) -> float:
+    windows = PriceWindows()
+    alerts = [
+        RegisteredAlert(1, 1, "BENCH", "window_change_percent", 5, "email", 100, 1, window_minutes),
+        RegisteredAlert(2, 1, "BENCH", "ma_crossover", 0.5, "email", 100, 1, window_minutes),
+        RegisteredAlert(3, 1, "BENCH", "volatility_spike", 4, "email", 100, 1, window_minutes),
+    ]
+    rng = random.Random(0)
+    price = 100.0
+    start = time.perf_counter()
+    for second in range(ticks):
+        price *= 1 + rng.gauss(0, 0.001)
+        windows.update("BENCH", second, price, alerts)
+    return (time.perf_counter() - start) / ticks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{args.ticks} ticks, buffer capacity {settings.PRICE_WINDOW_CAPACITY}")
+    for window_minutes in sorted({1, 5, 15, settings.WINDOW_ALERT_MAX_MINUTES}):
+        print(f"window {window_minutes:>4} min   {run(window_minutes, args.ticks) * 1e6:6.1f} us per tick")
+
+if __name__ == "__main__":
+    main()
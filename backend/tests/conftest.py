@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Settings are read at import time, so configure them before any test imports the
+# app. Tests get a disposable database of their own: a temporary SQLite file, or
+# the (empty, disposable) database in TEST_DATABASE_URL, never DATABASE_URL.
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='stock-pulse-tests-'), 'test.db')}"
+)
+os.environ["PRINCIPAL_CACHE_REDIS"] = "false"
+os.environ["PRICE_STREAM_REDIS"] = "false"
+os.environ["UNREAD_COUNT_REDIS"] = "false"
@@ -0,0 +1,86 @@
+"""
+The list endpoints must issue a constant number of SQL statements as data grows.
+
+Each size seeds a fresh in-memory SQLite database, then runs the repository call
+and response serialization behind the endpoint while counting the statements
+sent to the database.
+"""
+from contextlib import contextmanager
+from typing import Callable, List, Tuple
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.session import Base
+from app.models.user import User
+from app.models.portfolio import Portfolio, Asset, Alert
+from app.schemas.portfolio import Portfolio as PortfolioSchema
+from app.schemas.alert import Alert as AlertSchema
+from app.db.repositories.portfolio import get_portfolios
+from app.db.repositories.alert import get_alerts_by_asset
+
+SIZES = [1, 10, 100]
+PAGE_LIMIT = 50
+
+def seed(session, size: int) -> Tuple[int, int]:
+    """Create a user with `size` portfolios of `size` assets, the first asset having `size` alerts"""
+    user = User(email="user@example.com", hashed_password="x", is_active=True)
+    session.add(user)
+    session.flush()
+    first_asset = None
+    for p in range(size):
+        portfolio = Portfolio(name=f"Portfolio {p}", user_id=user.id)
+        session.add(portfolio)
+        session.flush()
+        for a in range(size):
+            asset = Asset(portfolio_id=portfolio.id, symbol=f"S{a}", asset_type="stock", quantity=1, purchase_price=10)
+            session.add(asset)
+            if first_asset is None:
+                session.flush()
+                first_asset = asset
+    session.add_all(
+        Alert(asset_id=first_asset.id, alert_type="price_above", threshold_value=i, notification_method="dashboard")
+        for i in range(size)
+    )
+    session.commit()
+    return user.id, first_asset.id
+
+@contextmanager
+def count_statements(engine, counts: List[int]):
+    def before_execute(*args):
+        counts[0] += 1
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+
+def measure(size: int, run: Callable) -> int:
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    with Session() as session:
+        user_id, asset_id = seed(session, size)
+    with Session() as session:
+        counts = [0]
+        with count_statements(engine, counts):
+            run(session, user_id, asset_id)
+    engine.dispose()
+    return counts[0]
+
+def list_portfolios(session, user_id: int, asset_id: int):
+    for portfolio in get_portfolios(session, user_id, PAGE_LIMIT):
+        PortfolioSchema.model_validate(portfolio, from_attributes=True)
+
+def list_alerts(session, user_id: int, asset_id: int):
+    for alert in get_alerts_by_asset(session, asset_id, user_id, PAGE_LIMIT):
+        AlertSchema.model_validate(alert, from_attributes=True)
+
+@pytest.mark.parametrize("run, expected", [
+    pytest.param(list_portfolios, 2, id="GET /api/portfolios"),
+    pytest.param(list_alerts, 1, id="GET /api/alerts/asset/{id}"),
+])
+def test_statement_count_is_constant(run: Callable, expected: int):
+    counts = [measure(size, run) for size in SIZES]
+    assert counts == [expected] * len(SIZES), f"statements at sizes {SIZES}: {counts}"
@@ -0,0 +1,129 @@
+"""
+The hot-path queries must be served by indexes rather than full table scans.
+
+Migrates the test database with the alembic migrations, seeds it, then runs the
+repository calls behind the API and alert evaluation while capturing the SQL they
+send. Each SELECT is explained: on SQLite with EXPLAIN QUERY PLAN, on PostgreSQL
+with EXPLAIN and sequential scans disabled, so a sequential scan in the plan means
+no usable index exists. Set TEST_DATABASE_URL to check against the production
+planner.
+"""
+import re
+from typing import Callable, List, Tuple
+import pytest
+from sqlalchemy import event, text
+
+from app.db.init_db import init_db
+from app.db.session import SessionLocal, engine
+from app.db.repositories import alert, notification, portfolio
+from app.models.user import User
+from app.models.portfolio import Portfolio, Asset, Alert
+from app.models.notification import Notification
+from app.services.alert_registry import AlertRegistry
+from app.services.tracked_symbols import TrackedSymbols
+
+USERS = 20
+PORTFOLIOS_PER_USER = 10
+ASSETS_PER_PORTFOLIO = 10
+ALERTS_PER_ASSET = 2
+NOTIFICATIONS_PER_USER = 100
+
+def seed(db) -> Tuple[int, int, int, int]:
+    """Create the fixture rows, returning a user with one of their portfolios, assets and alerts"""
+    for u in range(USERS):
+        user = User(email=f"user{u}@example.com", hashed_password="x", is_active=True)
+        db.add(user)
+        db.flush()
+        for p in range(PORTFOLIOS_PER_USER):
+            portfolio_row = Portfolio(name=f"Portfolio {p}", user_id=user.id)
+            db.add(portfolio_row)
+            db.flush()
+            for a in range(ASSETS_PER_PORTFOLIO):
+                asset = Asset(portfolio_id=portfolio_row.id, symbol=f"S{a}", asset_type="stock", quantity=1, purchase_price=10)
+                db.add(asset)
+                db.flush()
+                db.add_all(
+                    Alert(asset_id=asset.id, alert_type="price_above", threshold_value=i,
+                          notification_method="dashboard", is_active=i % 2 == 0)
+                    for i in range(ALERTS_PER_ASSET)
+                )
+        db.add_all(
+            Notification(user_id=user.id, alert_id=1, symbol="S0", alert_type="price_above", price=10,
+                         message="Alert", is_read=n % 10 != 0)
+            for n in range(NOTIFICATIONS_PER_USER)
+        )
+    db.commit()
+    return user.id, portfolio_row.id, asset.id, asset.alerts[0].id
+
+# Each case runs with (db, user_id, portfolio_id, asset_id, alert_id)
+CASES = {
+    "get_portfolios": lambda db, u, p, a, al: portfolio.get_portfolios(db, u, 50),
+    "get_portfolios after cursor": lambda db, u, p, a, al: portfolio.get_portfolios(db, u, 50, p - 1),
+    "get_portfolio": lambda db, u, p, a, al: portfolio.get_portfolio(db, p, u),
+    "get_portfolio_names": lambda db, u, p, a, al: portfolio.get_portfolio_names(db, u),
+    "get_portfolio_names of a portfolio": lambda db, u, p, a, al: portfolio.get_portfolio_names(db, u, p),
+    "get_positions": lambda db, u, p, a, al: portfolio.get_positions(db, u),
+    "get_positions of a portfolio": lambda db, u, p, a, al: portfolio.get_positions(db, u, p),
+    "get_asset": lambda db, u, p, a, al: portfolio.get_asset(db, a, u),
+    "get_alerts_by_asset": lambda db, u, p, a, al: alert.get_alerts_by_asset(db, a, u, 50),
+    "get_alerts_by_asset after cursor": lambda db, u, p, a, al: alert.get_alerts_by_asset(db, a, u, 50, al),
+    "get_alert": lambda db, u, p, a, al: alert.get_alert(db, al, u),
+    "alert registry load": lambda db, u, p, a, al: AlertRegistry().load(db),
+    "alert registry assign": lambda db, u, p, a, al: AlertRegistry().assign(db, lambda symbol: symbol.endswith("1")),
+    "alert registry load_assets": lambda db, u, p, a, al: AlertRegistry().load_assets(db, [a]),
+    "tracked symbols rebuild": lambda db, u, p, a, al: TrackedSymbols().rebuild(db),
+    "tracked symbols refresh": lambda db, u, p, a, al: TrackedSymbols().refresh(db, ["S1", "S2"], holdings=True),
+    "get_notifications": lambda db, u, p, a, al: notification.get_notifications(db, u, 50),
+    "get_notifications after cursor": lambda db, u, p, a, al: notification.get_notifications(db, u, 50, 2 ** 31),
+    "get_notifications unread only": lambda db, u, p, a, al: notification.get_notifications(db, u, 50, None, True),
+    "count_unread": lambda db, u, p, a, al: notification.count_unread(db, u),
+}
+
+@pytest.fixture(scope="module")
+def fixture_ids() -> Tuple[int, int, int, int]:
+    init_db()
+    with SessionLocal() as db:
+        ids = seed(db)
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    return ids
+
+def capture(run: Callable, db) -> List[Tuple[str, object]]:
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return statements
+
+def explain(connection, statement: str, parameters) -> Tuple[List[str], List[str]]:
+    """Return the plan lines and the tables it reads with a full scan"""
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        plan = [row[-1] for row in rows]
+        # "SCAN assets" reads the whole table; "SCAN assets USING INDEX ..." reads an index
+        scans = [m.group(1) for line in plan for m in [re.fullmatch(r"SCAN (\w+)", line)] if m]
+    else:
+        plan = [row[0] for row in connection.exec_driver_sql("EXPLAIN " + statement, parameters).all()]
+        scans = [m.group(1) for line in plan for m in [re.search(r"Seq Scan on (\w+)", line)] if m]
+    return plan, scans
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_query_uses_indexes(name: str, fixture_ids: Tuple[int, int, int, int]):
+    with SessionLocal() as db:
+        statements = capture(lambda db: CASES[name](db, *fixture_ids), db)
+    assert statements, "no query captured"
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SET enable_seqscan = off"))
+        for statement, parameters in statements:
+            plan, scans = explain(connection, statement, parameters)
+            assert not scans, (
+                f"full scan of {', '.join(scans)}\n    {' '.join(statement.split())}\n      " + "\n      ".join(plan)
+            )
@@ -2,6 +2,9 @@ import React, { useState, useEffect } from 'react';
 import { useParams, Link, useNavigate } from 'react-router-dom';
 import { getAlertsByAsset, createAlert, updateAlert, deleteAlert } from '../services/api';
 
+// Alert types evaluated over the last window_minutes of prices
+const WINDOW_ALERT_TYPES = ['window_change_percent', 'ma_crossover', 'volatility_spike'];
+
 const AssetAlerts = () => {
   const { assetId } = useParams();
   const navigate = useNavigate();
@@ -13,6 +16,7 @@ const AssetAlerts = () => {
     alert_type: 'price_above',
     threshold_value: '',
     notification_method: 'email',
+    window_minutes: '',
     is_active: true
   });
   const [editingAlertId, setEditingAlertId] = useState(null);
@@ -51,12 +55,18 @@ const AssetAlerts = () => {
       setError('Please enter a threshold value');
       return;
     }
+    const isWindowAlert = WINDOW_ALERT_TYPES.includes(formData.alert_type);
+    if (isWindowAlert && !formData.window_minutes) {
+      setError('Please enter a window in minutes');
+      return;
+    }
 
     try {
       const alertData = {
         ...formData,
         asset_id: parseInt(assetId),
-        threshold_value: parseFloat(formData.threshold_value)
+        threshold_value: parseFloat(formData.threshold_value),
+        window_minutes: isWindowAlert ? parseInt(formData.window_minutes) : null
       };
 
       if (editingAlertId) {
@@ -70,6 +80,7 @@ const AssetAlerts = () => {
         alert_type: 'price_above',
         threshold_value: '',
         notification_method: 'email',
+        window_minutes: '',
         is_active: true
       });
       setShowForm(false);
@@ -85,7 +96,9 @@ const AssetAlerts = () => {
     setFormData({
       alert_type: alert.alert_type,
       threshold_value: alert.threshold_value.toString(),
-      notification_method: alert.notification_method,
+      // SMS is no longer offered; older SMS alerts switch to the closest remaining method
+      notification_method: { sms: 'dashboard', both: 'email' }[alert.notification_method] || alert.notification_method,
+      window_minutes: alert.window_minutes ? alert.window_minutes.toString() : '',
       is_active: alert.is_active
     });
     setEditingAlertId(alert.id);
@@ -131,6 +144,7 @@ const AssetAlerts = () => {
                 alert_type: 'price_above',
                 threshold_value: '',
                 notification_method: 'email',
+                window_minutes: '',
                 is_active: true
               });
             }}
@@ -174,6 +188,9 @@ const AssetAlerts = () => {
                     <option value="price_above">Price Above</option>
                     <option value="price_below">Price Below</option>
                     <option value="price_change_percent">Price Change %</option>
+                    <option value="window_change_percent">Change % Over Window</option>
+                    <option value="ma_crossover">Moving Average Crossover</option>
+                    <option value="volatility_spike">Volatility Spike</option>
                   </select>
                 </div>
 
@@ -192,12 +209,35 @@ const AssetAlerts = () => {
                     required
                   />
                   <p className="mt-1 text-xs text-gray-500">
-                    {formData.alert_type === 'price_change_percent' 
-                      ? 'Enter percentage value (e.g., 5 for 5%)' 
+                    {formData.alert_type === 'price_change_percent' || formData.alert_type === 'window_change_percent'
+                      ? 'Enter percentage value (e.g., 5 for 5%)'
+                      : formData.alert_type === 'ma_crossover'
+                      ? 'Enter the margin past the average in percent (0 for any crossing)'
+                      : formData.alert_type === 'volatility_spike'
+                      ? 'Enter the move size in standard deviations (e.g., 3)'
                       : 'Enter price value in dollars'}
                   </p>
                 </div>
 
+                {WINDOW_ALERT_TYPES.includes(formData.alert_type) && (
+                  <div className="col-span-6 sm:col-span-3">
+                    <label htmlFor="window_minutes" className="block text-sm font-medium text-gray-700">
+                      Window (minutes)
+                    </label>
+                    <input
+                      type="number"
+                      name="window_minutes"
+                      id="window_minutes"
+                      value={formData.window_minutes}
+                      onChange={handleChange}
+                      className="mt-1 focus:ring-indigo-500 focus:border-indigo-500 block w-full shadow-sm sm:text-sm border-gray-300 rounded-md"
+                      min="1"
+                      step="1"
+                      required
+                    />
+                  </div>
+                )}
+
                 <div className="col-span-6 sm:col-span-3">
                   <label htmlFor="notification_method" className="block text-sm font-medium text-gray-700">
                     Notification Method
@@ -210,8 +250,7 @@ const AssetAlerts = () => {
                     className="mt-1 block w-full py-2 px-3 border border-gray-300 bg-white rounded-md shadow-sm focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 sm:text-sm"
                   >
                     <option value="email">Email</option>
-                    <option value="sms">SMS</option>
-                    <option value="both">Both Email & SMS</option>
+                    <option value="dashboard">Dashboard only</option>
                   </select>
                 </div>
 
@@ -304,14 +343,20 @@ const AssetAlerts = () => {
                       {alert.alert_type === 'price_above' && 'Price Above'}
                       {alert.alert_type === 'price_below' && 'Price Below'}
                       {alert.alert_type === 'price_change_percent' && 'Price Change %'}
+                      {alert.alert_type === 'window_change_percent' && `Change % over ${alert.window_minutes} min`}
+                      {alert.alert_type === 'ma_crossover' && `${alert.window_minutes} min MA Crossover`}
+                      {alert.alert_type === 'volatility_spike' && `Volatility Spike (${alert.window_minutes} min)`}
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
-                      {alert.alert_type === 'price_change_percent' 
-                        ? `${alert.threshold_value}%` 
+                      {alert.alert_type === 'volatility_spike'
+                        ? `${alert.threshold_value}σ`
+                        : alert.alert_type === 'price_change_percent' || WINDOW_ALERT_TYPES.includes(alert.alert_type)
+                        ? `${alert.threshold_value}%`
                         : `$${alert.threshold_value.toFixed(2)}`}
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap text-sm text-gray-500">
                       {alert.notification_method === 'email' && 'Email'}
+                      {alert.notification_method === 'dashboard' && 'Dashboard only'}
                       {alert.notification_method === 'sms' && 'SMS'}
                       {alert.notification_method === 'both' && 'Email & SMS'}
                     </td>
@@ -1,11 +1,16 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import { getPortfolios } from '../services/api';
+import { getPortfolios, getNotifications, getUnreadCount, markNotificationsRead } from '../services/api';
+
+const NOTIFICATION_POLL_MS = 30000;
 
 const Dashboard = () => {
   const [portfolios, setPortfolios] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [notifications, setNotifications] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [unread, setUnread] = useState(0);
 
   useEffect(() => {
     const fetchPortfolios = async () => {
@@ -23,6 +28,56 @@ const Dashboard = () => {
     fetchPortfolios();
   }, []);
 
+  useEffect(() => {
+    // The badge is one cached counter read, so it is cheap to poll
+    const fetchUnread = async () => {
+      try {
+        setUnread(await getUnreadCount());
+      } catch (error) {
+        console.error('Error fetching unread count', error);
+      }
+    };
+    const fetchNotifications = async () => {
+      try {
+        const page = await getNotifications({ limit: 10 });
+        setNotifications(page.notifications);
+        setNextCursor(page.nextCursor);
+      } catch (error) {
+        console.error('Error fetching notifications', error);
+      }
+    };
+
+    fetchNotifications();
+    fetchUnread();
+    const timer = setInterval(fetchUnread, NOTIFICATION_POLL_MS);
+    return () => clearInterval(timer);
+  }, []);
+
+  const loadMoreNotifications = async () => {
+    try {
+      const page = await getNotifications({ after: nextCursor, limit: 10 });
+      setNotifications([...notifications, ...page.notifications]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error fetching notifications', error);
+    }
+  };
+
+  const markAllRead = async () => {
+    // Without an upTo the server marks every notification read, including ones never shown
+    if (notifications.length === 0) {
+      return;
+    }
+    try {
+      // Only up to the newest one shown, so anything that arrived since stays unread
+      const result = await markNotificationsRead({ upTo: notifications[0].id });
+      setUnread(result.unread);
+      setNotifications(notifications.map((notification) => ({ ...notification, is_read: true })));
+    } catch (error) {
+      console.error('Error marking notifications read', error);
+    }
+  };
+
   if (loading) {
     return (
       <div className="text-center py-10">
@@ -126,6 +181,11 @@ const Dashboard = () => {
           <div className="px-4 py-5 sm:p-6">
             <h3 className="text-lg leading-6 font-medium text-gray-900">
               Recent Alerts
+              {unread > 0 && notifications.length > 0 && (
+                <span className="ml-2 px-2 inline-flex text-xs leading-5 font-semibold rounded-full bg-red-100 text-red-800">
+                  {unread} unread
+                </span>
+              )}
             </h3>
             <div className="mt-2 max-w-xl text-sm text-gray-500">
               <p>Stay updated with your latest stock alerts.</p>
@@ -202,6 +262,53 @@ const Dashboard = () => {
         </div>
       </div>
 
+      {/* Notifications Section */}
+      <div className="mt-8">
+        <div className="flex items-center justify-between">
+          <h2 className="text-lg font-medium text-gray-900">Notifications</h2>
+          {unread > 0 && notifications.length > 0 && (
+            <button
+              onClick={markAllRead}
+              className="text-sm font-medium text-indigo-600 hover:text-indigo-500"
+            >
+              Mark all read
+            </button>
+          )}
+        </div>
+        <div className="mt-4 bg-white shadow overflow-hidden sm:rounded-md">
+          {notifications.length === 0 ? (
+            <div className="px-4 py-5 sm:p-6 text-center">
+              <p className="text-gray-500">No alerts have triggered yet.</p>
+            </div>
+          ) : (
+            <ul className="divide-y divide-gray-200">
+              {notifications.map((notification) => (
+                <li key={notification.id} className="px-4 py-4 sm:px-6">
+                  <div className="flex items-center justify-between">
+                    <p className={`text-sm ${notification.is_read ? 'text-gray-500' : 'font-medium text-gray-900'}`}>
+                      {notification.message}
+                    </p>
+                    <p className="ml-2 flex-shrink-0 text-xs text-gray-500">
+                      {new Date(notification.created_at).toLocaleString()}
+                    </p>
+                  </div>
+                </li>
+              ))}
+            </ul>
+          )}
+          {nextCursor && (
+            <div className="bg-gray-50 px-4 py-3 text-right sm:px-6">
+              <button
+                onClick={loadMoreNotifications}
+                className="text-sm font-medium text-indigo-600 hover:text-indigo-500"
+              >
+                Load more
+              </button>
+            </div>
+          )}
+        </div>
+      </div>
+
       {/* Market Overview Section */}
       <div className="mt-8">
         <h2 className="text-lg font-medium text-gray-900">Market Overview</h2>
@@ -75,6 +75,18 @@ export const addAsset = async (portfolioId, asset) => {
   return response.data;
 };
 
+// Bulk-add assets from a CSV File or an array of assets; resolves to
+// { errors: [{ row, errors }], summary: { imported, failed, symbols } }
+export const importAssets = async (portfolioId, source) => {
+  const isCsv = !Array.isArray(source);
+  const response = await api.post(`/portfolios/${portfolioId}/assets/import`, source, {
+    headers: { 'Content-Type': isCsv ? 'text/csv' : 'application/json' },
+    responseType: 'text',
+  });
+  const lines = response.data.split('\n').filter(Boolean).map((line) => JSON.parse(line));
+  return { errors: lines.slice(0, -1), summary: lines[lines.length - 1] };
+};
+
 export const updateAsset = async (assetId, asset) => {
   const response = await api.put(`/portfolios/assets/${assetId}`, asset);
   return response.data;
@@ -107,6 +119,12 @@ export const createAlert = async (alert) => {
   return response.data;
 };
 
+// Apply { create: [...], update: [{ id, ...changes }], delete: [ids] } in one request
+export const applyAlertBatch = async (batch) => {
+  const response = await api.post('/alerts/batch', batch);
+  return response.data;
+};
+
 export const getAlertsByAsset = async (assetId) => {
   const response = await api.get(`/alerts/asset/${assetId}`);
   return response.data;
@@ -122,4 +140,22 @@ export const deleteAlert = async (alertId) => {
   return response.data;
 };
 
+// Notification services
+// Newest first; pass the X-Next-Cursor of the previous page as `after`
+export const getNotifications = async ({ after, limit = 20, unreadOnly = false } = {}) => {
+  const response = await api.get('/notifications', { params: { after, limit, unread_only: unreadOnly } });
+  return { notifications: response.data, nextCursor: response.headers['x-next-cursor'] };
+};
+
+export const getUnreadCount = async () => {
+  const response = await api.get('/notifications/unread-count');
+  return response.data.unread;
+};
+
+// Mark notifications with ids from `fromId` to `upTo` read, or all of them
+export const markNotificationsRead = async ({ upTo, fromId } = {}) => {
+  const response = await api.post('/notifications/read', { up_to: upTo, from_id: fromId });
+  return response.data;
+};
+
 export default api;
\ No newline at end of file